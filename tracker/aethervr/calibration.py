@@ -0,0 +1,98 @@
+from typing import Optional
+import platform
+import time
+import os
+
+import numpy as np
+
+from aethervr.config import Config, ResolutionCalibration
+from aethervr.camera_capture2 import Camera
+from aethervr.tracking_state import TrackingState
+
+
+WARMUP_FRAMES = 2
+MEASURED_FRAMES = 5
+# How long to wait for the user to show their face and hands before calibrating on whatever the camera sees.
+FRAME_TIMEOUT = 30.0
+
+
+def get_hardware_id(camera: Camera, config: Config) -> str:
+    # The calibration has to be repeated if anything that affects inference speed or the available resolutions
+    # changes.
+    parts = [
+        platform.machine(),
+        platform.processor(),
+        str(os.cpu_count()),
+        camera.name,
+        config.head_inference_config.delegate.name,
+        config.hand_inference_config.delegate.name,
+    ]
+
+    return "|".join(parts)
+
+
+# A frame is only representative if the landmarkers find the face and both hands in it.
+# Returns the ID of the frame if the latest head and hand results come from the same frame and show the face and both
+# hands.
+def get_user_frame_id(tracking_state: TrackingState) -> Optional[int]:
+    head = tracking_state.head
+    left_hand = tracking_state.left_hand
+    right_hand = tracking_state.right_hand
+
+    if not (head.visible and left_hand.visible and right_hand.visible):
+        return None
+
+    if head.frame_id == 0 or head.frame_id != left_hand.frame_id or head.frame_id != right_hand.frame_id:
+        return None
+
+    return head.frame_id
+
+
+# The landmarkers are timed on a camera frame that shows the user, scaled to each resolution. After the warm-up frames
+# they track the face and hands found in it like during normal tracking, so the face mesh, blendshape and hand
+# landmark models are measured, not only the detectors that run when nothing is found.
+def calibrate(camera: Camera, config: Config, frame: np.ndarray) -> ResolutionCalibration:
+    import cv2
+    from mediapipe.tasks.python.vision import RunningMode
+    from aethervr.head_tracker import HeadTracker
+    from aethervr.hand_tracker import HandTracker
+
+    print("Calibrating capture resolution...")
+
+    head_detector = HeadTracker.create_detector(config.head_inference_config, RunningMode.VIDEO)
+    hand_detector = HandTracker.create_detector(config.hand_inference_config, RunningMode.VIDEO)
+
+    sizes = sorted({(resolution.width, resolution.height) for resolution in camera.resolutions})
+    inference_times = []
+    timestamp = 0
+
+    try:
+        for width, height in sizes:
+            scaled_frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+            total_time = 0.0
+
+            for i in range(WARMUP_FRAMES + MEASURED_FRAMES):
+                start_time = time.perf_counter()
+                _detect(head_detector, scaled_frame, timestamp)
+                _detect(hand_detector, scaled_frame, timestamp)
+                timestamp += 1
+
+                if i >= WARMUP_FRAMES:
+                    total_time += time.perf_counter() - start_time
+
+            inference_time = total_time / MEASURED_FRAMES
+            inference_times.append((width, height, inference_time))
+
+            print(f"  {width}x{height}: {1000.0 * inference_time:.1f} ms")
+    finally:
+        head_detector.close()
+        hand_detector.close()
+
+    return ResolutionCalibration(hardware_id=get_hardware_id(camera, config), inference_times=inference_times)
+
+
+def _detect(detector, frame, timestamp: int):
+    import mediapipe as mp
+
+    image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
+    detector.detect_for_video(image, timestamp)
@@ -1,8 +1,9 @@
-import cv2
 from threading import Thread, Event
 from copy import copy
+import time
 
 from aethervr.config import CaptureConfig
+from aethervr import tracing
 
 
 class CameraCapture:
@@ -16,6 +17,7 @@ class CameraCapture:
         self.active_config: CaptureConfig = None
         self.running = Event()
         self.thread = None
+        self.next_frame_id = 1
 
     def start(self):
         self.active_config = copy(self.source_config)
@@ -32,6 +34,9 @@ class CameraCapture:
         self.start()
 
     def capture_images(self):
+        # OpenCV takes a while to import and is only needed by this capture backend.
+        import cv2
+
         print("Opening capture device...")
 
         capture = cv2.VideoCapture(self.active_config.camera_index)
@@ -45,18 +50,31 @@ class CameraCapture:
         print("Capture device opened")
 
         while self.running.is_set():
+            start_time = time.perf_counter()
             ret, frame = capture.read()
             if not ret:
                 print("Failed to capture camera image")
                 continue
 
-            self.frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            self.frame = cv2.flip(self.frame, 1)
-            self.on_frame(self.frame)
+            frame_id = self.next_frame_id
+            self.next_frame_id += 1
+            tracing.record("capture read", frame_id, start_time, time.perf_counter())
+
+            with tracing.span("convert frame", frame_id):
+                self.frame = CameraCapture.convert_frame(frame)
+
+            self.on_frame(self.frame, frame_id)
 
         capture.release()
         print("Camera capture closed")
 
+    @staticmethod
+    def convert_frame(frame):
+        import cv2
+
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return cv2.flip(frame, 1)
+
     def close(self):
         if not self.running.is_set():
             return
@@ -1,20 +1,47 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from threading import Thread, Event
 from copy import copy
-from typing import Callable
+from typing import Callable, Optional
+import time
 
 import numpy as np
 import numpy.typing
 
 from aethervr import ffi
+from aethervr import tracing
 from aethervr.config import CaptureConfig
 
 
+# MJPG frames are decoded by the tracker instead of SDL, optionally at a reduced size.
+MJPEG_FORMAT = "MJPG"
+DECODE_SCALES = (1, 2, 4)
+
+# Requested from cameras that don't list any modes.
+FALLBACK_FRAME_RATE = 30
+
+
 @dataclass
 class Camera:
     id: int
     name: str
     resolutions: list["Resolution"]
+    modes: list["CameraMode"] = field(default_factory=list)
+
+    def get_frame_rates(self, width: int, height: int) -> list[float]:
+        frame_rates = {mode.frame_rate() for mode in self.modes if mode.width == width and mode.height == height}
+        return sorted(frame_rates, reverse=True)
+
+    def get_formats(self, width: int, height: int) -> list[str]:
+        formats = []
+
+        for mode in self.modes:
+            if mode.width != width or mode.height != height:
+                continue
+
+            if mode.format_name not in formats:
+                formats.append(mode.format_name)
+
+        return formats
 
 
 @dataclass
@@ -23,6 +50,23 @@ class Resolution:
     height: int
 
 
+# A combination of resolution, frame rate and pixel format that the camera supports natively.
+@dataclass
+class CameraMode:
+    width: int
+    height: int
+    frame_rate_numerator: int
+    frame_rate_denominator: int
+    format: int
+    format_name: str
+
+    def frame_rate(self) -> float:
+        if self.frame_rate_denominator == 0:
+            return 0.0
+
+        return self.frame_rate_numerator / self.frame_rate_denominator
+
+
 class CameraCapture2:
 
     PREFERRED_RESOLUTIONS = [
@@ -36,7 +80,7 @@ class CameraCapture2:
     def __init__(
         self,
         config: CaptureConfig,
-        on_frame: Callable[[numpy.typing.ArrayLike], None],
+        on_frame: Callable[[numpy.typing.ArrayLike, int], None],
         on_error: Callable[[], None],
     ):
         self.source_config = config
@@ -46,20 +90,25 @@ class CameraCapture2:
         self.active_config: CaptureConfig = None
         self.running = Event()
         self.thread = None
+        self.next_frame_id = 1
+
+        # Enumerating cameras can take a while, so it is deferred until `enumerate_cameras` is called during
+        # background initialization.
+        self.cameras: list[Camera] = []
+        self.enumerated = False
 
+    def enumerate_cameras(self):
         self.cameras = self._enumerate_cameras()
+        config = self.source_config
 
         if type(config.camera) is str:
-            name = config.camera
-            config.camera = None
-
-            for camera in self.cameras:
-                if camera.name == name:
-                    config.camera = camera
+            config.camera = find_camera(self.cameras, config.camera)
 
         if not config.camera:
             self._pick_suitable_config()
 
+        self.enumerated = True
+
     def start(self):
         print("Opening capture device...")
 
@@ -76,6 +125,36 @@ class CameraCapture2:
         self.thread = Thread(target=self._capture_images)
         self.thread.start()
 
+    # Only reopens the camera if the config changed since it was opened or it isn't running.
+    def restart(self):
+        if self.running.is_set() and self.source_config == self.active_config:
+            return
+
+        self.start()
+
+    def limit_frame_height(self, max_height: int):
+        camera = self.source_config.camera
+
+        if type(camera) is not Camera or not camera.resolutions:
+            return
+
+        candidates = [resolution for resolution in camera.resolutions if resolution.height <= max_height]
+
+        if candidates:
+            resolution = max(candidates, key=lambda r: (r.height, CameraCapture2._resolution_preference(r)))
+        else:
+            resolution = min(camera.resolutions, key=lambda r: r.height)
+
+        if resolution.width == self.source_config.frame_width and resolution.height == self.source_config.frame_height:
+            return
+
+        self.source_config.frame_width = resolution.width
+        self.source_config.frame_height = resolution.height
+
+        # Only the capture device has to be reopened, tracking keeps running.
+        if self.running.is_set():
+            self.start()
+
     def close(self):
         if not self.running.is_set():
             return
@@ -103,10 +182,27 @@ class CameraCapture2:
                 
                 resolutions.append(resolution)
 
+            modes = []
+
+            for j in range(ffi_camera.num_modes):
+                ffi_mode = ffi_camera.modes[j]
+
+                mode = CameraMode(
+                    width=ffi_mode.width,
+                    height=ffi_mode.height,
+                    frame_rate_numerator=ffi_mode.framerate_numerator,
+                    frame_rate_denominator=ffi_mode.framerate_denominator,
+                    format=ffi_mode.format,
+                    format_name=ffi_mode.format_name.decode("utf-8").removeprefix("SDL_PIXELFORMAT_"),
+                )
+
+                modes.append(mode)
+
             camera = Camera(
                 id=ffi_camera.id,
                 name=ffi_camera.name.decode("utf-8"),
                 resolutions=resolutions,
+                modes=modes,
             )
 
             cameras.append(camera)
@@ -130,12 +226,66 @@ class CameraCapture2:
         self.source_config.frame_width = resolution.width
         self.source_config.frame_height = resolution.height
 
+    @staticmethod
+    def _resolution_preference(resolution: Resolution) -> int:
+        if resolution not in CameraCapture2.PREFERRED_RESOLUTIONS:
+            return 0
+
+        return len(CameraCapture2.PREFERRED_RESOLUTIONS) - CameraCapture2.PREFERRED_RESOLUTIONS.index(resolution)
+
+    @staticmethod
+    def convert_frame(pixels, width: int, height: int) -> np.ndarray:
+        # The pixels belong to the native frame, which is destroyed after the hand-off, so the result has to be a copy.
+        np_array = np.ctypeslib.as_array(pixels, (height, width, 3))
+        return np.flip(np_array, 1).copy()
+
+    @staticmethod
+    def decode_frame(data: np.ndarray, scale: int) -> Optional[np.ndarray]:
+        import cv2
+
+        # libjpeg scales the image while decoding (in the DCT domain), so a reduced size is also much faster to decode
+        # and produces less data for the rest of the pipeline.
+        if scale == 4:
+            flags = cv2.IMREAD_REDUCED_COLOR_4
+        elif scale == 2:
+            flags = cv2.IMREAD_REDUCED_COLOR_2
+        else:
+            flags = cv2.IMREAD_COLOR
+
+        frame = cv2.imdecode(data, flags)
+
+        if frame is None:
+            return None
+
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return cv2.flip(frame, 1)
+
     def _capture_images(self):
-        if type(self.active_config.camera) is Camera:
+        config = self.active_config
+
+        if type(config.camera) is Camera:
+            mode = select_mode(config.camera, config)
+
+            # Without a selected format, SDL picks the camera format itself and converts the frames to RGB.
+            format = mode.format if mode is not None and mode.format_name == config.pixel_format else 0
+            decoded = format != 0 and mode.format_name == MJPEG_FORMAT
+
+            if mode is not None:
+                frame_rate = (mode.frame_rate_numerator, mode.frame_rate_denominator)
+                description = f"{mode.width}x{mode.height} @ {mode.frame_rate():g} fps, {mode.format_name}"
+
+                if decoded and config.decode_scale != 1:
+                    description += f" decoded at 1/{config.decode_scale} size"
+            else:
+                frame_rate = (round(config.frame_rate) or FALLBACK_FRAME_RATE, 1)
+                description = f"{config.frame_width}x{config.frame_height}"
+
             capture = ffi.camera_capture.aethervr_camera_open(
-                self.active_config.camera.id,
-                self.active_config.frame_width,
-                self.active_config.frame_height,
+                config.camera.id,
+                config.frame_width,
+                config.frame_height,
+                *frame_rate,
+                format,
             )
         else:
             capture = None
@@ -145,23 +295,104 @@ class CameraCapture2:
             self.running.clear()
             return
 
-        print("Capture device opened")
+        print(f"Capture device opened ({description})")
+
+        # OpenCV takes a while to import and is only needed for decoding MJPG frames. It's imported here so that the
+        # import doesn't delay the first frame.
+        if decoded:
+            import cv2
 
         while self.running.is_set():
+            start_time = time.perf_counter()
             frame = ffi.camera_capture.aethervr_camera_capture_frame(capture)
 
             if not frame:
                 continue
 
-            width = frame.contents.width
-            height = frame.contents.height
-            pixels = frame.contents.pixels
-            np_array = np.ctypeslib.as_array(pixels, (height, width, 3))
-
-            np_array = np.flip(np_array, 1)
-            self.on_frame(np_array.copy())
+            frame_id = self.next_frame_id
+            self.next_frame_id += 1
+            tracing.record("capture read", frame_id, start_time, time.perf_counter())
+
+            if frame.contents.compressed:
+                # The compressed data is only read while decoding, so it doesn't have to be copied.
+                with tracing.span("decode frame", frame_id):
+                    data = np.ctypeslib.as_array(frame.contents.pixels, (frame.contents.size,))
+                    np_array = CameraCapture2.decode_frame(data, config.decode_scale)
+            else:
+                with tracing.span("flip frame", frame_id):
+                    np_array = CameraCapture2.convert_frame(
+                        frame.contents.pixels,
+                        frame.contents.width,
+                        frame.contents.height,
+                    )
+
+            if np_array is not None:
+                self.on_frame(np_array, frame_id)
+            else:
+                print("Failed to decode camera frame")
 
             ffi.camera_capture.aethervr_camera_destroy_frame(frame)
 
         ffi.camera_capture.aethervr_camera_close(capture)
         print("Capture device closed")
+
+
+def find_camera(cameras: list[Camera], name: str) -> Optional[Camera]:
+    for camera in cameras:
+        if camera.name == name:
+            return camera
+
+    return None
+
+
+# Picks the camera mode to open for the configured resolution. The frame rate and format are only preferences because
+# the resolution can be changed automatically to one where they aren't available.
+def select_mode(camera: Camera, config: CaptureConfig) -> Optional[CameraMode]:
+    modes = [mode for mode in camera.modes if mode.width == config.frame_width and mode.height == config.frame_height]
+    modes_with_format = [mode for mode in modes if mode.format_name == config.pixel_format]
+
+    if modes_with_format:
+        modes = modes_with_format
+
+    if not modes:
+        return None
+
+    if config.frame_rate > 0.0:
+        return min(modes, key=lambda mode: abs(mode.frame_rate() - config.frame_rate))
+
+    # Higher frame rates mean less motion blur and fresher frames for tracking.
+    return max(modes, key=lambda mode: mode.frame_rate())
+
+
+def serialize_cameras(cameras: list[Camera]) -> list[dict]:
+    return [
+        {
+            "id": camera.id,
+            "name": camera.name,
+            "resolutions": [[resolution.width, resolution.height] for resolution in camera.resolutions],
+            "modes": [
+                [
+                    mode.width,
+                    mode.height,
+                    mode.frame_rate_numerator,
+                    mode.frame_rate_denominator,
+                    mode.format,
+                    mode.format_name,
+                ]
+                for mode in camera.modes
+            ],
+        }
+        for camera in cameras
+    ]
+
+
+def deserialize_cameras(data: list[dict]) -> list[Camera]:
+    return [
+        Camera(
+            id=camera["id"],
+            name=camera["name"],
+            resolutions=[Resolution(width, height) for width, height in camera["resolutions"]],
+            modes=[CameraMode(*mode) for mode in camera["modes"]],
+        )
+        for camera in data
+    ]
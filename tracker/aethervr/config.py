@@ -10,6 +10,20 @@ from aethervr.event_source import EventSource
 class HandTrackingMode(Enum):
     DIRECT = 0
     SMOOTH = 1
+    ONE_EURO = 2
+    KALMAN = 3
+
+
+class InferenceDelegate(Enum):
+    CPU = 0
+    GPU = 1
+
+
+class PerformanceProfile(Enum):
+    CUSTOM = 0
+    LOW_LATENCY = 1
+    BALANCED = 2
+    LOW_CPU = 3
 
 
 LEFT_HAND_TRACKING_ORIGIN = (0.2, 0.6)
@@ -45,6 +59,20 @@ CONTROLLER_BUTTON_NAMES = (
 HAND_TRACKING_MODE_NAMES = (
     (HandTrackingMode.DIRECT, "direct"),
     (HandTrackingMode.SMOOTH, "smooth"),
+    (HandTrackingMode.ONE_EURO, "one_euro"),
+    (HandTrackingMode.KALMAN, "kalman"),
+)
+
+INFERENCE_DELEGATE_NAMES = (
+    (InferenceDelegate.CPU, "cpu"),
+    (InferenceDelegate.GPU, "gpu"),
+)
+
+PERFORMANCE_PROFILE_NAMES = (
+    (PerformanceProfile.CUSTOM, "custom"),
+    (PerformanceProfile.LOW_LATENCY, "low_latency"),
+    (PerformanceProfile.BALANCED, "balanced"),
+    (PerformanceProfile.LOW_CPU, "low_cpu"),
 )
 
 
@@ -53,17 +81,39 @@ class CaptureConfig:
     camera: Any
     frame_width: int
     frame_height: int
+    # 0 picks the highest frame rate of the camera at the selected resolution.
+    frame_rate: float
+    # Name of the camera's pixel format, empty to let SDL pick one.
+    pixel_format: str
+    # MJPG frames are decoded at 1/decode_scale of the capture resolution.
+    decode_scale: int
 
     def deserialize(self, data: Dict[str, Any]):
         self.camera = data["camera"]
         self.frame_width = data["frame_width"]
         self.frame_height = data["frame_height"]
 
+        if "frame_rate" in data:
+            self.frame_rate = float(data["frame_rate"])
+            self.pixel_format = data["pixel_format"]
+
+        if "decode_scale" in data:
+            self.decode_scale = int(data["decode_scale"])
+
     def serialize(self) -> Dict[str, Any]:
+        # The camera is still a name if cameras haven't been enumerated yet.
+        if type(self.camera) is str:
+            camera_name = self.camera
+        else:
+            camera_name = self.camera.name if self.camera else None
+
         return {
-            "camera": self.camera.name if self.camera else None,
+            "camera": camera_name,
             "frame_width": self.frame_width,
             "frame_height": self.frame_height,
+            "frame_rate": self.frame_rate,
+            "pixel_format": self.pixel_format,
+            "decode_scale": self.decode_scale,
         }
 
 
@@ -105,6 +155,179 @@ class ControllerConfig:
         }
 
 
+@dataclass
+class PoseFilterConfig:
+    one_euro_min_cutoff: float
+    one_euro_beta: float
+    one_euro_derivative_cutoff: float
+    kalman_process_noise: float
+    kalman_measurement_noise: float
+
+    def set_to_default(self):
+        self.one_euro_min_cutoff = 1.0
+        self.one_euro_beta = 20.0
+        self.one_euro_derivative_cutoff = 1.0
+        self.kalman_process_noise = 20.0
+        self.kalman_measurement_noise = 0.002
+
+    def deserialize(self, data: Dict[str, Any]):
+        self.one_euro_min_cutoff = float(data["one_euro_min_cutoff"])
+        self.one_euro_beta = float(data["one_euro_beta"])
+        self.one_euro_derivative_cutoff = float(data["one_euro_derivative_cutoff"])
+        self.kalman_process_noise = float(data["kalman_process_noise"])
+        self.kalman_measurement_noise = float(data["kalman_measurement_noise"])
+
+    def serialize(self) -> Dict[str, Any]:
+        return {
+            "one_euro_min_cutoff": self.one_euro_min_cutoff,
+            "one_euro_beta": self.one_euro_beta,
+            "one_euro_derivative_cutoff": self.one_euro_derivative_cutoff,
+            "kalman_process_noise": self.kalman_process_noise,
+            "kalman_measurement_noise": self.kalman_measurement_noise,
+        }
+
+
+@dataclass
+class InferenceConfig:
+    delegate: InferenceDelegate
+    min_detection_confidence: float
+    min_presence_confidence: float
+    min_tracking_confidence: float
+
+    def set_to_default(self):
+        self.delegate = InferenceDelegate.CPU
+        self.min_detection_confidence = 0.5
+        self.min_presence_confidence = 0.5
+        self.min_tracking_confidence = 0.5
+
+    def deserialize(self, data: Dict[str, Any]):
+        self.delegate = _deserialize_enum(data["delegate"], INFERENCE_DELEGATE_NAMES)
+        self.min_detection_confidence = float(data["min_detection_confidence"])
+        self.min_presence_confidence = float(data["min_presence_confidence"])
+        self.min_tracking_confidence = float(data["min_tracking_confidence"])
+
+    def serialize(self) -> Dict[str, Any]:
+        return {
+            "delegate": _serialize_enum(self.delegate, INFERENCE_DELEGATE_NAMES),
+            "min_detection_confidence": self.min_detection_confidence,
+            "min_presence_confidence": self.min_presence_confidence,
+            "min_tracking_confidence": self.min_tracking_confidence,
+        }
+
+
+@dataclass
+class MetricsConfig:
+    # The HTTP endpoint is disabled if the port is 0, the snapshot file if the path is empty.
+    port: int
+    snapshot_path: str
+    snapshot_interval: float
+
+    def set_to_default(self):
+        self.port = 0
+        self.snapshot_path = ""
+        self.snapshot_interval = 10.0
+
+    def deserialize(self, data: Dict[str, Any]):
+        self.port = int(data["port"])
+        self.snapshot_path = str(data["snapshot_path"])
+        self.snapshot_interval = float(data["snapshot_interval"])
+
+    def serialize(self) -> Dict[str, Any]:
+        return {
+            "port": self.port,
+            "snapshot_path": self.snapshot_path,
+            "snapshot_interval": self.snapshot_interval,
+        }
+
+
+@dataclass
+class PerformanceProfileConfig:
+    max_frame_height: int
+    tracking_fps_cap: int
+    hand_tracking_mode: HandTrackingMode
+    preview_fps: int
+    min_tracking_confidence: float
+
+    def deserialize(self, data: Dict[str, Any]):
+        self.max_frame_height = int(data["max_frame_height"])
+        self.tracking_fps_cap = int(data["tracking_fps_cap"])
+        self.hand_tracking_mode = _deserialize_enum(data["hand_tracking_mode"], HAND_TRACKING_MODE_NAMES)
+        self.preview_fps = int(data["preview_fps"])
+        self.min_tracking_confidence = float(data["min_tracking_confidence"])
+
+    def serialize(self) -> Dict[str, Any]:
+        return {
+            "max_frame_height": self.max_frame_height,
+            "tracking_fps_cap": self.tracking_fps_cap,
+            "hand_tracking_mode": _serialize_enum(self.hand_tracking_mode, HAND_TRACKING_MODE_NAMES),
+            "preview_fps": self.preview_fps,
+            "min_tracking_confidence": self.min_tracking_confidence,
+        }
+
+
+@dataclass
+class ResolutionCalibration:
+    hardware_id: str
+    # (width, height, seconds per frame for head and hand inference combined)
+    inference_times: list[tuple[int, int, float]]
+
+    def max_frame_height(self, target_fps: int) -> Optional[int]:
+        if not self.inference_times:
+            return None
+
+        budget = 1.0 / max(target_fps, 1)
+        heights = [height for _, height, inference_time in self.inference_times if inference_time <= budget]
+
+        if heights:
+            return max(heights)
+        else:
+            return min(height for _, height, _ in self.inference_times)
+
+    def deserialize(self, data: Dict[str, Any]):
+        self.hardware_id = data["hardware_id"]
+        self.inference_times = [
+            (int(entry["width"]), int(entry["height"]), float(entry["inference_time"]))
+            for entry in data["inference_times"]
+        ]
+
+    def serialize(self) -> Dict[str, Any]:
+        return {
+            "hardware_id": self.hardware_id,
+            "inference_times": [
+                {"width": width, "height": height, "inference_time": inference_time}
+                for width, height, inference_time in self.inference_times
+            ],
+        }
+
+
+def default_performance_profiles() -> Dict[PerformanceProfile, PerformanceProfileConfig]:
+    # Smaller frames and a higher tracking confidence (which lets MediaPipe skip palm re-detection) save the most CPU
+    # time. The low latency profile spends it on a high tracking rate instead.
+    return {
+        PerformanceProfile.LOW_LATENCY: PerformanceProfileConfig(
+            max_frame_height=480,
+            tracking_fps_cap=60,
+            hand_tracking_mode=HandTrackingMode.ONE_EURO,
+            preview_fps=30,
+            min_tracking_confidence=0.5,
+        ),
+        PerformanceProfile.BALANCED: PerformanceProfileConfig(
+            max_frame_height=720,
+            tracking_fps_cap=20,
+            hand_tracking_mode=HandTrackingMode.SMOOTH,
+            preview_fps=15,
+            min_tracking_confidence=0.5,
+        ),
+        PerformanceProfile.LOW_CPU: PerformanceProfileConfig(
+            max_frame_height=480,
+            tracking_fps_cap=15,
+            hand_tracking_mode=HandTrackingMode.SMOOTH,
+            preview_fps=5,
+            min_tracking_confidence=0.7,
+        ),
+    }
+
+
 @dataclass
 class Config:
     tracking_running: bool
@@ -119,6 +342,20 @@ class Config:
     controller_depth_offset: float
     left_controller_config: ControllerConfig
     right_controller_config: ControllerConfig
+    pose_filter_config: PoseFilterConfig
+    preview_enabled: bool
+    preview_fps: int
+    head_inference_config: InferenceConfig
+    hand_inference_config: InferenceConfig
+    performance_profile: PerformanceProfile
+    performance_profiles: Dict[PerformanceProfile, PerformanceProfileConfig]
+    auto_resolution: bool
+    adaptive_tracking_rate: bool
+    latency_budget: int
+    motion_gating: bool
+    inference_workers: bool
+    resolution_calibration: Optional[ResolutionCalibration]
+    metrics_config: MetricsConfig
     on_updated: EventSource = field(default_factory=lambda: EventSource())
 
     def set_to_default(self):
@@ -132,6 +369,19 @@ class Config:
         self.controller_depth_offset = 0
         self.left_controller_config.set_to_default()
         self.right_controller_config.set_to_default()
+        self.pose_filter_config.set_to_default()
+        self.preview_enabled = True
+        self.preview_fps = 15
+        self.head_inference_config.set_to_default()
+        self.hand_inference_config.set_to_default()
+        self.performance_profile = PerformanceProfile.BALANCED
+        self.performance_profiles = default_performance_profiles()
+        self.auto_resolution = True
+        self.adaptive_tracking_rate = True
+        self.latency_budget = 50
+        self.motion_gating = True
+        self.inference_workers = False
+        self.metrics_config.set_to_default()
 
     def deserialize(self, data: Dict[str, Any]):
         self.capture_config.deserialize(data["capture"])
@@ -146,6 +396,58 @@ class Config:
         self.left_controller_config.deserialize(data["left_controller"])
         self.right_controller_config.deserialize(data["right_controller"])
 
+        # Configs from older versions don't have filter parameters yet.
+        if "pose_filter" in data:
+            self.pose_filter_config.deserialize(data["pose_filter"])
+
+        if "preview_enabled" in data:
+            self.preview_enabled = bool(data["preview_enabled"])
+            self.preview_fps = int(data["preview_fps"])
+
+        if "head_inference" in data:
+            self.head_inference_config.deserialize(data["head_inference"])
+            self.hand_inference_config.deserialize(data["hand_inference"])
+
+        # Configs from older versions were made without profiles, so treat them as custom.
+        if "performance_profile" in data:
+            self.performance_profile = _deserialize_enum(data["performance_profile"], PERFORMANCE_PROFILE_NAMES)
+
+            for name, profile_data in data["performance_profiles"].items():
+                profile = _deserialize_enum(name, PERFORMANCE_PROFILE_NAMES)
+
+                if profile in self.performance_profiles:
+                    self.performance_profiles[profile].deserialize(profile_data)
+        else:
+            self.performance_profile = PerformanceProfile.CUSTOM
+
+        if "auto_resolution" in data:
+            self.auto_resolution = bool(data["auto_resolution"])
+        else:
+            self.auto_resolution = False
+
+        # Older configs keep the fixed tracking rate they were made with.
+        if "adaptive_tracking_rate" in data:
+            self.adaptive_tracking_rate = bool(data["adaptive_tracking_rate"])
+            self.latency_budget = int(data["latency_budget"])
+        else:
+            self.adaptive_tracking_rate = False
+
+        # Skipping frames would change the tracking of existing configs, so it's only turned on for new ones.
+        if "motion_gating" in data:
+            self.motion_gating = bool(data["motion_gating"])
+        else:
+            self.motion_gating = False
+
+        if "inference_workers" in data:
+            self.inference_workers = bool(data["inference_workers"])
+
+        if data.get("resolution_calibration") is not None:
+            self.resolution_calibration = ResolutionCalibration(hardware_id="", inference_times=[])
+            self.resolution_calibration.deserialize(data["resolution_calibration"])
+
+        if "metrics" in data:
+            self.metrics_config.deserialize(data["metrics"])
+
     def serialize(self) -> Dict[str, Any]:
         return {
             "capture": self.capture_config.serialize(),
@@ -159,8 +461,112 @@ class Config:
             "controller_depth_offset": self.controller_depth_offset,
             "left_controller": self.left_controller_config.serialize(),
             "right_controller": self.right_controller_config.serialize(),
+            "pose_filter": self.pose_filter_config.serialize(),
+            "preview_enabled": self.preview_enabled,
+            "preview_fps": self.preview_fps,
+            "head_inference": self.head_inference_config.serialize(),
+            "hand_inference": self.hand_inference_config.serialize(),
+            "performance_profile": _serialize_enum(self.performance_profile, PERFORMANCE_PROFILE_NAMES),
+            "performance_profiles": {
+                _serialize_enum(profile, PERFORMANCE_PROFILE_NAMES): profile_config.serialize()
+                for profile, profile_config in self.performance_profiles.items()
+            },
+            "auto_resolution": self.auto_resolution,
+            "adaptive_tracking_rate": self.adaptive_tracking_rate,
+            "latency_budget": self.latency_budget,
+            "motion_gating": self.motion_gating,
+            "inference_workers": self.inference_workers,
+            "resolution_calibration": (
+                self.resolution_calibration.serialize() if self.resolution_calibration is not None else None
+            ),
+            "metrics": self.metrics_config.serialize(),
         }
 
+    def get_performance_profile_config(self) -> Optional[PerformanceProfileConfig]:
+        return self.performance_profiles.get(self.performance_profile)
+
+    def apply_performance_profile(self):
+        # The capture resolution is applied by the camera capture since it depends on the camera.
+        profile_config = self.get_performance_profile_config()
+
+        if profile_config is None:
+            return
+
+        self.tracking_fps_cap = profile_config.tracking_fps_cap
+        self.hand_tracking_mode = profile_config.hand_tracking_mode
+        self.preview_fps = profile_config.preview_fps
+        self.hand_inference_config.min_tracking_confidence = profile_config.min_tracking_confidence
+
+
+def create_default_config() -> Config:
+    # Apart from `tracking_running`, the values passed here are placeholders that are replaced by the defaults.
+    config = Config(
+        tracking_running=True,
+        capture_config=CaptureConfig(
+            camera=None,
+            frame_width=0,
+            frame_height=0,
+            frame_rate=0.0,
+            pixel_format="",
+            decode_scale=1,
+        ),
+        tracking_fps_cap=0,
+        left_controller_config=ControllerConfig(
+            gesture_mappings={},
+            thumbstick_enabled=False,
+            press_thumbstick=False,
+        ),
+        right_controller_config=ControllerConfig(
+            gesture_mappings={},
+            thumbstick_enabled=False,
+            press_thumbstick=False,
+        ),
+        headset_pitch_deadzone=0,
+        headset_yaw_deadzone=0,
+        hand_tracking_mode=HandTrackingMode.DIRECT,
+        controller_pitch=0,
+        controller_yaw=0,
+        controller_roll=0,
+        controller_depth_offset=0.0,
+        pose_filter_config=PoseFilterConfig(
+            one_euro_min_cutoff=0.0,
+            one_euro_beta=0.0,
+            one_euro_derivative_cutoff=0.0,
+            kalman_process_noise=0.0,
+            kalman_measurement_noise=0.0,
+        ),
+        preview_enabled=True,
+        preview_fps=0,
+        head_inference_config=InferenceConfig(
+            delegate=InferenceDelegate.CPU,
+            min_detection_confidence=0.0,
+            min_presence_confidence=0.0,
+            min_tracking_confidence=0.0,
+        ),
+        hand_inference_config=InferenceConfig(
+            delegate=InferenceDelegate.CPU,
+            min_detection_confidence=0.0,
+            min_presence_confidence=0.0,
+            min_tracking_confidence=0.0,
+        ),
+        performance_profile=PerformanceProfile.CUSTOM,
+        performance_profiles={},
+        auto_resolution=False,
+        adaptive_tracking_rate=False,
+        latency_budget=0,
+        motion_gating=False,
+        inference_workers=False,
+        resolution_calibration=None,
+        metrics_config=MetricsConfig(
+            port=0,
+            snapshot_path="",
+            snapshot_interval=0.0,
+        ),
+    )
+
+    config.set_to_default()
+    return config
+
 
 def _deserialize_enum(name, names):
     iter = (value for value, candidate_name in names if candidate_name == name)
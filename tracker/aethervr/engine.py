@@ -0,0 +1,405 @@
+from threading import Thread, Lock
+from collections import deque
+from dataclasses import replace
+from enum import Enum
+from copy import copy
+import time
+
+from aethervr import startup
+from aethervr.camera_capture import CameraCapture
+from aethervr.camera_capture2 import Camera, CameraCapture2
+from aethervr.runtime_connection import RuntimeConnection
+from aethervr.tracking_state import HeadState, HandState
+from aethervr.tracking_pipeline import TrackingPipeline
+from aethervr.config import *
+from aethervr.rate_controller import RateController
+from aethervr.motion_gate import MotionGate, create_thumbnail, get_head_landmarks, get_hand_landmarks
+from aethervr.metrics import MetricsExporter
+from aethervr.landmark_recording import LandmarkRecorder
+from aethervr import calibration
+from aethervr import landmark_recording
+from aethervr import performance
+from aethervr import tracing
+from aethervr import ffi
+
+
+class TrackerAction(Enum):
+    TRACK = 0
+    # Publish the previous state again because nothing moved.
+    REUSE = 1
+
+
+# Everything that's needed to track the user and feed the OpenXR runtime: camera capture, the trackers, the tracking
+# pipeline and the runtime connection. The engine reports to a frontend, which is either the GUI in the same process
+# or an `EngineServer` that forwards everything to attached GUI clients. The frontend has to implement
+# `update_camera_frame`, `update_camera_overlay`, `clear_camera_overlay`, `display_camera_error`,
+# `update_filter_latency`, `update_startup_progress` and `finish_startup`.
+class TrackingEngine:
+
+    def __init__(self, config: Config):
+        with startup.phase("load shared libraries"):
+            ffi.load_shared_libraries()
+            ffi.camera_capture.aethervr_camera_init()
+
+        self.config = config
+        self.frontend = None
+
+        self.camera_capture = CameraCapture(self.config.capture_config, self.on_frame, self.on_camera_error)
+        self.camera_capture2 = CameraCapture2(self.config.capture_config, self.on_frame, self.on_camera_error)
+        self.connection = RuntimeConnection(38057)
+        self.metrics_exporter = MetricsExporter(self.config.metrics_config)
+        self.pipeline = TrackingPipeline(self.config, self.connection)
+        self.pipeline.on_hands_updated.subscribe(self.on_hands_updated)
+
+        self.inference_workers = None
+        self.head_tracker = None
+        self.hand_tracker = None
+        self.landmark_recorder = None
+
+        self.calibrating = False
+        # Tracking pauses while the calibration measures inference times, so that both don't compete for the CPU.
+        self.measuring = False
+        # The calibration needs a camera frame that shows the user. The latest frames are kept with their IDs while it
+        # waits, so that the frame a tracking result was computed from can be found.
+        self.calibration_frames = deque(maxlen=8)
+
+        self.rate_controller = RateController(self.config)
+        self.head_tracking_queue_size = 0
+        self.hand_tracking_queue_size = 0
+        self.head_tracking_lock = Lock()
+        self.hand_tracking_lock = Lock()
+        self.head_motion_gate = MotionGate()
+        self.hand_motion_gate = MotionGate()
+
+    def initialize(self):
+        try:
+            self.frontend.update_startup_progress("Detecting cameras...")
+
+            with startup.phase("enumerate cameras"):
+                self.camera_capture2.enumerate_cameras()
+
+            self.frontend.update_startup_progress("Loading head tracking model...")
+
+            with startup.phase("import MediaPipe"):
+                from aethervr.head_tracker import HeadTracker
+                from aethervr.hand_tracker import HandTracker
+                from aethervr.inference_workers import InferenceWorkers
+
+            if self.config.inference_workers:
+                self.inference_workers = InferenceWorkers()
+
+            # Used by the motion gates. It's imported here so that the import doesn't delay the first tracked frame.
+            with startup.phase("import OpenCV"):
+                import cv2
+
+            with startup.phase("create head tracker"):
+                self.head_tracker = HeadTracker(
+                    self.on_head_tracking_results,
+                    copy(self.config.head_inference_config),
+                    self.inference_workers,
+                )
+
+            self.frontend.update_startup_progress("Loading hand tracking model...")
+
+            with startup.phase("create hand tracker"):
+                self.hand_tracker = HandTracker(
+                    self.head_tracker,
+                    self.on_hand_tracking_results,
+                    copy(self.config.hand_inference_config),
+                    self.inference_workers,
+                )
+
+            self.head_tracker.on_detection_failed.subscribe(self.on_head_tracking_failed)
+            self.hand_tracker.on_detection_failed.subscribe(self.on_hand_tracking_failed)
+
+            recording_path = landmark_recording.get_recording_path()
+
+            if recording_path is not None:
+                self.landmark_recorder = LandmarkRecorder(recording_path, performance.now())
+                self.head_tracker.recorder = self.landmark_recorder
+                self.hand_tracker.recorder = self.landmark_recorder
+
+            self.update_capture_resolution()
+        except Exception as e:
+            print(e)
+            self.frontend.update_startup_progress("Failed to initialize tracking.")
+            return False
+
+        startup.mark("tracking initialized")
+        startup.print_report()
+
+        self.config.on_updated.subscribe(self.on_config_updated)
+        self.frontend.finish_startup()
+        self.camera_capture2.start()
+
+        # The calibration needs frames of the user, so it only starts once the camera captures.
+        if self.is_calibration_needed():
+            self.start_calibration()
+
+        return True
+
+    def on_config_updated(self):
+        if not self.is_calibration_needed():
+            self.update_capture_resolution()
+        elif not self.calibrating:
+            # A different camera or delegate was selected.
+            self.start_calibration()
+
+    def start_calibration(self):
+        self.calibrating = True
+        thread = Thread(target=self.calibrate_resolution_in_background)
+        thread.start()
+
+    def is_calibration_needed(self) -> bool:
+        camera = self.config.capture_config.camera
+
+        if not self.config.auto_resolution or type(camera) is not Camera:
+            return False
+
+        result = self.config.resolution_calibration
+        return result is None or result.hardware_id != calibration.get_hardware_id(camera, self.config)
+
+    def calibrate_resolution(self):
+        camera = self.config.capture_config.camera
+        frame = self.wait_for_calibration_frame()
+
+        if frame is None:
+            print("Failed to calibrate capture resolution: no camera frames")
+            return
+
+        self.measuring = True
+
+        try:
+            self.config.resolution_calibration = calibration.calibrate(camera, self.config, frame)
+        finally:
+            self.measuring = False
+
+    def wait_for_calibration_frame(self):
+        print("Waiting for face and hands to calibrate capture resolution...")
+        deadline = time.perf_counter() + calibration.FRAME_TIMEOUT
+
+        while time.perf_counter() < deadline:
+            frame_id = calibration.get_user_frame_id(self.pipeline.tracking_state)
+
+            if frame_id is not None:
+                for candidate_id, frame in list(self.calibration_frames):
+                    if candidate_id == frame_id:
+                        return frame
+
+            time.sleep(0.1)
+
+        print("Face and hands not found, calibrating on the last camera frame")
+        frames = list(self.calibration_frames)
+        return frames[-1][1] if frames else None
+
+    def calibrate_resolution_in_background(self):
+        try:
+            self.calibrate_resolution()
+            self.update_capture_resolution()
+        except Exception as e:
+            print(e)
+        finally:
+            self.calibrating = False
+            self.calibration_frames.clear()
+
+    def update_capture_resolution(self):
+        # Everything else in a performance profile is read by the pipeline as it runs.
+        max_frame_heights = []
+        profile_config = self.config.get_performance_profile_config()
+
+        if profile_config is not None:
+            max_frame_heights.append(profile_config.max_frame_height)
+
+        if self.config.auto_resolution and self.config.resolution_calibration is not None:
+            max_frame_height = self.config.resolution_calibration.max_frame_height(self.config.tracking_fps_cap)
+
+            if max_frame_height is not None:
+                max_frame_heights.append(max_frame_height)
+
+        if max_frame_heights:
+            self.camera_capture2.limit_frame_height(min(max_frame_heights))
+
+    def on_frame(self, frame, frame_id: int):
+        capture_time = performance.now()
+        performance.stats.captured_frames.increment()
+
+        if self.calibrating and not self.measuring:
+            self.calibration_frames.append((frame_id, frame))
+
+        if self.config.preview_enabled:
+            self.frontend.update_camera_frame(frame)
+
+        if not self.config.tracking_running or self.measuring:
+            self.frontend.clear_camera_overlay()
+            return
+
+        # Inference settings changed in the GUI are applied by swapping the landmarkers once the new ones are loaded.
+        if self.head_tracker.config != self.config.head_inference_config:
+            self.head_tracker.reconfigure(copy(self.config.head_inference_config))
+
+        if self.hand_tracker.config != self.config.hand_inference_config:
+            self.hand_tracker.reconfigure(copy(self.config.hand_inference_config))
+
+        head_rate = self.rate_controller.head
+        hand_rate = self.rate_controller.hand
+        self.rate_controller.update(capture_time)
+
+        head_due = self.rate_controller.is_due(head_rate, capture_time)
+        hand_due = self.rate_controller.is_due(hand_rate, capture_time)
+        thumbnail = None
+
+        if not self.config.motion_gating:
+            self.head_motion_gate.reset()
+            self.hand_motion_gate.reset()
+        elif head_due or hand_due:
+            with tracing.span("motion detection", frame_id):
+                thumbnail = create_thumbnail(frame)
+
+        tracking_state = self.pipeline.tracking_state
+        head_action = None
+        hand_action = None
+
+        if head_due:
+            if thumbnail is not None and not self.head_motion_gate.has_moved(
+                thumbnail,
+                get_head_landmarks(tracking_state),
+                capture_time,
+            ):
+                head_rate.last_run_time = capture_time
+                performance.stats.skipped_head_frames.increment()
+
+                # A result that's still in flight would be published after the reused state even though it's older.
+                if self.head_tracking_queue_size == 0:
+                    head_action = TrackerAction.REUSE
+            elif self.head_tracking_queue_size < 2:
+                head_action = TrackerAction.TRACK
+            else:
+                performance.stats.dropped_head_frames.increment()
+
+        if hand_due:
+            if thumbnail is not None and not self.hand_motion_gate.has_moved(
+                thumbnail,
+                get_hand_landmarks(tracking_state),
+                capture_time,
+            ):
+                hand_rate.last_run_time = capture_time
+                performance.stats.skipped_hand_frames.increment()
+
+                if self.hand_tracking_queue_size == 0:
+                    hand_action = TrackerAction.REUSE
+            elif self.hand_tracking_queue_size < 2:
+                hand_action = TrackerAction.TRACK
+            else:
+                performance.stats.dropped_hand_frames.increment()
+
+        # Registered before anything is submitted, so that the first of the two results waits for the other one. A
+        # reused state is published right away, so it isn't worth waiting for when the other tracker has to run.
+        if head_action is not None and head_action == hand_action:
+            self.pipeline.fusion.expect_both(frame_id)
+
+        if head_action == TrackerAction.REUSE:
+            self.reuse_head_state(capture_time, frame_id)
+        elif head_action == TrackerAction.TRACK:
+            with self.head_tracking_lock:
+                head_rate.last_run_time = capture_time
+                self.head_tracking_queue_size += 1
+
+                with tracing.span("submit head detection", frame_id):
+                    self.head_tracker.detect(frame, capture_time, frame_id)
+
+            if thumbnail is not None:
+                self.head_motion_gate.mark_run(thumbnail, capture_time)
+
+        if hand_action == TrackerAction.REUSE:
+            self.reuse_hand_states(capture_time, frame_id)
+        elif hand_action == TrackerAction.TRACK:
+            with self.hand_tracking_lock:
+                hand_rate.last_run_time = capture_time
+                self.hand_tracking_queue_size += 1
+
+                with tracing.span("submit hand detection", frame_id):
+                    self.hand_tracker.detect(frame, capture_time, frame_id)
+
+            if thumbnail is not None:
+                self.hand_motion_gate.mark_run(thumbnail, capture_time)
+
+    # Nothing moved since the tracker last ran, so the previous state is published again for this frame. That keeps
+    # the pose filters converging on the resting pose and the runtime's capture times current.
+    def reuse_head_state(self, capture_time: float, frame_id: int):
+        state = replace(self.pipeline.tracking_state.head, capture_time=capture_time, frame_id=frame_id)
+
+        with tracing.span("reuse head state", frame_id):
+            self.pipeline.process_head_state(state)
+
+    def reuse_hand_states(self, capture_time: float, frame_id: int):
+        tracking_state = self.pipeline.tracking_state
+        updates = {"timestamp": time.time_ns(), "capture_time": capture_time, "frame_id": frame_id}
+        left_state = replace(tracking_state.left_hand, **updates)
+        right_state = replace(tracking_state.right_hand, **updates)
+
+        with tracing.span("reuse hand states", frame_id):
+            self.pipeline.process_hand_states(left_state, right_state)
+
+    def on_camera_error(self):
+        self.frontend.display_camera_error()
+
+    def on_head_tracking_results(self, state: HeadState):
+        if state.capture_time > 0.0:
+            self.rate_controller.record_result(self.rate_controller.head, state.capture_time, performance.now())
+
+        # The result only leaves the queue once it's published, so the capture thread can't reuse a state meanwhile.
+        try:
+            self.pipeline.process_head_state(state)
+        finally:
+            with self.head_tracking_lock:
+                self.head_tracking_queue_size -= 1
+
+    def on_hand_tracking_results(self, left_state: HandState, right_state: HandState):
+        if left_state.capture_time > 0.0:
+            self.rate_controller.record_result(self.rate_controller.hand, left_state.capture_time, performance.now())
+
+        try:
+            self.pipeline.process_hand_states(left_state, right_state)
+        finally:
+            with self.hand_tracking_lock:
+                self.hand_tracking_queue_size -= 1
+
+    # The frame never produces a result, so it leaves the queue anyway and the other tracker doesn't wait for it.
+    def on_head_tracking_failed(self, capture_time: float, frame_id: int):
+        self.pipeline.fusion.discard(frame_id)
+
+        with self.head_tracking_lock:
+            self.head_tracking_queue_size -= 1
+
+    def on_hand_tracking_failed(self, capture_time: float, frame_id: int):
+        self.pipeline.fusion.discard(frame_id)
+
+        with self.hand_tracking_lock:
+            self.hand_tracking_queue_size -= 1
+
+    def on_hands_updated(self):
+        self.frontend.update_filter_latency(self.pipeline.get_filter_latency())
+        self.frontend.update_camera_overlay(self.pipeline.tracking_state)
+
+    def close(self):
+        self.pipeline.fusion.close()
+        self.connection.close()
+        self.metrics_exporter.close()
+        self.camera_capture.close()
+        self.camera_capture2.close()
+
+        # Stopped before the trackers so that the workers don't run landmarkers that are being closed.
+        if self.inference_workers is not None:
+            self.inference_workers.close()
+
+        if self.head_tracker is not None:
+            self.head_tracker.close()
+
+        if self.hand_tracker is not None:
+            self.hand_tracker.close()
+
+        # Closed after the trackers so that no more results arrive.
+        if self.landmark_recorder is not None:
+            self.landmark_recorder.close()
+
+        ffi.camera_capture.aethervr_camera_deinit()
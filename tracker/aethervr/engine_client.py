@@ -0,0 +1,208 @@
+from threading import Thread, Lock, Event
+import socket
+
+from aethervr.runtime_connection import RegisterImageData, PresentImageData
+from aethervr.camera_capture2 import Camera, find_camera, deserialize_cameras
+from aethervr.event_source import EventSource
+from aethervr.metrics import apply_snapshot
+from aethervr.config import Config
+from aethervr import performance
+from aethervr import ipc
+
+
+# Stands in for the daemon's runtime connection so that the GUI can subscribe to the same events.
+class RemoteRuntimeConnection:
+
+    def __init__(self):
+        self.on_connected = EventSource()
+        self.on_disconnected = EventSource()
+        self.on_runtime_info = EventSource()
+        self.on_register_image = EventSource()
+        self.on_present_image = EventSource()
+
+
+# Stands in for the daemon's camera capture. The GUI only reads the enumerated cameras and restarts the capture after
+# the capture config changed.
+class RemoteCameraCapture:
+
+    def __init__(self, client: "EngineClient"):
+        self.client = client
+        self.cameras: list[Camera] = []
+        self.enumerated = False
+
+    def restart(self):
+        # Sent after the config, so the daemon restarts the capture with the new camera.
+        self.client.push_config_if_changed()
+        self.client.send({"type": "restart_capture"})
+
+
+# Attaches the GUI to a running tracking daemon. The GUI works on a local copy of the config that is kept in sync with
+# the daemon in both directions. Everything the daemon reports is passed on to the frontend (the GUI), which
+# additionally has to implement `call_on_gui_thread`.
+class EngineClient:
+
+    CONFIG_SYNC_INTERVAL = 0.2
+
+    def __init__(self, config: Config, port: int):
+        self.config = config
+        self.connection = RemoteRuntimeConnection()
+        self.camera_capture2 = RemoteCameraCapture(self)
+        self.frontend = None
+
+        self.stream = socket.create_connection(("127.0.0.1", port))
+        self.stream.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.send_lock = Lock()
+        self.stopped = Event()
+
+        # The config that was last received from or sent to the daemon. Only differences are sent back.
+        self.config_state = None
+
+        # The window is built from the config, so the initial state has to be there before the GUI is created.
+        message = ipc.receive_message(self.stream)
+
+        if message is None or message[0]["type"] != "state":
+            raise RuntimeError("Tracking daemon closed the connection")
+
+        self.initial_state = message[0]
+        self.camera_capture2.cameras = deserialize_cameras(self.initial_state["cameras"])
+        self.camera_capture2.enumerated = self.initial_state["enumerated"]
+        self._apply_config(self.initial_state)
+
+        print(f"Attached to tracking daemon on port {port}")
+
+    def start(self, frontend):
+        self.frontend = frontend
+
+        if self.initial_state["startup_finished"]:
+            self.frontend.finish_startup()
+        else:
+            self.frontend.update_startup_progress(self.initial_state["startup_text"])
+
+        if self.initial_state["camera_error"]:
+            self.frontend.display_camera_error()
+
+        self.receive_thread = Thread(target=self._receive_messages, daemon=True)
+        self.receive_thread.start()
+
+        self.sync_thread = Thread(target=self._sync_config, daemon=True)
+        self.sync_thread.start()
+
+    def send(self, header: dict):
+        with self.send_lock:
+            try:
+                ipc.send_message(self.stream, header)
+            except OSError as e:
+                print(f"Failed to send message to tracking daemon: {e}")
+
+    def push_config_if_changed(self):
+        state = self._get_config_state()
+
+        if state != self.config_state:
+            self.config_state = state
+            self.send({"type": "config", **state})
+
+    def close(self):
+        # Detaching doesn't affect the daemon, tracking keeps running.
+        self.stopped.set()
+
+        try:
+            self.stream.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self.stream.close()
+        print("Detached from tracking daemon")
+
+    def _get_config_state(self) -> dict:
+        return {"config": self.config.serialize(), "tracking_running": self.config.tracking_running}
+
+    def _apply_config(self, state: dict):
+        self.config.deserialize(state["config"])
+        self.config.tracking_running = state["tracking_running"]
+        self._resolve_camera()
+        self.config_state = self._get_config_state()
+
+    def _resolve_camera(self):
+        # The camera stays a name until the daemon has enumerated the cameras, just like in the daemon itself.
+        capture_config = self.config.capture_config
+
+        if type(capture_config.camera) is str and self.camera_capture2.enumerated:
+            capture_config.camera = find_camera(self.camera_capture2.cameras, capture_config.camera)
+
+    def _sync_config(self):
+        # Not every change made in the GUI triggers `on_updated`, so the config is compared periodically. This happens
+        # on the GUI thread so that it can't interleave with a config update from the daemon.
+        while not self.stopped.wait(EngineClient.CONFIG_SYNC_INTERVAL):
+            self.frontend.call_on_gui_thread(self.push_config_if_changed)
+
+    def _receive_messages(self):
+        while not self.stopped.is_set():
+            try:
+                message = ipc.receive_message(self.stream)
+            except OSError:
+                message = None
+            except ValueError as e:
+                # Also covers undecodable headers. The stream can't be read any further after a malformed message.
+                print(f"Received malformed message from tracking daemon: {e}")
+                message = None
+
+            if message is None:
+                break
+
+            header, payload = message
+
+            try:
+                self._handle_message(header, payload)
+            except Exception as e:
+                print(f"Failed to handle message from tracking daemon: {e}")
+
+        if not self.stopped.is_set():
+            print("Tracking daemon closed the connection")
+            self.connection.on_disconnected.trigger()
+            self.frontend.update_startup_progress("Tracking daemon closed the connection.")
+
+    def _handle_message(self, header: dict, payload: bytes):
+        message_type = header["type"]
+
+        if message_type == "frame":
+            self.frontend.update_camera_frame(ipc.decode_frame(header, payload))
+        elif message_type == "overlay":
+            self.frontend.update_filter_latency(header["filter_latency"])
+            self.frontend.update_camera_overlay(ipc.decode_overlay(header, payload))
+        elif message_type == "clear_overlay":
+            self.frontend.clear_camera_overlay()
+        elif message_type == "metrics":
+            apply_snapshot(performance.stats, header["snapshot"])
+            performance.stats.rate_decision = header["rate_decision"]
+        elif message_type == "config":
+            self.frontend.call_on_gui_thread(lambda: self._update_config(header))
+        elif message_type == "camera_error":
+            self.frontend.display_camera_error()
+        elif message_type == "startup_progress":
+            self.frontend.update_startup_progress(header["text"])
+        elif message_type == "startup_finished":
+            self.frontend.call_on_gui_thread(lambda: self._finish_startup(header))
+        elif message_type == "runtime_connected":
+            self.connection.on_connected.trigger()
+        elif message_type == "runtime_disconnected":
+            self.connection.on_disconnected.trigger()
+        elif message_type == "runtime_info":
+            self.connection.on_runtime_info.trigger(header["name"], header["graphics_api"])
+        elif message_type == "register_image":
+            del header["type"]
+            self.connection.on_register_image.trigger(RegisterImageData(**header))
+        elif message_type == "present_image":
+            del header["type"]
+            self.connection.on_present_image.trigger(PresentImageData(**header))
+        else:
+            print(f"Warning: Unknown message from tracking daemon: {message_type}")
+
+    def _update_config(self, state: dict):
+        self._apply_config(state)
+        self.config.on_updated.trigger()
+
+    def _finish_startup(self, header: dict):
+        self.camera_capture2.cameras = deserialize_cameras(header["cameras"])
+        self.camera_capture2.enumerated = True
+        self._resolve_camera()
+        self.frontend.finish_startup()
@@ -0,0 +1,382 @@
+from threading import Thread, Lock, Event
+from dataclasses import asdict
+from copy import copy
+from queue import Queue, Full
+import socket
+import time
+
+from aethervr.engine import TrackingEngine
+from aethervr.tracking_state import TrackingState
+from aethervr.runtime_connection import RegisterImageData, PresentImageData
+from aethervr.camera_capture2 import find_camera, serialize_cameras
+from aethervr.metrics import create_snapshot
+from aethervr import performance
+from aethervr import ipc
+
+
+# Acts as the frontend of a tracking engine that runs without a window and forwards everything the GUI would show to
+# attached GUI clients. Tracking threads only store the latest frame and overlay, which a single telemetry thread
+# downsamples and sends at the preview rate. Clients can attach and detach at any time without affecting tracking.
+class EngineServer:
+
+    TIMEOUT = 1.0
+    PREVIEW_MAX_WIDTH = 480
+    METRICS_INTERVAL = 1.0
+
+    def __init__(self, engine: TrackingEngine, port: int):
+        self.engine = engine
+        self.config = engine.config
+
+        self.clients: list[ClientSession] = []
+        self.clients_lock = Lock()
+
+        # Clients apply config changes from their own threads.
+        self.config_lock = Lock()
+        self.config_state = None
+
+        # State that attaching clients are brought up to date with.
+        self.startup_text = "Starting..."
+        self.startup_finished = False
+        self.camera_error = False
+        self.runtime_connected = False
+        self.runtime_info = None
+        self.registered_images: dict[int, RegisterImageData] = {}
+
+        self.pending_frame = None
+        self.overlay = None
+        self.filter_latency = 0.0
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.settimeout(EngineServer.TIMEOUT)
+        self.socket.bind(("127.0.0.1", port))
+        self.socket.listen()
+
+        connection = engine.connection
+        connection.on_connected.subscribe(self._on_runtime_connected)
+        connection.on_disconnected.subscribe(self._on_runtime_disconnected)
+        connection.on_runtime_info.subscribe(self._on_runtime_info)
+        connection.on_register_image.subscribe(self._on_register_image)
+        connection.on_present_image.subscribe(self._on_present_image)
+
+        self.config.on_updated.subscribe(self.broadcast_config_if_changed)
+
+        self.stopped = Event()
+
+        self.accept_thread = Thread(target=self._accept_clients)
+        self.accept_thread.start()
+
+        self.telemetry_thread = Thread(target=self._send_telemetry)
+        self.telemetry_thread.start()
+
+        print(f"Waiting for GUI clients on port {port}")
+
+    def update_camera_frame(self, frame):
+        self.pending_frame = frame
+
+    def update_camera_overlay(self, tracking_state: TrackingState):
+        # Head and hand states are replaced rather than modified, so a shallow copy stays consistent.
+        self.overlay = copy(tracking_state)
+
+    def clear_camera_overlay(self):
+        self.overlay = None
+
+    def display_camera_error(self):
+        self.camera_error = True
+        self.broadcast({"type": "camera_error"})
+
+    def update_filter_latency(self, latency: float):
+        self.filter_latency = latency
+
+    def update_startup_progress(self, text: str):
+        self.startup_text = text
+        self.broadcast({"type": "startup_progress", "text": text})
+
+    def finish_startup(self):
+        self.startup_finished = True
+        self.broadcast({"type": "startup_finished", "cameras": serialize_cameras(self.engine.camera_capture2.cameras)})
+
+    def broadcast(self, header: dict, payload: bytes = b""):
+        with self.clients_lock:
+            for client in self.clients:
+                client.send(header, payload)
+
+    def broadcast_config_if_changed(self):
+        with self.config_lock:
+            state = self._get_config_state()
+
+            if state == self.config_state:
+                return
+
+            self.config_state = state
+
+        self.broadcast({"type": "config", **state})
+
+    def apply_config(self, state: dict):
+        with self.config_lock:
+            self.config.deserialize(state["config"])
+            self.config.tracking_running = state["tracking_running"]
+
+            capture_config = self.config.capture_config
+            capture2 = self.engine.camera_capture2
+
+            # Before enumeration the camera stays a name, `enumerate_cameras` resolves it.
+            if type(capture_config.camera) is str and capture2.enumerated:
+                capture_config.camera = find_camera(capture2.cameras, capture_config.camera)
+
+        self.config.on_updated.trigger()
+
+    def close(self):
+        self.stopped.set()
+        self.accept_thread.join()
+        self.telemetry_thread.join()
+
+        with self.clients_lock:
+            clients = list(self.clients)
+
+        for client in clients:
+            client.close()
+
+        print("GUI client server closed")
+
+    def _get_config_state(self) -> dict:
+        return {"config": self.config.serialize(), "tracking_running": self.config.tracking_running}
+
+    def _accept_clients(self):
+        while not self.stopped.is_set():
+            try:
+                stream, _ = self.socket.accept()
+            except socket.timeout:
+                continue
+
+            stream.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = ClientSession(self, stream)
+
+            # The client is brought up to date before it's added, so no broadcast can overtake the initial state.
+            with self.clients_lock:
+                self._send_initial_state(client)
+                self.clients.append(client)
+
+            # The daemon only records stats while somebody is attached to look at them.
+            performance.stats.acquire()
+            client.start()
+
+            print("GUI client attached")
+
+        self.socket.close()
+
+    def _send_initial_state(self, client: "ClientSession"):
+        capture2 = self.engine.camera_capture2
+
+        with self.config_lock:
+            config_state = self._get_config_state()
+
+        client.send({
+            "type": "state",
+            **config_state,
+            "enumerated": capture2.enumerated,
+            "cameras": serialize_cameras(capture2.cameras),
+            "startup_text": self.startup_text,
+            "startup_finished": self.startup_finished,
+            "camera_error": self.camera_error,
+        })
+
+        if self.runtime_connected:
+            client.send({"type": "runtime_connected"})
+
+        if self.runtime_info is not None:
+            client.send({"type": "runtime_info", "name": self.runtime_info[0], "graphics_api": self.runtime_info[1]})
+
+        for data in list(self.registered_images.values()):
+            client.send({"type": "register_image", **asdict(data)})
+
+    def _remove_client(self, client: "ClientSession"):
+        with self.clients_lock:
+            if client not in self.clients:
+                return
+
+            self.clients.remove(client)
+
+        performance.stats.release()
+        print("GUI client detached")
+
+    def _send_telemetry(self):
+        sent_frame = None
+        sent_overlay = None
+        last_metrics_time = 0.0
+
+        while not self.stopped.is_set():
+            start_time = time.perf_counter()
+
+            if self.clients:
+                frame = self.pending_frame
+
+                if self.config.preview_enabled and frame is not None and frame is not sent_frame:
+                    sent_frame = frame
+                    header, payload = ipc.encode_frame(frame, EngineServer.PREVIEW_MAX_WIDTH)
+                    self._broadcast_droppable(header, payload)
+
+                overlay = self.overlay
+
+                if overlay is not sent_overlay:
+                    sent_overlay = overlay
+
+                    if overlay is not None:
+                        header, payload = ipc.encode_overlay(overlay, self.filter_latency)
+                        self._broadcast_droppable(header, payload)
+                    else:
+                        self.broadcast({"type": "clear_overlay"})
+
+                if start_time - last_metrics_time >= EngineServer.METRICS_INTERVAL:
+                    last_metrics_time = start_time
+
+                    self.broadcast({
+                        "type": "metrics",
+                        "snapshot": create_snapshot(performance.stats),
+                        "rate_decision": performance.stats.rate_decision,
+                    })
+
+                    # Not every config change triggers `on_updated` (calibration, automatic resolution changes).
+                    self.broadcast_config_if_changed()
+
+            interval = 1.0 / max(self.config.preview_fps, 1)
+            self.stopped.wait(max(interval - (time.perf_counter() - start_time), 0.0))
+
+    def _broadcast_droppable(self, header: dict, payload: bytes):
+        with self.clients_lock:
+            for client in self.clients:
+                client.send_droppable(header, payload)
+
+    def _on_runtime_connected(self):
+        self.runtime_connected = True
+        self.broadcast({"type": "runtime_connected"})
+
+    def _on_runtime_disconnected(self):
+        self.runtime_connected = False
+        self.runtime_info = None
+        self.registered_images = {}
+        self.broadcast({"type": "runtime_disconnected"})
+
+    def _on_runtime_info(self, name: str, graphics_api: int):
+        self.runtime_info = (name, graphics_api)
+        self.broadcast({"type": "runtime_info", "name": name, "graphics_api": graphics_api})
+
+    def _on_register_image(self, data: RegisterImageData):
+        self.registered_images[data.id] = data
+        self.broadcast({"type": "register_image", **asdict(data)})
+
+    # Images are presented at the application's frame rate, a client that falls behind only needs the latest one.
+    def _on_present_image(self, data: PresentImageData):
+        self._broadcast_droppable({"type": "present_image", **asdict(data)}, b"")
+
+
+# One attached GUI client. Messages are queued and sent from a separate thread so that a slow client never blocks the
+# engine. Preview frames, overlays and presented images are dropped instead of queued when the client falls behind.
+# A client that doesn't even keep up with the other messages is disconnected.
+class ClientSession:
+
+    MAX_QUEUED_FRAMES = 2
+    MAX_QUEUED_MESSAGES = 256
+
+    def __init__(self, server: EngineServer, stream: socket.socket):
+        self.server = server
+        self.stream = stream
+        self.queue = Queue(ClientSession.MAX_QUEUED_MESSAGES)
+        self.overflowed = False
+        self.closed = False
+        self.close_lock = Lock()
+
+        self.send_thread = Thread(target=self._send_messages, daemon=True)
+        self.receive_thread = Thread(target=self._receive_messages, daemon=True)
+
+    def start(self):
+        self.send_thread.start()
+        self.receive_thread.start()
+
+    def send(self, header: dict, payload: bytes = b""):
+        try:
+            self.queue.put_nowait((header, payload))
+        except Full:
+            self._disconnect_stalled()
+
+    def send_droppable(self, header: dict, payload: bytes):
+        if self.queue.qsize() < ClientSession.MAX_QUEUED_FRAMES:
+            self.send(header, payload)
+
+    def close(self):
+        with self.close_lock:
+            if self.closed:
+                return
+
+            self.closed = True
+
+        # A full queue means the send thread is busy, it stops once the stream is shut down.
+        try:
+            self.queue.put_nowait(None)
+        except Full:
+            pass
+
+        try:
+            self.stream.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self.stream.close()
+        self.server._remove_client(self)
+
+    # Can be called with the clients lock held, so the client is only shut down here and closed by its own threads.
+    def _disconnect_stalled(self):
+        if self.overflowed:
+            return
+
+        self.overflowed = True
+        print("Disconnecting GUI client that stopped receiving messages")
+
+        try:
+            self.stream.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _send_messages(self):
+        while True:
+            message = self.queue.get()
+
+            if message is None:
+                break
+
+            try:
+                ipc.send_message(self.stream, *message)
+            except OSError:
+                break
+
+        self.close()
+
+    def _receive_messages(self):
+        while True:
+            try:
+                message = ipc.receive_message(self.stream)
+            except OSError:
+                message = None
+            except ValueError as e:
+                # Also covers undecodable headers. The stream can't be read any further after a malformed message.
+                print(f"Received malformed message from GUI client: {e}")
+                message = None
+
+            if message is None:
+                break
+
+            header, _ = message
+
+            try:
+                self._handle_message(header)
+            except Exception as e:
+                print(f"Failed to handle GUI client message: {e}")
+
+        self.close()
+
+    def _handle_message(self, header: dict):
+        if header["type"] == "config":
+            self.server.apply_config(header)
+        elif header["type"] == "restart_capture":
+            self.server.engine.camera_capture2.restart()
+        else:
+            print(f"Warning: Unknown message from GUI client: {header['type']}")
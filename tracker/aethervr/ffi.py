@@ -16,12 +16,25 @@ class FFIResolution(ctypes.Structure):
     ]
 
 
+class FFICameraMode(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_uint32),
+        ("height", ctypes.c_uint32),
+        ("framerate_numerator", ctypes.c_uint32),
+        ("framerate_denominator", ctypes.c_uint32),
+        ("format", ctypes.c_uint32),
+        ("format_name", ctypes.c_char_p),
+    ]
+
+
 class FFICamera(ctypes.Structure):
     _fields_ = [
         ("id", ctypes.c_uint32),
         ("name", ctypes.c_char_p),
         ("resolutions", ctypes.POINTER(FFIResolution)),
         ("num_resolutions", ctypes.c_uint32),
+        ("modes", ctypes.POINTER(FFICameraMode)),
+        ("num_modes", ctypes.c_uint32),
     ]
 
 
@@ -37,6 +50,8 @@ class FFICameraCaptureFrame(ctypes.Structure):
         ("width", ctypes.c_uint32),
         ("height", ctypes.c_uint32),
         ("pixels", ctypes.POINTER(ctypes.c_uint8)),
+        ("size", ctypes.c_uint32),
+        ("compressed", ctypes.c_bool),
     ]
 
 
@@ -62,7 +77,14 @@ def load_camera_capture_library() -> ctypes.CDLL:
     library.aethervr_camera_destroy_list.argtypes = (ctypes.POINTER(FFICameraList),)
     library.aethervr_camera_destroy_list.restype = None
 
-    library.aethervr_camera_open.argtypes = (ctypes.c_uint32, ctypes.c_uint32, ctypes.c_uint32)
+    library.aethervr_camera_open.argtypes = (
+        ctypes.c_uint32,
+        ctypes.c_uint32,
+        ctypes.c_uint32,
+        ctypes.c_uint32,
+        ctypes.c_uint32,
+        ctypes.c_uint32,
+    )
     library.aethervr_camera_open.restype = ctypes.c_void_p
 
     library.aethervr_camera_capture_frame.argtypes = (ctypes.c_void_p,)
@@ -0,0 +1,153 @@
+from threading import Thread, Lock, Condition
+from copy import copy
+from typing import Callable, Optional
+
+from aethervr.input_state import HeadsetState, ControllerState
+from aethervr import performance
+
+
+class FusionSlot:
+
+    def __init__(self):
+        self.frame_id = 0
+        self.capture_time = 0.0
+        self.held_since = 0.0
+
+
+# Publishes head and hand results to the runtime connection in single updates so that the runtime never sees the head
+# of one frame together with the hands of another frame that's about to be replaced. If both trackers work on the same
+# frame, the first of the two results is held back until the other one arrives, but at most `TOLERANCE` seconds, and
+# then both are published together. Results of frames that only one tracker works on are published right away. A
+# thread of its own enforces the deadline, so held results don't depend on further frames or results arriving.
+# With a `clock` (e.g. the recorded capture times of a replay), there is no thread and the deadline is checked whenever
+# the fusion is called, so the same inputs always give the same updates.
+class FrameFusion:
+
+    TOLERANCE = 0.015
+    # Frames whose results were lost (MediaPipe drops frames when it's busy) are forgotten eventually.
+    MAX_SHARED_FRAMES = 8
+
+    def __init__(self, connection, clock: Optional[Callable[[], float]] = None):
+        self.connection = connection
+        self.clock = clock if clock is not None else performance.now
+        self.lock = Lock()
+        self.held_changed = Condition(self.lock)
+        self.closed = False
+
+        self.head = FusionSlot()
+        self.hands = FusionSlot()
+        self.headset_state: Optional[HeadsetState] = None
+        self.controller_states: Optional[tuple[ControllerState, ControllerState]] = None
+
+        self.shared_frames: list[int] = []
+        self.held: Optional[FusionSlot] = None
+
+        self.thread = None
+
+        if clock is None:
+            self.thread = Thread(target=self._run_deadlines, name="frame fusion", daemon=True)
+            self.thread.start()
+
+    # Called before the frame is submitted to both trackers.
+    def expect_both(self, frame_id: int):
+        with self.lock:
+            self._check_deadline()
+
+            if len(self.shared_frames) >= FrameFusion.MAX_SHARED_FRAMES:
+                del self.shared_frames[0]
+
+            self.shared_frames.append(frame_id)
+
+    def update_head(self, state: HeadsetState, capture_time: float, frame_id: int):
+        with self.lock:
+            # The pipeline keeps modifying its states, the runtime connection gets snapshots.
+            self._check_deadline()
+            self.headset_state = copy(state)
+            self._update(self.head, self.hands, capture_time, frame_id)
+
+    def update_hands(
+        self,
+        left_state: ControllerState,
+        right_state: ControllerState,
+        capture_time: float,
+        frame_id: int,
+    ):
+        with self.lock:
+            self._check_deadline()
+            self.controller_states = (copy(left_state), copy(right_state))
+            self._update(self.hands, self.head, capture_time, frame_id)
+
+    # A result that is still held is published without its partner.
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.held_changed.notify()
+
+        if self.thread is not None:
+            self.thread.join()
+
+        with self.lock:
+            if self.held is not None:
+                self._publish(self.held)
+
+    # Called if one of the trackers fails on a frame, so that the result of the other one doesn't wait for it.
+    def discard(self, frame_id: int):
+        with self.lock:
+            self._check_deadline()
+
+            if frame_id in self.shared_frames:
+                self.shared_frames.remove(frame_id)
+
+            if self.held is not None and self.held.frame_id == frame_id:
+                self._publish(self.held)
+
+    def _update(self, slot: FusionSlot, other: FusionSlot, capture_time: float, frame_id: int):
+        slot.frame_id = frame_id
+        slot.capture_time = capture_time
+
+        # Only the first of the two results of a frame waits for the other one.
+        shared = frame_id in self.shared_frames
+
+        if shared:
+            self.shared_frames.remove(frame_id)
+
+        if self.held is other and other.frame_id == frame_id:
+            performance.stats.fused_updates.increment()
+            self._publish(slot, other)
+        elif shared and self.held is not other:
+            # Also replaces a held result of the same tracker whose partner is late, it's outdated now.
+            self.held = slot
+            slot.held_since = self.clock()
+            self.held_changed.notify()
+        else:
+            # A held result of the other tracker keeps waiting for its partner.
+            self._publish(slot)
+
+    def _publish(self, *slots: FusionSlot):
+        headset_state = self.headset_state if self.head in slots else None
+        controller_states = self.controller_states if self.hands in slots else None
+        capture_time = max(slot.capture_time for slot in slots)
+
+        if self.held in slots:
+            self.held = None
+
+        self.connection.update_tracking_state(headset_state, controller_states, capture_time, slots[0].frame_id)
+
+    # Publishes the held result if its partner didn't arrive in time. Returns the seconds until the deadline otherwise.
+    def _check_deadline(self) -> Optional[float]:
+        if self.held is None:
+            return None
+
+        remaining = self.held.held_since + FrameFusion.TOLERANCE - self.clock()
+
+        if remaining > 0.0:
+            return remaining
+
+        performance.stats.fusion_timeouts.increment()
+        self._publish(self.held)
+        return None
+
+    def _run_deadlines(self):
+        with self.lock:
+            while not self.closed:
+                self.held_changed.wait(self._check_deadline())
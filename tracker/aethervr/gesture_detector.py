@@ -34,7 +34,7 @@ class GestureDetector:
         input_state: ControllerState,
         flipped: bool,
     ):
-        input_state.buttons = {button: False for button in ControllerButton}
+        input_state.buttons = 0
         input_state.thumbstick_x = 0.0
         input_state.thumbstick_y = 0.0
 
@@ -71,7 +71,7 @@ class GestureDetector:
                         input_state.thumbstick_y = 0.0
 
                 if config.press_thumbstick:
-                    input_state.buttons[ControllerButton.THUMBSTICK] = True
+                    input_state.press(ControllerButton.THUMBSTICK)
         else:
             tracking_state.gesture = None
 
@@ -79,7 +79,7 @@ class GestureDetector:
             mapping = config.gesture_mappings.get(tracking_state.gesture)
 
             if mapping is not None:
-                input_state.buttons[mapping] = True
+                input_state.press(mapping)
         else:
             input_state.jostick_center = None
 
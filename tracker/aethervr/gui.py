@@ -1,5 +1,5 @@
 import sys
-from copy import deepcopy
+from copy import copy, deepcopy
 from enum import Enum
 
 from PySide6.QtWidgets import (
@@ -25,15 +25,13 @@ from PySide6.QtWidgets import (
     QStackedWidget,
     QProgressBar,
     QDialogButtonBox,
+    QDoubleSpinBox,
+    QFileDialog,
 )
 
 from PySide6 import QtCore
-from PySide6.QtCore import Qt, QSize, QRect, QTimer, QEvent
-from PySide6.QtGui import QPaintEvent, QPainter, QImage
-
-from mediapipe import solutions
-import numpy as np
-import cv2
+from PySide6.QtCore import Qt, QSize, QRect, QTimer, QEvent, QPointF, QLineF
+from PySide6.QtGui import QPaintEvent, QResizeEvent, QPainter, QImage, QPen, QColor, QPolygonF
 
 from aethervr.config import *
 from aethervr.tracking_state import TrackingState
@@ -42,8 +40,11 @@ from aethervr.runtime_connection import RuntimeConnection, RegisterImageData, Pr
 from aethervr.system_openxr_config import SystemOpenXRConfig
 from aethervr.display_surface import DisplaySurface
 from aethervr.camera_capture import CameraCapture
-from aethervr.camera_capture2 import Camera, CameraCapture2
+from aethervr.camera_capture2 import Camera, CameraCapture2, select_mode, MJPEG_FORMAT, DECODE_SCALES
 from aethervr import platform
+from aethervr import performance
+from aethervr import startup
+from aethervr import tracing
 
 
 STYLESHEET = """
@@ -60,6 +61,11 @@ STYLESHEET = """
 
 class Window(QMainWindow):
 
+    _startup_progress_signal = QtCore.Signal(str)
+    _startup_finished_signal = QtCore.Signal()
+    _camera_error_signal = QtCore.Signal()
+    _call_signal = QtCore.Signal(object)
+
     def __init__(
         self,
         config: Config,
@@ -76,6 +82,7 @@ class Window(QMainWindow):
         self.camera_capture = camera_capture
         self.camera_capture2 = camera_capture2
 
+        self.config_panel = None
         self.camera_view = None
         self.frame_view = None
 
@@ -92,11 +99,17 @@ class Window(QMainWindow):
         widget.setLayout(layout)
         self.setCentralWidget(widget)
 
+        self._startup_progress_signal.connect(self._update_startup_progress_slot)
+        self._startup_finished_signal.connect(self._finish_startup_slot)
+        self._camera_error_signal.connect(self._display_camera_error_slot)
+        self._call_signal.connect(self._call_slot)
+
     def _create_horizontal_widget(self):
         widget = QWidget()
 
-        self.camera_view = CameraView()
+        self.camera_view = CameraView(self.config)
         self.frame_view = FrameView(self.connection)
+        self.config_panel = ConfigPanel(self.config, self.system_openxr_config, self.camera_capture, self.camera_capture2)
 
         separator = QFrame()
         separator.setFrameShape(QFrame.Shape.VLine)
@@ -106,11 +119,12 @@ class Window(QMainWindow):
         tab_widget.setContentsMargins(10, 10, 10, 10)
         tab_widget.addTab(self._create_camera_tab(), "Camera")
         tab_widget.addTab(self._create_application_tab(), "Application")
+        tab_widget.addTab(PerformanceView(), "Performance")
 
         layout = QHBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
-        layout.addWidget(ConfigPanel(self.config, self.system_openxr_config, self.camera_capture, self.camera_capture2))
+        layout.addWidget(self.config_panel)
         layout.addWidget(separator)
         layout.addWidget(tab_widget)
         widget.setLayout(layout)
@@ -163,8 +177,38 @@ class Window(QMainWindow):
         self.camera_view.clear_overlay()
 
     def display_camera_error(self):
+        # Camera errors are reported from the capture thread.
+        self._camera_error_signal.emit()
+
+    def update_filter_latency(self, latency: float):
+        self.config_panel.general_input_mapping_group.filter_latency = latency
+
+    def update_startup_progress(self, text: str):
+        self._startup_progress_signal.emit(text)
+
+    def finish_startup(self):
+        self._startup_finished_signal.emit()
+
+    def call_on_gui_thread(self, callback):
+        self._call_signal.emit(callback)
+
+    @QtCore.Slot()
+    def _update_startup_progress_slot(self, text: str):
+        self.camera_view.setText(text)
+
+    @QtCore.Slot()
+    def _finish_startup_slot(self):
+        self.camera_view.setText("Starting camera capture...")
+        self.config_panel.tracking_config_group.update_cameras()
+
+    @QtCore.Slot()
+    def _display_camera_error_slot(self):
         self.camera_view.display_camera_error()
 
+    @QtCore.Slot(object)
+    def _call_slot(self, callback):
+        callback()
+
 
 class ConfigPanel(QWidget):
 
@@ -181,10 +225,13 @@ class ConfigPanel(QWidget):
         reset_button = QPushButton("Reset Configuration")
         reset_button.clicked.connect(self._on_config_reset)
 
+        self.tracking_config_group = TrackingConfigGroup(config, camera_capture, camera_capture2)
+        self.general_input_mapping_group = GeneralInputMappingGroup(config)
+
         layout = QVBoxLayout()
         layout.addWidget(OpenXRConfigGroup(system_openxr_config))
-        layout.addWidget(TrackingConfigGroup(config, camera_capture, camera_capture2))
-        layout.addWidget(GeneralInputMappingGroup(config))
+        layout.addWidget(self.tracking_config_group)
+        layout.addWidget(self.general_input_mapping_group)
         layout.addWidget(ControllerConfigGroup(config))
         layout.addWidget(reset_button)
         layout.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -268,6 +315,13 @@ class TrackingConfigGroup(QGroupBox):
         self.tracking_button = QPushButton()
         self.tracking_button.clicked.connect(self._on_tracking_button_clicked)
 
+        self.profile_input = QComboBox()
+        self.profile_input.addItem("Custom", PerformanceProfile.CUSTOM)
+        self.profile_input.addItem("Low Latency", PerformanceProfile.LOW_LATENCY)
+        self.profile_input.addItem("Balanced", PerformanceProfile.BALANCED)
+        self.profile_input.addItem("Low CPU Usage", PerformanceProfile.LOW_CPU)
+        self.profile_input.currentIndexChanged.connect(self._on_profile_selected)
+
         self.fps_input = QLineEdit()
         self.fps_input.setSizePolicy(QSizePolicy(QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Preferred))
         self.fps_input.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -278,20 +332,47 @@ class TrackingConfigGroup(QGroupBox):
         self.capture_config_button = QPushButton("Configure")
         self.capture_config_button.clicked.connect(self._open_capture_config_dialog)
 
+        self.inference_config_button = QPushButton("Configure")
+        self.inference_config_button.clicked.connect(self._open_inference_config_dialog)
+
+        self.preview_checkbox = QCheckBox("Show Camera Preview")
+        self.preview_checkbox.toggled.connect(self._on_preview_checkbox_toggled)
+
+        self.adaptive_rate_checkbox = QCheckBox("Adapt Tracking Rate to Load")
+        self.adaptive_rate_checkbox.toggled.connect(self._on_adaptive_rate_checkbox_toggled)
+
+        self.motion_gating_checkbox = QCheckBox("Skip Tracking While Nothing Moves")
+        self.motion_gating_checkbox.toggled.connect(self._on_motion_gating_checkbox_toggled)
+
         layout = QFormLayout()
         layout.addRow(self.tracking_label, self.tracking_button)
         layout.addRow(self.capture_label, self.capture_config_button)
+        layout.addRow("Performance Profile:", self.profile_input)
         layout.addRow("Max. Frames per Second:", self.fps_input)
+        layout.addRow("Inference:", self.inference_config_button)
+        layout.addRow(self.adaptive_rate_checkbox)
+        layout.addRow(self.motion_gating_checkbox)
+        layout.addRow(self.preview_checkbox)
         self.setLayout(layout)
 
         self._update_tracking_status()
         self._update_capture_status()
+        self._update_profile_input()
         self._update_fps_input()
+        self._update_preview_checkbox()
+        self._update_adaptive_rate_checkbox()
+        self._update_motion_gating_checkbox()
+        self.capture_config_button.setEnabled(bool(self.camera_capture2.cameras))
 
-        if not self.camera_capture2.cameras:
-            self.capture_config_button.setEnabled(False)
-
+        config.on_updated.subscribe(self._update_profile_input)
         config.on_updated.subscribe(self._update_fps_input)
+        config.on_updated.subscribe(self._update_preview_checkbox)
+        config.on_updated.subscribe(self._update_adaptive_rate_checkbox)
+        config.on_updated.subscribe(self._update_motion_gating_checkbox)
+
+    def update_cameras(self):
+        self.capture_config_button.setEnabled(bool(self.camera_capture2.cameras))
+        self._update_capture_status()
 
     def _on_tracking_button_clicked(self):
         self.config.tracking_running = not self.config.tracking_running
@@ -303,12 +384,29 @@ class TrackingConfigGroup(QGroupBox):
         dialog.exec_()
         self._update_capture_status()
 
+    def _on_profile_selected(self, index: int):
+        profile = self.profile_input.itemData(index)
+
+        if profile == self.config.performance_profile:
+            return
+
+        self.config.performance_profile = profile
+        self.config.apply_performance_profile()
+        self.config.on_updated.trigger()
+
+    def _open_inference_config_dialog(self):
+        dialog = InferenceConfigDialog(self, self.config)
+        dialog.show()
+        dialog.exec_()
+
     def _on_fps_input_changed(self):
         try:
             value = int(self.fps_input.text())
             
-            if value > 0:
+            if value > 0 and value != self.config.tracking_fps_cap:
                 self.config.tracking_fps_cap = value
+                self.config.performance_profile = PerformanceProfile.CUSTOM
+                self.config.on_updated.trigger()
         except ValueError:
             pass
 
@@ -325,22 +423,52 @@ class TrackingConfigGroup(QGroupBox):
     def _update_capture_status(self):
         config = self.config.capture_config
 
-        if config.camera:
-            self.capture_label.setText(f"{config.camera.name} ({config.frame_width}x{config.frame_height})")
+        if not self.camera_capture2.enumerated:
+            self.capture_label.setText("Detecting cameras...")
+        elif config.camera:
+            mode = select_mode(config.camera, config)
+            frame_rate = f" @ {mode.frame_rate():g} fps" if mode is not None else ""
+            self.capture_label.setText(f"{config.camera.name} ({config.frame_width}x{config.frame_height}{frame_rate})")
         elif not self.camera_capture2.cameras:
             self.capture_label.setText("<span style=\"color: #cc3d3d\">No camera connected</span>")
         else:
             self.capture_label.setText("<span style=\"color: #cc3d3d\">Camera not configured</span>")
 
+    def _on_preview_checkbox_toggled(self, checked: bool):
+        # The preview rate is part of the performance profile, turning the preview off overrides it.
+        if checked != self.config.preview_enabled:
+            self.config.preview_enabled = checked
+            self.config.performance_profile = PerformanceProfile.CUSTOM
+            self.config.on_updated.trigger()
+
+    def _update_profile_input(self):
+        self.profile_input.setCurrentIndex(self.profile_input.findData(self.config.performance_profile))
+
     def _update_fps_input(self):
         self.fps_input.setText(str(self.config.tracking_fps_cap))
 
+    def _update_preview_checkbox(self):
+        self.preview_checkbox.setChecked(self.config.preview_enabled)
+
+    def _on_adaptive_rate_checkbox_toggled(self, checked: bool):
+        self.config.adaptive_tracking_rate = checked
+
+    def _update_adaptive_rate_checkbox(self):
+        self.adaptive_rate_checkbox.setChecked(self.config.adaptive_tracking_rate)
+
+    def _on_motion_gating_checkbox_toggled(self, checked: bool):
+        self.config.motion_gating = checked
+
+    def _update_motion_gating_checkbox(self):
+        self.motion_gating_checkbox.setChecked(self.config.motion_gating)
+
 
 class CaptureConfigDialog(QDialog):
 
     def __init__(self, parent: QWidget, config: Config, capture: CameraCapture, capture2: CameraCapture2):
         super().__init__(parent)
 
+        self.config = config
         self.capture_config = config.capture_config
         self.capture = capture
         self.capture2 = capture2
@@ -357,6 +485,28 @@ class CaptureConfigDialog(QDialog):
         self.camera_input.currentIndexChanged.connect(self.update_resolutions)
 
         self.resolution_input = QComboBox()
+        self.resolution_input.currentIndexChanged.connect(self.update_modes)
+
+        self.frame_rate_input = QComboBox()
+        self.frame_rate_input.setToolTip("Higher frame rates reduce motion blur and input latency.")
+
+        self.format_input = QComboBox()
+        self.format_input.setToolTip("Pixel format in which the camera sends frames.")
+        self.format_input.currentIndexChanged.connect(self._update_decode_size_input)
+
+        self.decode_size_input = QComboBox()
+        self.decode_size_input.setToolTip(
+            "MJPG frames can be decoded at a fraction of the capture resolution, which is much faster."
+        )
+
+        for scale in DECODE_SCALES:
+            self.decode_size_input.addItem("Full" if scale == 1 else f"1/{scale}", scale)
+
+        self.auto_resolution_checkbox = QCheckBox("Pick Resolution Automatically")
+        self.auto_resolution_checkbox.setToolTip(
+            "Use the highest resolution at which this computer can still reach the configured frame rate."
+        )
+        self.auto_resolution_checkbox.toggled.connect(self.resolution_input.setDisabled)
         
         self.button_box = QDialogButtonBox()
         self.apply_button = self.button_box.addButton(QDialogButtonBox.StandardButton.Ok)
@@ -366,6 +516,10 @@ class CaptureConfigDialog(QDialog):
         layout = QFormLayout()
         layout.addRow("Camera:", self.camera_input)
         layout.addRow("Resolution:", self.resolution_input)
+        layout.addRow(self.auto_resolution_checkbox)
+        layout.addRow("Frame Rate:", self.frame_rate_input)
+        layout.addRow("Format:", self.format_input)
+        layout.addRow("Decode Size:", self.decode_size_input)
         layout.addRow(self.button_box)
         self.setLayout(layout)
 
@@ -384,7 +538,7 @@ class CaptureConfigDialog(QDialog):
             camera = self.camera_input.itemData(i)
 
             if camera.name == current_name:
-                self.resolution_input.setCurrentIndex(i)
+                self.camera_input.setCurrentIndex(i)
                 break
 
         for i in range(self.resolution_input.count()):
@@ -395,6 +549,14 @@ class CaptureConfigDialog(QDialog):
                 self.resolution_input.setCurrentIndex(i)
                 break
 
+        self.auto_resolution_checkbox.setChecked(self.config.auto_resolution)
+
+        self.frame_rate_input.setCurrentIndex(max(self.frame_rate_input.findData(self.capture_config.frame_rate), 0))
+        self.format_input.setCurrentIndex(max(self.format_input.findData(self.capture_config.pixel_format), 0))
+        decode_size_index = self.decode_size_input.findData(self.capture_config.decode_scale)
+        self.decode_size_input.setCurrentIndex(max(decode_size_index, 0))
+        self._update_decode_size_input()
+
     def on_button_clicked(self, button):
         if button == self.apply_button:
             camera = self.camera_input.currentData()
@@ -403,8 +565,18 @@ class CaptureConfigDialog(QDialog):
             self.capture_config.camera = camera
             self.capture_config.frame_width = resolution.width
             self.capture_config.frame_height = resolution.height
-
-            self.capture2.start()
+            self.capture_config.frame_rate = self.frame_rate_input.currentData()
+            self.capture_config.pixel_format = self.format_input.currentData()
+            self.capture_config.decode_scale = self.decode_size_input.currentData()
+            self.config.auto_resolution = self.auto_resolution_checkbox.isChecked()
+
+            # A manually picked resolution no longer matches the performance profile.
+            if not self.config.auto_resolution:
+                self.config.performance_profile = PerformanceProfile.CUSTOM
+
+            # The engine may already have reopened the camera to apply the resolution limits of the new settings.
+            self.config.on_updated.trigger()
+            self.capture2.restart()
         
         self.close()
 
@@ -416,6 +588,114 @@ class CaptureConfigDialog(QDialog):
         for resolution in camera.resolutions:
             self.resolution_input.addItem(f"{resolution.width} x {resolution.height}", resolution)
 
+    def update_modes(self):
+        camera = self.camera_input.currentData()
+        resolution = self.resolution_input.currentData()
+
+        frame_rate = self.frame_rate_input.currentData()
+        format = self.format_input.currentData()
+
+        self.frame_rate_input.clear()
+        self.frame_rate_input.addItem("Highest", 0.0)
+        self.format_input.clear()
+        self.format_input.addItem("Automatic", "")
+
+        if resolution is None:
+            return
+
+        for frame_rate_option in camera.get_frame_rates(resolution.width, resolution.height):
+            self.frame_rate_input.addItem(f"{frame_rate_option:g} fps", frame_rate_option)
+
+        for format_option in camera.get_formats(resolution.width, resolution.height):
+            self.format_input.addItem(format_option, format_option)
+
+        # Keep the previous choice if the new resolution supports it.
+        self.frame_rate_input.setCurrentIndex(max(self.frame_rate_input.findData(frame_rate), 0))
+        self.format_input.setCurrentIndex(max(self.format_input.findData(format), 0))
+
+    def _update_decode_size_input(self):
+        # Only frames that the tracker decodes itself can be decoded at a smaller size.
+        self.decode_size_input.setEnabled(self.format_input.currentData() == MJPEG_FORMAT)
+
+
+class InferenceConfigDialog(QDialog):
+
+    def __init__(self, parent: QWidget, config: Config):
+        super().__init__(parent)
+
+        self.config = config
+
+        self.setWindowModality(Qt.WindowModality.ApplicationModal)
+        self.setWindowTitle("Inference Configuration")
+        self.setMinimumWidth(360)
+
+        self.head_group = InferenceConfigGroup("Head Tracking", config.head_inference_config)
+        self.hand_group = InferenceConfigGroup("Hand Tracking", config.hand_inference_config)
+
+        # The trackers are created with or without workers at startup, so this can't be swapped like the landmarkers.
+        self.workers_checkbox = QCheckBox("Run Inference on Worker Threads (Requires Restart)")
+        self.workers_checkbox.setChecked(config.inference_workers)
+
+        self.button_box = QDialogButtonBox()
+        self.apply_button = self.button_box.addButton(QDialogButtonBox.StandardButton.Ok)
+        self.cancel_button = self.button_box.addButton(QDialogButtonBox.StandardButton.Cancel)
+        self.button_box.clicked.connect(self.on_button_clicked)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.head_group)
+        layout.addWidget(self.hand_group)
+        layout.addWidget(self.workers_checkbox)
+        layout.addWidget(self.button_box)
+        self.setLayout(layout)
+
+    def on_button_clicked(self, button):
+        # The tracking pipeline picks up the new values with the next frame.
+        if button == self.apply_button:
+            self.config.head_inference_config = self.head_group.to_config()
+            self.config.hand_inference_config = self.hand_group.to_config()
+            self.config.inference_workers = self.workers_checkbox.isChecked()
+
+        self.close()
+
+
+class InferenceConfigGroup(QGroupBox):
+
+    def __init__(self, title: str, config: InferenceConfig):
+        super().__init__(title)
+
+        self.delegate_input = QComboBox()
+        self.delegate_input.addItem("CPU", InferenceDelegate.CPU)
+        self.delegate_input.addItem("GPU", InferenceDelegate.GPU)
+        self.delegate_input.setCurrentIndex(self.delegate_input.findData(config.delegate))
+
+        self.detection_input = InferenceConfigGroup._create_confidence_input(config.min_detection_confidence)
+        self.presence_input = InferenceConfigGroup._create_confidence_input(config.min_presence_confidence)
+        self.tracking_input = InferenceConfigGroup._create_confidence_input(config.min_tracking_confidence)
+
+        layout = QFormLayout()
+        layout.addRow("Delegate:", self.delegate_input)
+        layout.addRow("Min. Detection Confidence:", self.detection_input)
+        layout.addRow("Min. Presence Confidence:", self.presence_input)
+        layout.addRow("Min. Tracking Confidence:", self.tracking_input)
+        self.setLayout(layout)
+
+    def to_config(self) -> InferenceConfig:
+        return InferenceConfig(
+            delegate=self.delegate_input.currentData(),
+            min_detection_confidence=self.detection_input.value(),
+            min_presence_confidence=self.presence_input.value(),
+            min_tracking_confidence=self.tracking_input.value(),
+        )
+
+    @staticmethod
+    def _create_confidence_input(value: float) -> QDoubleSpinBox:
+        input = QDoubleSpinBox()
+        input.setRange(0.0, 1.0)
+        input.setSingleStep(0.05)
+        input.setDecimals(2)
+        input.setValue(value)
+        return input
+
 
 class GeneralInputMappingGroup(QGroupBox):
 
@@ -430,8 +710,13 @@ class GeneralInputMappingGroup(QGroupBox):
         self.hand_tracking_mode_input = QComboBox()
         self.hand_tracking_mode_input.addItem("Direct (more responsive)", HandTrackingMode.DIRECT)
         self.hand_tracking_mode_input.addItem("Smooth (more stable)", HandTrackingMode.SMOOTH)
+        self.hand_tracking_mode_input.addItem("One Euro (adapts to speed)", HandTrackingMode.ONE_EURO)
+        self.hand_tracking_mode_input.addItem("Kalman (predicts motion)", HandTrackingMode.KALMAN)
         self.hand_tracking_mode_input.currentIndexChanged.connect(self._on_hand_tracking_mode_selected)
 
+        self.filter_latency = 0.0
+        self.filter_latency_label = QLabel()
+
         controller_pose_button = QPushButton("Configure Controller Pose")
         controller_pose_button.clicked.connect(self._show_controller_pose_dialog)
 
@@ -439,12 +724,19 @@ class GeneralInputMappingGroup(QGroupBox):
         layout.addRow("Headset Pitch Deadzone:", self.headset_pitch_deadzone)
         layout.addRow("Headset Yaw Deadzone:", self.headset_yaw_deadzone)
         layout.addRow("Hand Tracking Mode:", self.hand_tracking_mode_input)
+        layout.addRow("Filter Latency:", self.filter_latency_label)
         layout.addRow(controller_pose_button)
         self.setLayout(layout)
 
         self.config.on_updated.subscribe(self.sync_values)
         self.sync_values()
 
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._update_filter_latency_label)
+        self.timer.start(500)
+
+        self._update_filter_latency_label()
+
     def sync_values(self):
         self.headset_pitch_deadzone.set_value(self.config.headset_pitch_deadzone)
         self.headset_yaw_deadzone.set_value(self.config.headset_yaw_deadzone)
@@ -460,12 +752,19 @@ class GeneralInputMappingGroup(QGroupBox):
 
     def _on_hand_tracking_mode_selected(self, index: int):
         mode = self.hand_tracking_mode_input.itemData(index)
-        self.config.hand_tracking_mode = mode
+
+        if mode != self.config.hand_tracking_mode:
+            self.config.hand_tracking_mode = mode
+            self.config.performance_profile = PerformanceProfile.CUSTOM
+            self.config.on_updated.trigger()
 
     def _show_controller_pose_dialog(self):
         dialog = ControllerPoseDialog(self, self.config)
         dialog.show()
 
+    def _update_filter_latency_label(self):
+        self.filter_latency_label.setText(f"{1000.0 * self.filter_latency:.0f} ms")
+
 
 class ControllerConfigGroup(QTabWidget):
 
@@ -718,13 +1017,39 @@ class CameraView(QLabel):
         468, 473, 4
     ]
 
+    # Same as `mediapipe.solutions.hands_connections.HAND_CONNECTIONS`, copied so that the window can be shown
+    # without importing MediaPipe.
+    HAND_CONNECTIONS = [
+        (0, 1), (1, 2), (2, 3), (3, 4),
+        (0, 5), (5, 6), (6, 7), (7, 8),
+        (5, 9), (9, 10), (10, 11), (11, 12),
+        (9, 13), (13, 14), (14, 15), (15, 16),
+        (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+    ]
+
+    GESTURE_COLORS = {
+        Gesture.PINCH: QColor(255, 255, 0),
+        Gesture.PALM_PINCH: QColor(255, 0, 255),
+        Gesture.MIDDLE_PINCH: QColor(0, 255, 255),
+        Gesture.FIST: QColor(0, 0, 255),
+    }
+
     MIN_IMAGE_PADDING = 20
 
-    def __init__(self):
+    def __init__(self, config: Config):
         super().__init__("Starting camera capture...")
 
-        self.frame = None
+        self.config = config
+
+        # The capture thread only ever replaces `pending_frame`. Converting and scaling the frame happens on the GUI
+        # thread at the preview rate, so the preview doesn't slow down tracking.
+        self.pending_frame = None
+        self.preview_frame = None
+        self.preview_image = None
+        self.image_rect = None
+        # Like `pending_frame`, the overlay is only replaced by the tracking threads and painted at the preview rate.
         self.overlay = None
+        self.painted_overlay = None
 
         size_policy = QSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
         size_policy.setHorizontalStretch(2)
@@ -732,134 +1057,148 @@ class CameraView(QLabel):
 
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-    def update_frame(self, frame):
-        self.setText("")
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._update_preview)
+        self.timer.start(1000 // max(config.preview_fps, 1))
 
-        self.frame = frame
-        self.update()
+    def update_frame(self, frame):
+        self.pending_frame = frame
 
     def clear_overlay(self):
         self.overlay = None
-        self.update()
 
     def display_camera_error(self):
         self.setText("Failed to start camera capture.")
-        self.frame = None
+        self.pending_frame = None
+        self.preview_frame = None
+        self.preview_image = None
         self.overlay = None
         self.update()
 
     def update_overlay(self, tracking_state: TrackingState):
-        height, width, _ = self.frame.shape
-        overlay = np.zeros((height, width, 4), np.uint8)
+        # Head and hand states are replaced rather than modified on each result, so a shallow copy is enough to keep
+        # the overlay consistent until the next repaint.
+        self.overlay = copy(tracking_state)
 
-        if tracking_state.head.visible:
-            landmarks = tracking_state.head.landmarks
+    def resizeEvent(self, e: QResizeEvent):
+        # Rescale the current frame to the new size.
+        self.preview_frame = None
+        self._update_preview()
+        return super().resizeEvent(e)
 
-            for i in range(len(CameraView.HEAD_CONTOUR_LANDMARK_INDICES)):
-                a = CameraView.HEAD_CONTOUR_LANDMARK_INDICES[i]
-                b = CameraView.HEAD_CONTOUR_LANDMARK_INDICES[(i + 1) % len(CameraView.HEAD_CONTOUR_LANDMARK_INDICES)]
-
-                x1 = int(width * landmarks[a].x)
-                y1 = int(height * landmarks[a].y)
-                x2 = int(width * landmarks[b].x)
-                y2 = int(height * landmarks[b].y)
-                cv2.line(overlay, (x1, y1), (x2, y2), (0, 255, 0, 255), 2)
-
-            for index in CameraView.HEAD_CONTOUR_LANDMARK_INDICES + CameraView.HEAD_OTHER_LANDMARK_INDICES:
-                landmark = landmarks[index]
-                x = int(width * landmark.x)
-                y = int(height * landmark.y)
-                cv2.circle(overlay, (x, y), 4, (255, 0, 0, 255), -1)
-
-        # x = int(0.5 * width)
-        # y = int(0.2 * height)
-        # cv2.circle(new_overlay, (x, y), 8, (255, 255, 255, 255), -1)
-
-        if tracking_state.left_hand.visible:
-            x1 = int(LEFT_HAND_TRACKING_ORIGIN[0] * width)
-            y1 = int(LEFT_HAND_TRACKING_ORIGIN[1] * height)
-            x2 = int(width * tracking_state.left_hand.landmarks[0].x)
-            y2 = int(height * tracking_state.left_hand.landmarks[0].y)
-            cv2.line(overlay, (x1, y1), (x2, y2), (255, 255, 255, 255), 2)
-            cv2.circle(overlay, (x1, y1), 8, (255, 255, 255, 255), -1)
-        
-        if tracking_state.right_hand.visible:
-            x1 = int(RIGHT_HAND_TRACKING_ORIGIN[0] * width)
-            y1 = int(RIGHT_HAND_TRACKING_ORIGIN[1] * height)
-            x2 = int(width * tracking_state.right_hand.landmarks[0].x)
-            y2 = int(height * tracking_state.right_hand.landmarks[0].y)
-            cv2.line(overlay, (x1, y1), (x2, y2), (255, 255, 255, 255), 2)
-            cv2.circle(overlay, (x1, y1), 8, (255, 255, 255, 255), -1)
-
-        for hand_state in [tracking_state.left_hand, tracking_state.right_hand]:
-            if not hand_state.visible:
-                continue
+    def _update_preview(self):
+        interval = 1000 // max(self.config.preview_fps, 1)
+
+        if self.timer.interval() != interval:
+            self.timer.setInterval(interval)
+
+        if not self.config.preview_enabled:
+            if self.preview_image is not None:
+                self.preview_image = None
+                self.preview_frame = None
+                self.setText("Camera preview paused.")
+
+            return
+
+        frame = self.pending_frame
+
+        if frame is None or frame is self.preview_frame:
+            # The overlay can change without a new frame, e.g. while the camera is being reconfigured.
+            if self.preview_image is not None and self.overlay is not self.painted_overlay:
+                self.update()
+
+            return
+
+        height, width, _ = frame.shape
+        self.image_rect = self._compute_image_rect(width, height)
+
+        image = QImage(frame.data, width, height, 3 * width, QImage.Format.Format_RGB888)
+        self.preview_image = image.scaled(
+            self.image_rect.size(),
+            Qt.AspectRatioMode.IgnoreAspectRatio,
+            Qt.TransformationMode.FastTransformation,
+        )
+        self.preview_frame = frame
+
+        if self.text():
+            self.setText("")
 
-            landmarks = hand_state.landmarks
-
-            for a, b in solutions.hands_connections.HAND_CONNECTIONS:
-                if hand_state.gesture is None:
-                    color = (0, 255, 0, 255)
-                elif hand_state.gesture == Gesture.PINCH:
-                    color = (255, 255, 0, 255)
-                elif hand_state.gesture == Gesture.PALM_PINCH:
-                    color = (255, 0, 255, 255)
-                elif hand_state.gesture == Gesture.MIDDLE_PINCH:
-                    color = (0, 255, 255, 255)
-                elif hand_state.gesture == Gesture.FIST:
-                    color = (0, 0, 255, 255)
-
-                x1 = int(width * landmarks[a].x)
-                y1 = int(height * landmarks[a].y)
-                x2 = int(width * landmarks[b].x)
-                y2 = int(height * landmarks[b].y)
-                cv2.line(overlay, (x1, y1), (x2, y2), color, 2)
-
-            for landmark in landmarks:
-                x = int(width * landmark.x)
-                y = int(height * landmark.y)
-                cv2.circle(overlay, (x, y), 4, (255, 0, 0, 255), -1)
-
-        self.overlay = overlay
         self.update()
 
+    def _compute_image_rect(self, width: int, height: int) -> QRect:
+        max_width = self.width() - CameraView.MIN_IMAGE_PADDING
+        max_height = self.height() - CameraView.MIN_IMAGE_PADDING
+        scale = min(max_width / width, max_height / height, 1.0)
+
+        paint_width = max(int(width * scale), 1)
+        paint_height = max(int(height * scale), 1)
+        x = (self.width() - paint_width) // 2
+        y = (self.height() - paint_height) // 2
+
+        return QRect(x, y, paint_width, paint_height)
+
     def paintEvent(self, e: QPaintEvent):
-        if self.frame is None:
+        if self.preview_image is None:
             return super().paintEvent(e)
 
-        canvas_width, canvas_height = self.width(), self.height()
-        max_width = canvas_width - CameraView.MIN_IMAGE_PADDING
-        max_height = canvas_height - CameraView.MIN_IMAGE_PADDING
+        painter = QPainter(self)
+        painter.drawImage(self.image_rect.topLeft(), self.preview_image)
+        overlay = self.overlay
+        self.painted_overlay = overlay
+
+        if overlay is not None:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            self._paint_overlay(painter, self.image_rect, overlay)
 
-        height, width, _ = self.frame.shape
-        aspect_ratio = width / height
+        painter.end()
+        return super().paintEvent(e)
 
-        if width > max_width:
-            paint_width = max_width
-            paint_height = paint_width / aspect_ratio
-        elif height > max_height:
-            paint_height = max_height
-            paint_width = paint_height / aspect_ratio
-        else:
-            paint_width = width
-            paint_height = height
+    def _paint_overlay(self, painter: QPainter, rect: QRect, tracking_state: TrackingState):
+        x, y, width, height = rect.x(), rect.y(), rect.width(), rect.height()
 
-        x = (canvas_width - paint_width) / 2
-        y = (canvas_height - paint_height) / 2
-        rect = QRect(x, y, paint_width, paint_height)
+        def to_point(landmark):
+            return QPointF(x + width * landmark.x, y + height * landmark.y)
 
-        painter = QPainter(self)
+        if tracking_state.head.visible:
+            landmarks = tracking_state.head.landmarks
+            indices = CameraView.HEAD_CONTOUR_LANDMARK_INDICES
+            contour = [to_point(landmarks[index]) for index in indices]
 
-        image = QImage(self.frame, width, height, QImage.Format.Format_RGB888)
-        painter.drawImage(rect, image)
+            painter.setPen(QPen(QColor(0, 255, 0), 2))
+            painter.drawPolygon(QPolygonF(contour))
 
-        if self.overlay is not None:
-            height, width, _ = self.overlay.shape
-            image = QImage(self.overlay, width, height, QImage.Format.Format_RGBA8888)
-            painter.drawImage(rect, image)
+            other = [to_point(landmarks[index]) for index in CameraView.HEAD_OTHER_LANDMARK_INDICES]
+            painter.setPen(CameraView._point_pen(QColor(255, 0, 0), 8))
+            painter.drawPoints(QPolygonF(contour + other))
 
-        painter.end()
-        return super().paintEvent(e)
+        for hand_state, tracking_origin in (
+            (tracking_state.left_hand, LEFT_HAND_TRACKING_ORIGIN),
+            (tracking_state.right_hand, RIGHT_HAND_TRACKING_ORIGIN),
+        ):
+            if not hand_state.visible:
+                continue
+
+            points = [to_point(landmark) for landmark in hand_state.landmarks]
+            origin = QPointF(x + width * tracking_origin[0], y + height * tracking_origin[1])
+
+            painter.setPen(QPen(QColor(255, 255, 255), 2))
+            painter.drawLine(origin, points[0])
+            painter.setPen(CameraView._point_pen(QColor(255, 255, 255), 16))
+            painter.drawPoint(origin)
+
+            color = CameraView.GESTURE_COLORS.get(hand_state.gesture, QColor(0, 255, 0))
+            lines = [QLineF(points[a], points[b]) for a, b in CameraView.HAND_CONNECTIONS]
+
+            painter.setPen(QPen(color, 2))
+            painter.drawLines(lines)
+            painter.setPen(CameraView._point_pen(QColor(255, 0, 0), 8))
+            painter.drawPoints(QPolygonF(points))
+
+    @staticmethod
+    def _point_pen(color: QColor, diameter: int) -> QPen:
+        pen = QPen(color, diameter)
+        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+        return pen
 
 
 class FrameView(QStackedWidget):
@@ -950,6 +1289,241 @@ class FrameView(QStackedWidget):
             self._set_status_signal.emit(FrameView.Status.METAL_UNSUPPORTED)
 
 
+class PerformanceView(QWidget):
+
+    REFRESH_INTERVAL = 1000
+
+    def __init__(self):
+        super().__init__()
+
+        self.capture_label = QLabel()
+        self.tracking_rate_label = QLabel()
+        self.rate_decision_label = QLabel()
+        self.rate_decision_label.setWordWrap(True)
+        self.dropped_label = QLabel()
+        self.skipped_label = QLabel()
+        self.fused_label = QLabel()
+        self.poll_rate_label = QLabel()
+        self.poll_time_label = QLabel()
+        self.send_latency_label = QLabel()
+        self.head_latency_label = QLabel()
+        self.hand_latency_label = QLabel()
+        self.head_histogram = LatencyHistogramView()
+        self.hand_histogram = LatencyHistogramView()
+        self.stages_label = QLabel()
+
+        # Tracing keeps recording while the tab is hidden, so a trace can be taken while using an application.
+        self.trace_check_box = QCheckBox("Record")
+        self.trace_check_box.setChecked(tracing.enabled)
+        self.trace_check_box.toggled.connect(self._on_trace_toggled)
+        self.save_trace_button = QPushButton("Save...")
+        self.save_trace_button.clicked.connect(self._on_save_trace)
+
+        trace_layout = QHBoxLayout()
+        trace_layout.setContentsMargins(0, 0, 0, 0)
+        trace_layout.addWidget(self.trace_check_box)
+        trace_layout.addWidget(self.save_trace_button)
+        trace_layout.addStretch()
+
+        layout = QFormLayout()
+        layout.addRow("Capture Rate:", self.capture_label)
+        layout.addRow("Tracking Rate (Head/Hands):", self.tracking_rate_label)
+        layout.addRow("Last Rate Change:", self.rate_decision_label)
+        layout.addRow("Dropped Frames (Head/Hands):", self.dropped_label)
+        layout.addRow("Still Frames Skipped (Head/Hands):", self.skipped_label)
+        layout.addRow("Head and Hands Sent Together:", self.fused_label)
+        layout.addRow("Runtime Poll Rate:", self.poll_rate_label)
+        layout.addRow("Poll Response Time:", self.poll_time_label)
+        layout.addRow("Capture to Send Latency:", self.send_latency_label)
+        layout.addRow("Head Inference Latency:", self.head_latency_label)
+        layout.addRow(self.head_histogram)
+        layout.addRow("Hand Inference Latency:", self.hand_latency_label)
+        layout.addRow(self.hand_histogram)
+        layout.addRow("Inference Worker Stages:", self.stages_label)
+        layout.addRow("Trace:", trace_layout)
+        self.setLayout(layout)
+
+        self.previous = None
+        self.previous_stages = None
+        self.previous_time = 0.0
+        self.recording = False
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._refresh)
+
+    def showEvent(self, e):
+        if not self.recording:
+            self.recording = True
+            performance.stats.acquire()
+
+        self.previous = self._take_snapshot()
+        self.previous_stages = self._take_stage_snapshot()
+        self.previous_time = performance.now()
+        self.timer.start(PerformanceView.REFRESH_INTERVAL)
+        return super().showEvent(e)
+
+    def hideEvent(self, e):
+        # Nobody is looking anymore, so the pipeline can stop recording.
+        self.timer.stop()
+
+        if self.recording:
+            self.recording = False
+            performance.stats.release()
+
+        return super().hideEvent(e)
+
+    def _on_trace_toggled(self, checked: bool):
+        if checked:
+            tracing.clear()
+
+        tracing.enabled = checked
+
+    def _on_save_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Trace", "aethervr_trace.json", "Chrome Trace (*.json)")
+
+        if not path:
+            return
+
+        try:
+            tracing.save(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to save trace: {e}")
+
+    def _take_snapshot(self):
+        stats = performance.stats
+
+        return (
+            stats.captured_frames.value,
+            stats.dropped_head_frames.value,
+            stats.dropped_hand_frames.value,
+            stats.skipped_head_frames.value,
+            stats.skipped_hand_frames.value,
+            stats.fused_updates.value,
+            stats.fusion_timeouts.value,
+            stats.runtime_polls.value,
+            stats.poll_response_time.snapshot(),
+            stats.capture_to_send_latency.snapshot(),
+            stats.head_inference_latency.snapshot(),
+            stats.hand_inference_latency.snapshot(),
+        )
+
+    def _take_stage_snapshot(self):
+        return {
+            name: (stage.items.value, stage.process_time.snapshot())
+            for name, stage in performance.stats.stages.items()
+        }
+
+    def _refresh(self):
+        current = self._take_snapshot()
+        current_stages = self._take_stage_snapshot()
+        current_time = performance.now()
+        elapsed = max(current_time - self.previous_time, 1e-6)
+
+        (
+            captured,
+            dropped_head,
+            dropped_hand,
+            skipped_head,
+            skipped_hand,
+            fused,
+            fusion_timeouts,
+            polls,
+            poll_time,
+            send_latency,
+            head_latency,
+            hand_latency,
+        ) = (
+            value - previous if isinstance(value, int) else value.difference(previous)
+            for value, previous in zip(current, self.previous)
+        )
+
+        self.capture_label.setText(f"{captured / elapsed:.1f} fps")
+        self.tracking_rate_label.setText(
+            f"{performance.stats.head_tracking_rate.value:.0f} / {performance.stats.hand_tracking_rate.value:.0f} Hz"
+        )
+        self.rate_decision_label.setText(performance.stats.rate_decision or "-")
+        self.dropped_label.setText(f"{dropped_head} / {dropped_hand}")
+        self.skipped_label.setText(f"{skipped_head} / {skipped_hand}")
+        self.fused_label.setText(f"{fused / elapsed:.1f} Hz ({fusion_timeouts} timed out)")
+        self.poll_rate_label.setText(f"{polls / elapsed:.1f} Hz")
+        self.poll_time_label.setText(self._format_latency(poll_time))
+        self.send_latency_label.setText(self._format_latency(send_latency))
+        self.head_latency_label.setText(self._format_latency(head_latency))
+        self.hand_latency_label.setText(self._format_latency(hand_latency))
+        self.head_histogram.set_histogram(head_latency)
+        self.hand_histogram.set_histogram(hand_latency)
+        self.stages_label.setText(self._format_stages(current_stages, elapsed))
+
+        self.previous = current
+        self.previous_stages = current_stages
+        self.previous_time = current_time
+
+    # Throughput and time per item of each worker stage, or "-" while the trackers run in MediaPipe's own threads.
+    def _format_stages(self, current_stages, elapsed: float) -> str:
+        lines = []
+
+        for name, (items, process_time) in current_stages.items():
+            previous_items, previous_process_time = self.previous_stages[name]
+            items -= previous_items
+
+            if items == 0:
+                continue
+
+            mean = process_time.difference(previous_process_time).mean()
+            lines.append(f"{name.replace('_', ' ').capitalize()}: {items / elapsed:.1f}/s, {mean:.1f} ms")
+
+        return "\n".join(lines) or "-"
+
+    def _format_latency(self, histogram: performance.LatencyHistogram) -> str:
+        if histogram.count == 0:
+            return "-"
+
+        p95 = histogram.percentile(0.95)
+        p95_text = f"{p95:.0f} ms" if p95 != float("inf") else f"> {performance.LATENCY_BUCKETS[-1]:.0f} ms"
+        return f"{histogram.mean():.1f} ms (95th percentile: {p95_text})"
+
+
+class LatencyHistogramView(QWidget):
+
+    BAR_COLOR = QColor(0x3d, 0x8e, 0xcc)
+
+    def __init__(self):
+        super().__init__()
+        self.histogram = None
+        self.setMinimumHeight(80)
+
+    def set_histogram(self, histogram: performance.LatencyHistogram):
+        self.histogram = histogram
+        self.update()
+
+    def paintEvent(self, e: QPaintEvent):
+        painter = QPainter(self)
+        metrics = painter.fontMetrics()
+
+        num_buckets = len(performance.LATENCY_BUCKETS) + 1
+        bar_width = self.width() / num_buckets
+        bar_area_height = self.height() - metrics.height() - 4
+
+        for i in range(num_buckets):
+            if i < len(performance.LATENCY_BUCKETS):
+                label = f"{performance.LATENCY_BUCKETS[i]:.0f}"
+            else:
+                label = f">{performance.LATENCY_BUCKETS[-1]:.0f}"
+
+            label_rect = QRect(int(i * bar_width), bar_area_height + 4, int(bar_width), metrics.height())
+            painter.drawText(label_rect, Qt.AlignmentFlag.AlignCenter, label)
+
+        if self.histogram is not None and self.histogram.count > 0:
+            max_count = max(self.histogram.counts)
+
+            for i, count in enumerate(self.histogram.counts):
+                height = int(bar_area_height * count / max_count)
+                rect = QRect(int(i * bar_width) + 2, bar_area_height - height, int(bar_width) - 4, height)
+                painter.fillRect(rect, LatencyHistogramView.BAR_COLOR)
+
+        painter.end()
+
+
 class DisplaySurfaceWindow(QWidget):
 
     def __init__(self):
@@ -1092,6 +1666,8 @@ class GUI:
         self.window = Window(config, system_openxr_config, connection, camera_capture, camera_capture2)
         self.window.show()
 
+        QTimer.singleShot(0, lambda: startup.mark("window shown"))
+
     def show_download_dialog(self, on_download) -> bool:
         return self.window.show_download_dialog(on_download)
 
@@ -1107,6 +1683,18 @@ class GUI:
     def display_camera_error(self):
         self.window.display_camera_error()
 
+    def update_filter_latency(self, latency: float):
+        self.window.update_filter_latency(latency)
+
+    def update_startup_progress(self, text: str):
+        self.window.update_startup_progress(text)
+
+    def finish_startup(self):
+        self.window.finish_startup()
+
+    def call_on_gui_thread(self, callback):
+        self.window.call_on_gui_thread(callback)
+
     def run(self):
         self.app.exec()
     
@@ -1,4 +1,4 @@
-import math
+from threading import Thread, Lock
 import time
 
 import mediapipe as mp
@@ -9,89 +9,177 @@ from mediapipe.tasks.python.vision import (
     RunningMode,
 )
 
-from aethervr.tracking_state import HandState
-from aethervr.pose import Position, Orientation
-from aethervr.config import *
+from aethervr.pose_reconstruction import reconstruct_hand_states
+from aethervr.config import InferenceConfig, InferenceDelegate
+from aethervr.event_source import EventSource
 from aethervr import mediapipe_models
+from aethervr import performance
+from aethervr import tracing
 
 
 class HandTracker:
 
-    DEPTH_ORIGIN = 1.3
-    DEPTH_SCALE = 5.0
-
-    def __init__(self, head_tracker, detection_callback) -> None:
+    def __init__(self, head_tracker, detection_callback, config: InferenceConfig, workers=None) -> None:
         self.head_tracker = head_tracker
         self.detection_callback = detection_callback
+        self.config = config
+        # Triggered with the capture time and frame ID of frames that the inference workers failed to process.
+        self.on_detection_failed = EventSource()
+        # Set if the landmarker runs in VIDEO mode on the inference workers instead of MediaPipe's own threads.
+        self.chain = None
+
+        if workers is not None:
+            self.chain = workers.create_chain(
+                "hand",
+                self._detect_for_video,
+                self._reconstruct,
+                self._publish,
+                self.on_detection_failed.trigger,
+                performance.stats.hand_inference_latency,
+            )
+
+        # Keeps the landmarker from being swapped while a frame is submitted to it.
+        self.detector_lock = Lock()
+        self.detector = self._create_detector(config)
+        self.reconfigure_lock = Lock()
+        self.reconfigure_thread = None
+        self.timestamp = 0
+        # Set while the landmarks are recorded for replay.
+        self.recorder = None
+        # Capture time, frame ID and submission time of the frames that are being processed by MediaPipe.
+        self.pending_frames = {}
 
-        model_path = mediapipe_models.get_model_path(mediapipe_models.HAND_LANDMARKER_FILE_NAME)
+        print("Hand tracker initialized")
+
+    @staticmethod
+    def create_detector(config: InferenceConfig, running_mode: RunningMode, result_callback=None) -> HandLandmarker:
+        model_buffer = mediapipe_models.get_model_buffer(mediapipe_models.HAND_LANDMARKER_FILE_NAME)
+        delegate = BaseOptions.Delegate.GPU if config.delegate == InferenceDelegate.GPU else BaseOptions.Delegate.CPU
 
         options = HandLandmarkerOptions(
-            base_options=BaseOptions(model_asset_path=str(model_path)),
+            base_options=BaseOptions(model_asset_buffer=model_buffer, delegate=delegate),
             num_hands=2,
-            running_mode=RunningMode.LIVE_STREAM,
-            result_callback=self._process_results,
+            min_hand_detection_confidence=config.min_detection_confidence,
+            min_hand_presence_confidence=config.min_presence_confidence,
+            min_tracking_confidence=config.min_tracking_confidence,
+            running_mode=running_mode,
+            result_callback=result_callback,
         )
-        self.detector = HandLandmarker.create_from_options(options)
-        self.timestamp = 0
 
-        print("Hand tracker initialized")
+        return HandLandmarker.create_from_options(options)
+
+    def _create_detector(self, config: InferenceConfig) -> HandLandmarker:
+        if self.chain is not None:
+            return HandTracker.create_detector(config, RunningMode.VIDEO)
+
+        return HandTracker.create_detector(config, RunningMode.LIVE_STREAM, self._process_results)
+
+    # Creating a landmarker loads the model and closing one waits for the frames it's still processing, so both happen
+    # on a thread of their own. Frames keep going to the current landmarker until the new one is ready.
+    def reconfigure(self, config: InferenceConfig):
+        self.config = config
+
+        with self.reconfigure_lock:
+            if self.reconfigure_thread is not None:
+                # The running thread applies the latest config once it's done.
+                return
+
+            self.reconfigure_thread = Thread(target=self._reconfigure, name="hand tracker reconfiguration")
+            self.reconfigure_thread.start()
+
+    def _reconfigure(self):
+        while True:
+            config = self.config
+
+            try:
+                detector = self._create_detector(config)
+            except Exception as e:
+                print(f"Failed to apply hand tracking inference settings: {e}")
+                detector = None
+
+            if detector is not None:
+                with self.detector_lock:
+                    previous_detector = self.detector
+                    self.detector = detector
+
+                previous_detector.close()
+                print("Hand tracker reconfigured")
+
+            with self.reconfigure_lock:
+                if self.config == config:
+                    self.reconfigure_thread = None
+                    return
+
+    def detect(self, frame, capture_time: float, frame_id: int = 0):
+        if self.chain is not None:
+            self.chain.submit(frame, capture_time, frame_id)
+            return
+
+        # Results for frames that MediaPipe dropped never arrive, so don't let their entries pile up. The engine keeps
+        # at most two frames in flight, so only entries far behind the newest frame are removed.
+        if len(self.pending_frames) > 8:
+            for timestamp in list(self.pending_frames):
+                if timestamp < self.timestamp - 8:
+                    self.pending_frames.pop(timestamp, None)
+
+        self.pending_frames[self.timestamp] = (capture_time, frame_id, performance.now())
 
-    def detect(self, frame):
         image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
-        self.detector.detect_async(image, self.timestamp)
+
+        with self.detector_lock:
+            self.detector.detect_async(image, self.timestamp)
         self.timestamp += 1
 
     def _process_results(self, detection_results, image, timestamp):
+        start_time = performance.now()
+        capture_time, frame_id, submit_time = self.pending_frames.pop(timestamp, (0.0, 0, 0.0))
+
+        if capture_time > 0.0:
+            performance.stats.hand_inference_latency.record(start_time - capture_time)
+
+        if submit_time > 0.0:
+            tracing.record("hand inference", frame_id, submit_time, start_time, track="hand inference")
+
+        with tracing.span("hand result callback", frame_id):
+            self._process_detection_results(detection_results, capture_time, frame_id)
+
+    def _detect_for_video(self, image, timestamp: int):
+        with self.detector_lock:
+            return self.detector.detect_for_video(image, timestamp)
+
+    def _process_detection_results(self, detection_results, capture_time: float, frame_id: int):
         try:
-            left_hand = HandState(timestamp=time.time_ns(), visible=False)
-            right_hand = HandState(timestamp=time.time_ns(), visible=False)
-
-            for i, landmarks in enumerate(detection_results.hand_landmarks):
-                is_left_handed = landmarks[0].x <= 0.5
-                
-                if is_left_handed:
-                    hand = left_hand
-                    tracking_origin = LEFT_HAND_TRACKING_ORIGIN
-                    offset = LEFT_HAND_WORLD_ORIGIN
-                else:
-                    hand = right_hand
-                    tracking_origin = RIGHT_HAND_TRACKING_ORIGIN
-                    offset = RIGHT_HAND_WORLD_ORIGIN
-                
-                p1 = HandTracker.get_landmark_position(landmarks[0])
-                p2 = HandTracker.get_landmark_position(landmarks[5])
-                p3 = HandTracker.get_landmark_position(landmarks[17])
-
-                dx = landmarks[9].x - landmarks[0].x
-                dy = landmarks[9].y - landmarks[0].y
-                nonlinear_depth_estimate = math.sqrt(dx * dx + dy * dy)
-                linear_depth_estimate = math.sqrt(nonlinear_depth_estimate)
-
-                raw_x = (float(landmarks[0].x) + float(landmarks[5].x) + float(landmarks[17].x)) / 3
-                raw_y = (float(landmarks[0].y) + float(landmarks[5].y) + float(landmarks[17].y)) / 3
-
-                hand_x = offset[0] + 2.0 * (raw_x - tracking_origin[0])
-                hand_y = offset[1] - 2.0 * (raw_y - tracking_origin[1])
-                hand_z = HandTracker.DEPTH_ORIGIN - HandTracker.DEPTH_SCALE * linear_depth_estimate
-                position = Position(hand_x, hand_y, hand_z)
-
-                orientation = Orientation.from_triangle(p1, p2, p3, is_left_handed)
-
-                hand.visible = True
-                hand.landmarks = landmarks
-                hand.world_landmarks = detection_results.hand_world_landmarks[i]
-                hand.position = position
-                hand.orientation = orientation
-
-            self.detection_callback(left_hand, right_hand)
+            self._publish(self._reconstruct(detection_results, capture_time, frame_id))
         except Exception as e:
             print(e)
 
+    def _reconstruct(self, detection_results, capture_time: float, frame_id: int):
+        timestamp = time.time_ns()
+        hand_landmarks = detection_results.hand_landmarks
+        hand_world_landmarks = detection_results.hand_world_landmarks
+
+        if self.recorder is not None:
+            self.recorder.record_hands(capture_time, frame_id, timestamp, hand_landmarks, hand_world_landmarks)
+
+        with tracing.span("hand pose reconstruction", frame_id):
+            return reconstruct_hand_states(
+                hand_landmarks,
+                hand_world_landmarks,
+                timestamp,
+                capture_time,
+                frame_id,
+            )
+
+    def _publish(self, states):
+        left_hand, right_hand = states
+        self.detection_callback(left_hand, right_hand)
+
     def close(self):
+        with self.reconfigure_lock:
+            reconfigure_thread = self.reconfigure_thread
+
+        if reconfigure_thread is not None:
+            reconfigure_thread.join()
+
         self.detector.close()
         print("Hand tracker closed")
-
-    @staticmethod
-    def get_landmark_position(landmark):
-        return Position(landmark.x, -landmark.y, -landmark.z)
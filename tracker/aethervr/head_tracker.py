@@ -1,68 +1,173 @@
+from threading import Thread, Lock
+
 import mediapipe as mp
 from mediapipe.tasks.python import BaseOptions
 from mediapipe.tasks.python.vision import FaceLandmarker, FaceLandmarkerOptions, RunningMode
-import numpy as np
 
 from aethervr import mediapipe_models
-from aethervr.pose import Position
-from aethervr.tracking_state import HeadState
+from aethervr import performance
+from aethervr import tracing
+from aethervr.pose_reconstruction import reconstruct_head_state
+from aethervr.config import InferenceConfig, InferenceDelegate
+from aethervr.event_source import EventSource
 
 
 class HeadTracker:
 
-    def __init__(self, detection_callback):
+    def __init__(self, detection_callback, config: InferenceConfig, workers=None):
         self.detection_callback = detection_callback
+        self.config = config
+        # Triggered with the capture time and frame ID of frames that the inference workers failed to process.
+        self.on_detection_failed = EventSource()
+        # Set if the landmarker runs in VIDEO mode on the inference workers instead of MediaPipe's own threads.
+        self.chain = None
+
+        if workers is not None:
+            self.chain = workers.create_chain(
+                "head",
+                self._detect_for_video,
+                self._reconstruct,
+                self.detection_callback,
+                self.on_detection_failed.trigger,
+                performance.stats.head_inference_latency,
+            )
+
+        # Keeps the landmarker from being swapped while a frame is submitted to it.
+        self.detector_lock = Lock()
+        self.detector = self._create_detector(config)
+        self.reconfigure_lock = Lock()
+        self.reconfigure_thread = None
+        self.timestamp = 0
+        # Set while the landmarks are recorded for replay.
+        self.recorder = None
+        # Capture time, frame ID and submission time of the frames that are being processed by MediaPipe.
+        self.pending_frames = {}
+
+        print("Head tracker initialized")
 
-        model_path = mediapipe_models.get_model_path(mediapipe_models.FACE_LANDMARKER_FILE_NAME)
+    @staticmethod
+    def create_detector(config: InferenceConfig, running_mode: RunningMode, result_callback=None) -> FaceLandmarker:
+        model_buffer = mediapipe_models.get_model_buffer(mediapipe_models.FACE_LANDMARKER_FILE_NAME)
+        delegate = BaseOptions.Delegate.GPU if config.delegate == InferenceDelegate.GPU else BaseOptions.Delegate.CPU
 
         options = FaceLandmarkerOptions(
-            base_options=BaseOptions(model_asset_path=str(model_path)),
+            base_options=BaseOptions(model_asset_buffer=model_buffer, delegate=delegate),
             output_face_blendshapes=True,
             output_facial_transformation_matrixes=True,
             num_faces=1,
-            running_mode=RunningMode.LIVE_STREAM,
-            result_callback=self._process_results,
+            min_face_detection_confidence=config.min_detection_confidence,
+            min_face_presence_confidence=config.min_presence_confidence,
+            min_tracking_confidence=config.min_tracking_confidence,
+            running_mode=running_mode,
+            result_callback=result_callback,
         )
-        self.detector = FaceLandmarker.create_from_options(options)
-        self.timestamp = 0
 
-        print("Head tracker initialized")
+        return FaceLandmarker.create_from_options(options)
+
+    def _create_detector(self, config: InferenceConfig) -> FaceLandmarker:
+        if self.chain is not None:
+            return HeadTracker.create_detector(config, RunningMode.VIDEO)
+
+        return HeadTracker.create_detector(config, RunningMode.LIVE_STREAM, self._process_results)
+
+    # Creating a landmarker loads the model and closing one waits for the frames it's still processing, so both happen
+    # on a thread of their own. Frames keep going to the current landmarker until the new one is ready.
+    def reconfigure(self, config: InferenceConfig):
+        self.config = config
+
+        with self.reconfigure_lock:
+            if self.reconfigure_thread is not None:
+                # The running thread applies the latest config once it's done.
+                return
+
+            self.reconfigure_thread = Thread(target=self._reconfigure, name="head tracker reconfiguration")
+            self.reconfigure_thread.start()
+
+    def _reconfigure(self):
+        while True:
+            config = self.config
+
+            try:
+                detector = self._create_detector(config)
+            except Exception as e:
+                print(f"Failed to apply head tracking inference settings: {e}")
+                detector = None
+
+            if detector is not None:
+                with self.detector_lock:
+                    previous_detector = self.detector
+                    self.detector = detector
+
+                previous_detector.close()
+                print("Head tracker reconfigured")
+
+            with self.reconfigure_lock:
+                if self.config == config:
+                    self.reconfigure_thread = None
+                    return
+
+    def detect(self, frame, capture_time: float, frame_id: int = 0):
+        if self.chain is not None:
+            self.chain.submit(frame, capture_time, frame_id)
+            return
+
+        # Results for frames that MediaPipe dropped never arrive, so don't let their entries pile up. The engine keeps
+        # at most two frames in flight, so only entries far behind the newest frame are removed.
+        if len(self.pending_frames) > 8:
+            for timestamp in list(self.pending_frames):
+                if timestamp < self.timestamp - 8:
+                    self.pending_frames.pop(timestamp, None)
+
+        self.pending_frames[self.timestamp] = (capture_time, frame_id, performance.now())
 
-    def detect(self, frame):
         image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
-        self.detector.detect_async(image, self.timestamp)
+
+        with self.detector_lock:
+            self.detector.detect_async(image, self.timestamp)
         self.timestamp += 1
 
     def _process_results(self, detection_results, image, timestamp):
-        state = HeadState(visible=False)
+        start_time = performance.now()
+        capture_time, frame_id, submit_time = self.pending_frames.pop(timestamp, (0.0, 0, 0.0))
+
+        if capture_time > 0.0:
+            performance.stats.head_inference_latency.record(start_time - capture_time)
+
+        if submit_time > 0.0:
+            tracing.record("head inference", frame_id, submit_time, start_time, track="head inference")
+
+        with tracing.span("head result callback", frame_id):
+            self._process_detection_results(detection_results, capture_time, frame_id)
+
+    def _detect_for_video(self, image, timestamp: int):
+        with self.detector_lock:
+            return self.detector.detect_for_video(image, timestamp)
+
+    def _process_detection_results(self, detection_results, capture_time: float, frame_id: int):
+        self.detection_callback(self._reconstruct(detection_results, capture_time, frame_id))
+
+    def _reconstruct(self, detection_results, capture_time: float, frame_id: int):
+        landmarks = None
+        matrix = None
 
         if len(detection_results.face_landmarks) > 0:
-            state.landmarks = detection_results.face_landmarks[0]
+            landmarks = detection_results.face_landmarks[0]
 
         if len(detection_results.facial_transformation_matrixes) > 0:
-            state.visible = True
-
             matrix = detection_results.facial_transformation_matrixes[0]
-            
-            # state.position = Position(matrix[0][3] / 100.0, matrix[1][3] / 100.0, -matrix[2][3] / 100.0)
-            state.position = Position(0.0, 0.0, 0.0)
 
-            x_axis = matrix[0][0:3]
-            x_axis = x_axis / np.linalg.norm(x_axis)
-            y_axis = matrix[1][0:3]
-            y_axis = y_axis / np.linalg.norm(y_axis)
-            z_axis = matrix[2][0:3]
-            z_axis = z_axis / np.linalg.norm(z_axis)
+        if self.recorder is not None:
+            self.recorder.record_head(capture_time, frame_id, landmarks, matrix)
 
-            x = x_axis[0]
-            y = z_axis[1]
-            z = x_axis[2]
+        with tracing.span("head pose reconstruction", frame_id):
+            return reconstruct_head_state(landmarks, matrix, capture_time, frame_id)
 
-            state.pitch = -float(np.rad2deg(np.arcsin(y)))
-            state.yaw = -float(np.rad2deg(np.arctan2(z, x)))
+    def close(self):
+        with self.reconfigure_lock:
+            reconfigure_thread = self.reconfigure_thread
 
-        self.detection_callback(state)
+        if reconfigure_thread is not None:
+            reconfigure_thread.join()
 
-    def close(self):
         self.detector.close()
         print("Head tracker closed")
@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+from threading import Thread, Event
+from queue import Queue, Full, Empty
+from typing import Any, Callable, Optional
+
+import mediapipe as mp
+
+from aethervr import performance
+from aethervr import tracing
+
+
+@dataclass
+class WorkItem:
+    chain: "WorkerChain"
+    frame: Any
+    capture_time: float
+    frame_id: int
+    queued_time: float = 0.0
+    image: Any = None
+    timestamp: int = 0
+    result: Any = None
+    # Set if a stage failed, the remaining stages are skipped.
+    failed: bool = False
+
+
+# A thread that processes the items of a bounded queue in order and hands them on to the next stage. A stage whose
+# queue is full blocks the stage before it, so frames never pile up between stages and the time a frame spends in the
+# pipeline is bounded. Items that fail are handed to the failure stage instead, so that they still leave the pipeline.
+class Stage:
+
+    # How often blocked stages check whether the pipeline is being closed.
+    POLL_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        name: str,
+        process: Callable[[WorkItem], None],
+        stopped: Event,
+        next_stage: Optional["Stage"] = None,
+        failure_stage: Optional["Stage"] = None,
+        max_queued: int = 1,
+    ):
+        self.name = name
+        self.label = name.replace("_", " ")
+        self.process = process
+        self.stopped = stopped
+        self.next_stage = next_stage
+        self.failure_stage = failure_stage
+        self.queue = Queue(max_queued)
+        self.stats = performance.stats.stages[name]
+
+        self.thread = Thread(target=self._run, name=self.label, daemon=True)
+        self.thread.start()
+
+    def put(self, item: WorkItem):
+        item.queued_time = performance.now()
+
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=Stage.POLL_INTERVAL)
+                return
+            except Full:
+                continue
+
+    def join(self):
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                item = self.queue.get(timeout=Stage.POLL_INTERVAL)
+            except Empty:
+                continue
+
+            start_time = performance.now()
+            self.stats.wait_time.record(start_time - item.queued_time)
+
+            try:
+                with tracing.span(self.label, item.frame_id):
+                    self.process(item)
+            except Exception as e:
+                print(f"Error in {self.label} stage: {e}")
+                item.failed = True
+
+                if self.failure_stage is not None:
+                    self.failure_stage.put(item)
+
+                continue
+
+            self.stats.process_time.record(performance.now() - start_time)
+            self.stats.items.increment()
+
+            if self.next_stage is not None:
+                self.next_stage.put(item)
+
+
+# Runs a landmarker in VIDEO mode, frame by frame: the capture thread submits frames, which are converted to MediaPipe
+# images, run through the landmarker, turned into tracking states and then published by the shared publish stage.
+# Frames that fail in any stage are passed to `discard` with their capture time and frame ID instead, so that the
+# tracker's owner can release them.
+class WorkerChain:
+
+    def __init__(
+        self,
+        workers: "InferenceWorkers",
+        name: str,
+        infer: Callable,
+        postprocess: Callable,
+        publish: Callable,
+        discard: Callable[[float, int], None],
+        inference_latency: performance.LatencyHistogram,
+    ):
+        self.infer = infer
+        self.postprocess = postprocess
+        self.publish = publish
+        self.discard = discard
+        self.inference_latency = inference_latency
+        self.last_timestamp = -1
+
+        publish_stage = workers.publish_stage
+
+        self.postprocess_stage = Stage(
+            f"{name}_postprocess",
+            self._postprocess,
+            workers.stopped,
+            publish_stage,
+            publish_stage,
+        )
+
+        self.inference_stage = Stage(
+            f"{name}_inference",
+            self._infer,
+            workers.stopped,
+            self.postprocess_stage,
+            publish_stage,
+        )
+
+        # The engine keeps at most two frames per tracker in flight, so the capture thread never waits here.
+        self.preprocess_stage = Stage(
+            f"{name}_preprocess",
+            self._preprocess,
+            workers.stopped,
+            self.inference_stage,
+            publish_stage,
+            max_queued=2,
+        )
+
+        self.stages = [self.preprocess_stage, self.inference_stage, self.postprocess_stage]
+
+    def submit(self, frame, capture_time: float, frame_id: int):
+        self.preprocess_stage.put(WorkItem(self, frame, capture_time, frame_id))
+
+    def _preprocess(self, item: WorkItem):
+        item.image = mp.Image(image_format=mp.ImageFormat.SRGB, data=item.frame)
+
+        # VIDEO mode needs strictly increasing timestamps in milliseconds. MediaPipe's own smoothing works best with
+        # the real capture times, frames captured within the same millisecond are moved apart.
+        item.timestamp = max(int(item.capture_time * 1000.0), self.last_timestamp + 1)
+        self.last_timestamp = item.timestamp
+
+    def _infer(self, item: WorkItem):
+        item.result = self.infer(item.image, item.timestamp)
+        item.image = None
+
+        if item.capture_time > 0.0:
+            self.inference_latency.record(performance.now() - item.capture_time)
+
+    def _postprocess(self, item: WorkItem):
+        item.result = self.postprocess(item.result, item.capture_time, item.frame_id)
+
+
+# Alternative to MediaPipe's LIVE_STREAM mode, where frames are processed on MediaPipe's internal threads and dropped
+# when they're busy. Here, each tracker gets its own chain of worker threads with bounded queues (capture, preprocess,
+# inference, postprocess) and the results of all trackers are published from a single thread, in the order in which
+# they're finished. Each stage records its throughput and timing in `performance.stats.stages`.
+class InferenceWorkers:
+
+    def __init__(self):
+        self.stopped = Event()
+        self.publish_stage = Stage("publish", self._publish, self.stopped, max_queued=2)
+        self.chains: list[WorkerChain] = []
+
+        print("Inference workers started")
+
+    def create_chain(
+        self,
+        name: str,
+        infer: Callable,
+        postprocess: Callable,
+        publish: Callable,
+        discard: Callable[[float, int], None],
+        inference_latency: performance.LatencyHistogram,
+    ) -> WorkerChain:
+        chain = WorkerChain(self, name, infer, postprocess, publish, discard, inference_latency)
+        self.chains.append(chain)
+        return chain
+
+    def close(self):
+        self.stopped.set()
+
+        for chain in self.chains:
+            for stage in chain.stages:
+                stage.join()
+
+        self.publish_stage.join()
+        print("Inference workers closed")
+
+    def _publish(self, item: WorkItem):
+        if item.failed:
+            item.chain.discard(item.capture_time, item.frame_id)
+        else:
+            item.chain.publish(item.result)
@@ -28,14 +28,18 @@ class ControllerButton(Enum):
 class ControllerState:
     position: Position = field(default_factory=lambda: Position(0.0, 0.0, 0.0))
     orientation: Orientation = field(default_factory=lambda: Orientation(0.0, 0.0, 0.0, 1.0))
-    buttons: dict[ControllerButton, bool] = field(
-        default_factory=lambda: {button: False for button in ControllerButton}
-    )
+    buttons: int = 0
     jostick_center: Optional[Position] = None
     thumbstick_x: float = 0.0
     thumbstick_y: float = 0.0
     timestamp: int = 0
 
+    def press(self, button: ControllerButton):
+        self.buttons |= 1 << button.value
+
+    def is_pressed(self, button: ControllerButton) -> bool:
+        return (self.buttons & (1 << button.value)) != 0
+
 
 @dataclass
 class InputState:
@@ -0,0 +1,134 @@
+from typing import Optional
+import socket
+import struct
+import json
+
+import numpy as np
+
+from aethervr.tracking_state import TrackingState, HeadState, HandState, Gesture
+from aethervr.landmark_recording import Landmark
+
+
+# The tracking daemon and attached GUI clients talk over a local TCP connection. Each message is a little-endian u32
+# header length, a u32 payload length, a JSON header with a "type" key and an optional binary payload (preview
+# pixels, overlay landmarks), so frames don't have to be encoded as JSON.
+CONTROL_PORT = 38058
+ATTACH_ARGUMENT = "--attach"
+
+LENGTHS = struct.Struct("<II")
+
+
+def send_message(stream: socket.socket, header: dict, payload: bytes = b""):
+    header_data = json.dumps(header).encode("utf-8")
+    stream.sendall(LENGTHS.pack(len(header_data), len(payload)) + header_data + payload)
+
+
+# Returns `None` once the other side closed the connection.
+def receive_message(stream: socket.socket) -> Optional[tuple[dict, bytes]]:
+    lengths = _receive_exactly(stream, LENGTHS.size)
+
+    if lengths is None:
+        return None
+
+    header_length, payload_length = LENGTHS.unpack(lengths)
+    header_data = _receive_exactly(stream, header_length)
+    payload = _receive_exactly(stream, payload_length)
+
+    if header_data is None or payload is None:
+        return None
+
+    return json.loads(header_data), payload
+
+
+# Only the image coordinates of the landmarks are sent, that's all the camera view draws.
+def encode_overlay(tracking_state: TrackingState, filter_latency: float) -> tuple[dict, bytes]:
+    head = tracking_state.head
+    head_visible = head.visible and head.landmarks is not None
+    arrays = []
+
+    if head_visible:
+        arrays.append(_to_points(head.landmarks))
+
+    hands = []
+
+    for hand in (tracking_state.left_hand, tracking_state.right_hand):
+        hands.append({
+            "visible": hand.visible,
+            "gesture": hand.gesture.name if hand.gesture is not None else None,
+            "landmark_count": len(hand.landmarks) if hand.visible else 0,
+        })
+
+        if hand.visible:
+            arrays.append(_to_points(hand.landmarks))
+
+    header = {
+        "type": "overlay",
+        "head_visible": head_visible,
+        "head_landmark_count": len(head.landmarks) if head_visible else 0,
+        "hands": hands,
+        "filter_latency": filter_latency,
+    }
+
+    payload = np.concatenate(arrays).tobytes() if arrays else b""
+    return header, payload
+
+
+def decode_overlay(header: dict, payload: bytes) -> TrackingState:
+    points = np.frombuffer(payload, dtype="<f4").reshape(-1, 2).tolist()
+    state = TrackingState()
+    offset = 0
+
+    if header["head_visible"]:
+        count = header["head_landmark_count"]
+        state.head = HeadState(visible=True, landmarks=[Landmark(x, y, 0.0) for x, y in points[offset:offset + count]])
+        offset += count
+
+    hand_states = []
+
+    for hand in header["hands"]:
+        hand_state = HandState(visible=hand["visible"])
+
+        if hand["gesture"] is not None:
+            hand_state.gesture = Gesture[hand["gesture"]]
+
+        if hand["visible"]:
+            count = hand["landmark_count"]
+            hand_state.landmarks = [Landmark(x, y, 0.0) for x, y in points[offset:offset + count]]
+            offset += count
+
+        hand_states.append(hand_state)
+
+    state.left_hand, state.right_hand = hand_states
+    return state
+
+
+def encode_frame(frame: np.ndarray, max_width: int) -> tuple[dict, bytes]:
+    # Plain subsampling is good enough for a preview and costs next to nothing on the daemon side.
+    height, width, _ = frame.shape
+    step = -(-width // max_width)
+    preview = np.ascontiguousarray(frame[::step, ::step])
+    preview_height, preview_width, _ = preview.shape
+
+    return {"type": "frame", "width": preview_width, "height": preview_height}, preview.tobytes()
+
+
+def decode_frame(header: dict, payload: bytes) -> np.ndarray:
+    return np.frombuffer(payload, dtype=np.uint8).reshape(header["height"], header["width"], 3)
+
+
+def _to_points(landmarks) -> np.ndarray:
+    return np.array([(landmark.x, landmark.y) for landmark in landmarks], dtype="<f4")
+
+
+def _receive_exactly(stream: socket.socket, size: int) -> Optional[bytes]:
+    data = bytearray()
+
+    while len(data) < size:
+        chunk = stream.recv(size - len(data))
+
+        if len(chunk) == 0:
+            return None
+
+        data += chunk
+
+    return bytes(data)
@@ -0,0 +1,195 @@
+from collections import namedtuple
+from threading import Lock
+from typing import Optional
+import struct
+import json
+import sys
+
+import numpy as np
+
+
+# Landmark recordings store the landmarker output (before pose reconstruction) so that it can be replayed without
+# MediaPipe. The file starts with a magic number followed by chunks. Each chunk holds up to CHUNK_ROWS rows of either
+# the head or the hand table in columnar form: a little-endian u32 header length, a JSON header describing the columns
+# and then the raw data of each column. Columns can be loaded with `np.frombuffer` without any parsing.
+MAGIC = b"AVRLMK01"
+CHUNK_ROWS = 256
+RECORD_ARGUMENT = "--record-landmarks"
+
+FACE_LANDMARK_COUNT = 478
+HAND_LANDMARK_COUNT = 21
+MAX_HANDS = 2
+
+HEAD_COLUMNS = [
+    # Capture time in seconds relative to the start of the recording.
+    ("time", "<f8", ()),
+    ("frame_id", "<i8", ()),
+    ("num_landmarks", "<u2", ()),
+    ("landmarks", "<f4", (FACE_LANDMARK_COUNT, 3)),
+    ("has_matrix", "u1", ()),
+    ("matrix", "<f4", (4, 4)),
+]
+
+HAND_COLUMNS = [
+    ("time", "<f8", ()),
+    ("frame_id", "<i8", ()),
+    # Wall clock time in nanoseconds, used by the pose filters.
+    ("timestamp", "<i8", ()),
+    ("num_hands", "u1", ()),
+    ("landmarks", "<f4", (MAX_HANDS, HAND_LANDMARK_COUNT, 3)),
+    ("world_landmarks", "<f4", (MAX_HANDS, HAND_LANDMARK_COUNT, 3)),
+]
+
+TABLE_COLUMNS = {"head": HEAD_COLUMNS, "hand": HAND_COLUMNS}
+
+Landmark = namedtuple("Landmark", ["x", "y", "z"])
+
+
+class LandmarkRecorder:
+
+    def __init__(self, path: str, start_time: float):
+        self.path = path
+        self.start_time = start_time
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.file_lock = Lock()
+
+        # Each table is only appended to by one tracker thread. Only writing chunks to the file has to be synchronized.
+        self.rows = {"head": [], "hand": []}
+        self.num_rows = {"head": 0, "hand": 0}
+
+        print(f"Recording landmarks to {path}")
+
+    def record_head(self, capture_time: float, frame_id: int, landmarks, matrix):
+        points = np.zeros((FACE_LANDMARK_COUNT, 3), dtype=np.float32)
+        num_landmarks = 0
+
+        if landmarks is not None:
+            num_landmarks = min(len(landmarks), FACE_LANDMARK_COUNT)
+            points[:num_landmarks] = _to_array(landmarks[:num_landmarks])
+
+        has_matrix = matrix is not None
+        matrix = np.asarray(matrix, dtype=np.float32) if has_matrix else np.zeros((4, 4), dtype=np.float32)
+
+        row = (capture_time - self.start_time, frame_id, num_landmarks, points, has_matrix, matrix)
+        self._append("head", row)
+
+    def record_hands(self, capture_time: float, frame_id: int, timestamp: int, hand_landmarks, hand_world_landmarks):
+        num_hands = min(len(hand_landmarks), MAX_HANDS)
+        points = np.zeros((MAX_HANDS, HAND_LANDMARK_COUNT, 3), dtype=np.float32)
+        world_points = np.zeros((MAX_HANDS, HAND_LANDMARK_COUNT, 3), dtype=np.float32)
+
+        for i in range(num_hands):
+            points[i] = _to_array(hand_landmarks[i])
+            world_points[i] = _to_array(hand_world_landmarks[i])
+
+        row = (capture_time - self.start_time, frame_id, timestamp, num_hands, points, world_points)
+        self._append("hand", row)
+
+    def close(self):
+        with self.file_lock:
+            for table in self.rows:
+                self._write_chunk(table, self.rows[table])
+                self.rows[table] = []
+
+            self.file.close()
+
+        print(f"Recorded {self.num_rows['head']} head and {self.num_rows['hand']} hand results to {self.path}")
+
+    def _append(self, table: str, row):
+        rows = self.rows[table]
+        rows.append(row)
+
+        if len(rows) >= CHUNK_ROWS:
+            self.rows[table] = []
+
+            with self.file_lock:
+                if not self.file.closed:
+                    self._write_chunk(table, rows)
+
+    def _write_chunk(self, table: str, rows):
+        if not rows:
+            return
+
+        columns = TABLE_COLUMNS[table]
+        header = {
+            "table": table,
+            "rows": len(rows),
+            "columns": [[name, dtype, list(shape)] for name, dtype, shape in columns],
+        }
+
+        header_data = json.dumps(header).encode("utf-8")
+        self.file.write(struct.pack("<I", len(header_data)))
+        self.file.write(header_data)
+
+        for i, (name, dtype, shape) in enumerate(columns):
+            column = np.array([row[i] for row in rows], dtype=dtype).reshape((len(rows),) + shape)
+            self.file.write(column.tobytes())
+
+        self.num_rows[table] += len(rows)
+
+
+def read_recording(path: str) -> dict[str, dict[str, np.ndarray]]:
+    with open(path, "rb") as file:
+        data = file.read()
+
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a landmark recording")
+
+    chunks = {"head": [], "hand": []}
+    offset = len(MAGIC)
+
+    while offset < len(data):
+        header_length = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        header = json.loads(data[offset:offset + header_length])
+        offset += header_length
+
+        num_rows = header["rows"]
+        chunk = {}
+
+        for name, dtype, shape in header["columns"]:
+            dtype = np.dtype(dtype)
+            count = num_rows * int(np.prod(shape, dtype=np.int64))
+            chunk[name] = np.frombuffer(data, dtype, count, offset).reshape([num_rows] + shape)
+            offset += count * dtype.itemsize
+
+        chunks[header["table"]].append(chunk)
+
+    # Chunks of a table are concatenated into one array per column.
+    recording = {}
+
+    for table, columns in TABLE_COLUMNS.items():
+        if chunks[table]:
+            recording[table] = {
+                name: np.concatenate([chunk[name] for chunk in chunks[table]])
+                for name, _, _ in columns
+            }
+        else:
+            recording[table] = {
+                name: np.zeros((0,) + shape, dtype=dtype)
+                for name, dtype, shape in columns
+            }
+
+    return recording
+
+
+def to_landmarks(points: np.ndarray) -> list[Landmark]:
+    return [Landmark(x, y, z) for x, y, z in points.tolist()]
+
+
+def get_recording_path() -> Optional[str]:
+    if RECORD_ARGUMENT not in sys.argv:
+        return None
+
+    index = sys.argv.index(RECORD_ARGUMENT)
+
+    if index + 1 >= len(sys.argv):
+        print(f"Missing file name after {RECORD_ARGUMENT}")
+        return None
+
+    return sys.argv[index + 1]
+
+
+def _to_array(landmarks) -> np.ndarray:
+    return np.array([(landmark.x, landmark.y, landmark.z) for landmark in landmarks], dtype=np.float32)
@@ -1,59 +1,242 @@
-import sys
-from urllib.request import urlretrieve
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
 from pathlib import Path
-from threading import Thread
+from threading import Thread, Lock
+from typing import Optional
+import hashlib
+import shutil
+import sys
+import os
 
 
 MODELS_DIR_NAME = "mp_models"
 FACE_LANDMARKER_FILE_NAME = "face_landmarker.task"
 HAND_LANDMARKER_FILE_NAME = "hand_landmarker.task"
 
+# Versioned URLs rather than "latest", so that the files behind them never change.
 BASE_URL = "https://storage.googleapis.com/mediapipe-models"
-FACE_LANDMARKER_URL = f"{BASE_URL}/face_landmarker/face_landmarker/float16/latest/face_landmarker.task"
-HAND_LANDMARKER_URL = f"{BASE_URL}/hand_landmarker/hand_landmarker/float16/latest/hand_landmarker.task"
+FACE_LANDMARKER_URL = f"{BASE_URL}/face_landmarker/face_landmarker/float16/1/face_landmarker.task"
+HAND_LANDMARKER_URL = f"{BASE_URL}/hand_landmarker/hand_landmarker/float16/1/hand_landmarker.task"
+
+# SHA-256 of the pinned model versions, every download and copy is checked against them. A mirror can override them
+# with a `.sha256` file next to each model, e.g. to serve other model versions.
+FACE_LANDMARKER_SHA256 = None
+HAND_LANDMARKER_SHA256 = None
+
+# Set this to a base URL or a local directory that contains the model files to download them from somewhere else.
+MIRROR_ENV_VAR = "AETHERVR_MODEL_MIRROR"
+
+PART_FILE_SUFFIX = ".part"
+CHECKSUM_FILE_SUFFIX = ".sha256"
+# Stores the ETag of the file that a part file belongs to, so that it's only resumed if the file didn't change.
+VALIDATOR_FILE_SUFFIX = ".etag"
+CHUNK_SIZE = 65536
+DOWNLOAD_TIMEOUT = 30.0
 
 MODELS = [
-    (FACE_LANDMARKER_FILE_NAME, FACE_LANDMARKER_URL),
-    (HAND_LANDMARKER_FILE_NAME, HAND_LANDMARKER_URL),
+    (FACE_LANDMARKER_FILE_NAME, FACE_LANDMARKER_URL, FACE_LANDMARKER_SHA256),
+    (HAND_LANDMARKER_FILE_NAME, HAND_LANDMARKER_URL, HAND_LANDMARKER_SHA256),
 ]
 
+model_buffers = {}
+model_buffers_lock = Lock()
+
 
 def are_all_models_cached():
-    for file_name, _ in MODELS:
+    for file_name, _, _ in MODELS:
         if not get_model_path(file_name).exists():
             return False
 
     return True
 
 
-def download(on_done, on_error):
-    thread = Thread(target=lambda: download_sync(on_done, on_error))
+def download(on_done, on_error, mirror=None):
+    thread = Thread(target=lambda: download_sync(on_done, on_error, mirror))
     thread.start()
 
 
-def download_sync(on_done, on_error):
+def download_sync(on_done, on_error, mirror=None):
+    if mirror is None:
+        mirror = os.environ.get(MIRROR_ENV_VAR)
+
     try:
-        for file_name, url in MODELS:
-            file_path = get_model_path(file_name)
-            models_dir = file_path.parent
+        models_dir = get_models_dir()
+
+        if not models_dir.is_dir():
+            models_dir.mkdir()
 
-            if file_path.is_file():
-                return file_path
+        missing_models = [model for model in MODELS if not get_model_path(model[0]).is_file()]
 
-            if not models_dir.is_dir():
-                models_dir.mkdir()
+        with ThreadPoolExecutor(max_workers=len(MODELS)) as executor:
+            futures = [
+                executor.submit(fetch_model, file_name, url, sha256, mirror)
+                for file_name, url, sha256 in missing_models
+            ]
 
-            print(f"Downloading {file_path}...")
-            print(f"  URL: {url}")
-            print(f"  File path: {file_path}")
+            for future in futures:
+                future.result()
 
-            urlretrieve(url, file_path)
-    
         on_done()
     except Exception as e:
         on_error(repr(e))
 
 
+def fetch_model(file_name, url, sha256, mirror):
+    file_path = get_model_path(file_name)
+    part_path = file_path.with_name(file_name + PART_FILE_SUFFIX)
+    validator_path = get_validator_path(part_path)
+
+    if mirror is not None and Path(mirror).is_dir():
+        source_path = Path(mirror) / file_name
+
+        print(f"Copying {file_path}...")
+        print(f"  Source: {source_path}")
+
+        shutil.copyfile(source_path, part_path)
+        expected_size = None
+        expected_sha256 = read_local_checksum(source_path) or sha256
+    else:
+        if mirror is not None:
+            url = f"{mirror.rstrip('/')}/{file_name}"
+
+        print(f"Downloading {file_path}...")
+        print(f"  URL: {url}")
+        print(f"  File path: {file_path}")
+
+        expected_size = download_resumable(url, part_path)
+        expected_sha256 = (fetch_checksum(url) if mirror is not None else None) or sha256
+
+    verify_model_file(part_path, expected_size, expected_sha256)
+
+    # The model only appears under its final name once it is complete, so a cancelled download is never mistaken
+    # for a cached model.
+    os.replace(part_path, file_path)
+    validator_path.unlink(missing_ok=True)
+
+    with model_buffers_lock:
+        model_buffers.pop(file_name, None)
+
+    print(f"Downloaded {file_path}")
+
+
+# Returns the expected size of the file, if the server reports it.
+def download_resumable(url, part_path) -> Optional[int]:
+    validator_path = get_validator_path(part_path)
+    offset = part_path.stat().st_size if part_path.is_file() else 0
+    validator = validator_path.read_text("utf-8").strip() if validator_path.is_file() else None
+
+    request = Request(url)
+
+    # With If-Range, the server sends the whole file instead of the rest if it changed since the part was downloaded,
+    # so parts of two different files are never joined. Parts without a validator can't be checked and start over.
+    if offset > 0 and validator:
+        request.add_header("Range", f"bytes={offset}-")
+        request.add_header("If-Range", validator)
+    else:
+        offset = 0
+
+    try:
+        response = urlopen(request, timeout=DOWNLOAD_TIMEOUT)
+    except HTTPError as e:
+        # The part file is at least as long as the file on the server, so the download starts over.
+        if e.code == 416 and offset > 0:
+            part_path.unlink()
+            validator_path.unlink(missing_ok=True)
+            return download_resumable(url, part_path)
+
+        raise
+
+    with response:
+        if response.status != 206:
+            # The file changed or the server doesn't support ranges, so start over.
+            offset = 0
+            etag = response.headers.get("ETag")
+
+            # Weak ETags can't be used with If-Range.
+            if etag is not None and not etag.startswith("W/"):
+                validator_path.write_text(etag, "utf-8")
+            else:
+                validator_path.unlink(missing_ok=True)
+
+        content_length = response.headers.get("Content-Length")
+        expected_size = offset + int(content_length) if content_length is not None else None
+
+        with open(part_path, "ab" if offset > 0 else "wb") as file:
+            shutil.copyfileobj(response, file, CHUNK_SIZE)
+
+    return expected_size
+
+
+def fetch_checksum(url) -> Optional[str]:
+    try:
+        with urlopen(url + CHECKSUM_FILE_SUFFIX, timeout=DOWNLOAD_TIMEOUT) as response:
+            return parse_checksum(response.read().decode("utf-8"))
+    except HTTPError as e:
+        if e.code == 404:
+            return None
+
+        raise
+
+
+def read_local_checksum(source_path) -> Optional[str]:
+    checksum_path = source_path.with_name(source_path.name + CHECKSUM_FILE_SUFFIX)
+
+    if not checksum_path.is_file():
+        return None
+
+    return parse_checksum(checksum_path.read_text("utf-8"))
+
+
+def parse_checksum(text) -> str:
+    # Accepts both a bare hash and the `sha256sum` output format.
+    return text.split()[0].lower()
+
+
+def verify_model_file(path, expected_size, expected_sha256):
+    if expected_size is not None and path.stat().st_size != expected_size:
+        # Keep the partial file so that the next attempt can resume.
+        raise IOError(f"Download of {path.name} is incomplete ({path.stat().st_size} of {expected_size} bytes)")
+
+    if expected_sha256 is None:
+        discard_part_file(path)
+        raise IOError(f"No SHA-256 checksum is pinned for {path.name}")
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    if digest.hexdigest() != expected_sha256.lower():
+        discard_part_file(path)
+        raise IOError(f"Checksum mismatch for {path.name}")
+
+
+def discard_part_file(path):
+    path.unlink()
+    get_validator_path(path).unlink(missing_ok=True)
+
+
+def get_validator_path(part_path):
+    return part_path.with_name(part_path.name + VALIDATOR_FILE_SUFFIX)
+
+
+def get_model_buffer(file_name) -> bytes:
+    # Model files are read once per process and kept in memory, so recreating a tracker doesn't touch the disk.
+    with model_buffers_lock:
+        buffer = model_buffers.get(file_name)
+
+        if buffer is None:
+            buffer = get_model_path(file_name).read_bytes()
+            model_buffers[file_name] = buffer
+
+        return buffer
+
+
 def get_model_path(file_name):
-    models_dir = Path(sys.argv[0]).parent / MODELS_DIR_NAME
-    return models_dir / file_name
+    return get_models_dir() / file_name
+
+
+def get_models_dir():
+    return Path(sys.argv[0]).parent / MODELS_DIR_NAME
@@ -0,0 +1,195 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Event
+import json
+import time
+import os
+
+from aethervr.config import MetricsConfig
+from aethervr import performance
+
+
+PREFIX = "aethervr_"
+
+
+# Publishes the performance stats for monitoring, either through an HTTP endpoint in the Prometheus text format or
+# by periodically writing a JSON snapshot. Both are disabled by default.
+class MetricsExporter:
+
+    def __init__(self, config: MetricsConfig):
+        self.config = config
+        self.server = None
+        self.server_thread = None
+        self.snapshot_thread = None
+        self.stopped = Event()
+
+        if config.port != 0:
+            self._start_server()
+
+        if config.snapshot_path:
+            self.snapshot_thread = Thread(target=self._write_snapshots, daemon=True)
+            self.snapshot_thread.start()
+
+        # Stats are only recorded while something actually publishes them, e.g. not if the port is taken.
+        self.acquired = self.server is not None or self.snapshot_thread is not None
+
+        if self.acquired:
+            performance.stats.acquire()
+
+    def close(self):
+        self.stopped.set()
+
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server_thread.join()
+
+        if self.snapshot_thread is not None:
+            self.snapshot_thread.join()
+
+        if self.acquired:
+            self.acquired = False
+            performance.stats.release()
+
+    def _start_server(self):
+        class RequestHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = format_prometheus(performance.stats).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        # Only reachable from this machine.
+        try:
+            self.server = ThreadingHTTPServer(("127.0.0.1", self.config.port), RequestHandler)
+        except OSError as e:
+            print(f"Failed to start metrics endpoint on port {self.config.port}: {e}")
+            return
+
+        self.server_thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+
+        print(f"Serving metrics on http://127.0.0.1:{self.config.port}/metrics")
+
+    def _write_snapshots(self):
+        path = self.config.snapshot_path
+        interval = max(self.config.snapshot_interval, 1.0)
+        previous = create_snapshot(performance.stats)
+
+        while not self.stopped.wait(interval):
+            snapshot = create_snapshot(performance.stats)
+            snapshot["rates"] = compute_rates(snapshot, previous)
+            previous = snapshot
+
+            # Readers never see a half-written file.
+            try:
+                with open(path + ".tmp", "w") as file:
+                    json.dump(snapshot, file, indent=2)
+
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                print(f"Failed to write metrics snapshot: {e}")
+
+
+def format_prometheus(stats: performance.PerformanceStats) -> str:
+    lines = []
+
+    for metric in stats.get_metrics():
+        if isinstance(metric, performance.Counter):
+            name = f"{PREFIX}{metric.name}_total"
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {metric.value}")
+        elif isinstance(metric, performance.Gauge):
+            name = f"{PREFIX}{metric.name}"
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {metric.value}")
+        else:
+            # Prometheus expects seconds and cumulative buckets.
+            histogram = metric.snapshot()
+            name = f"{PREFIX}{metric.name}_seconds"
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} histogram")
+
+            accumulated = 0
+
+            for bound, count in zip(performance.LATENCY_BUCKETS, histogram.counts):
+                accumulated += count
+                lines.append(f'{name}_bucket{{le="{bound / 1000.0}"}} {accumulated}')
+
+            lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum {histogram.total / 1000.0}")
+            lines.append(f"{name}_count {histogram.count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def create_snapshot(stats: performance.PerformanceStats) -> dict:
+    counters = {}
+    gauges = {}
+    histograms = {}
+
+    for metric in stats.get_metrics():
+        if isinstance(metric, performance.Counter):
+            counters[metric.name] = metric.value
+        elif isinstance(metric, performance.Gauge):
+            gauges[metric.name] = metric.value
+        else:
+            histogram = metric.snapshot()
+
+            histograms[metric.name] = {
+                "buckets_ms": list(performance.LATENCY_BUCKETS),
+                "counts": histogram.counts,
+                "count": histogram.count,
+                "total_ms": histogram.total,
+                "mean_ms": histogram.mean(),
+                "p50_ms": _finite_or_none(histogram.percentile(0.5)),
+                "p95_ms": _finite_or_none(histogram.percentile(0.95)),
+                "p99_ms": _finite_or_none(histogram.percentile(0.99)),
+            }
+
+    return {
+        "time": time.time(),
+        "monotonic_time": performance.now(),
+        "counters": counters,
+        "gauges": gauges,
+        "histograms": histograms,
+    }
+
+
+def compute_rates(snapshot: dict, previous: dict) -> dict:
+    elapsed = max(snapshot["monotonic_time"] - previous["monotonic_time"], 1e-6)
+
+    return {
+        f"{name}_per_second": (value - previous["counters"].get(name, 0)) / elapsed
+        for name, value in snapshot["counters"].items()
+    }
+
+
+# Attached GUI clients show the numbers of the tracking daemon by copying its snapshots into their own stats.
+def apply_snapshot(stats: performance.PerformanceStats, snapshot: dict):
+    for metric in stats.get_metrics():
+        if isinstance(metric, performance.Counter):
+            metric.value = snapshot["counters"].get(metric.name, metric.value)
+        elif isinstance(metric, performance.Gauge):
+            metric.value = snapshot["gauges"].get(metric.name, metric.value)
+        elif metric.name in snapshot["histograms"]:
+            histogram = snapshot["histograms"][metric.name]
+            metric.counts = list(histogram["counts"])
+            metric.count = histogram["count"]
+            metric.total = histogram["total_ms"]
+
+
+def _finite_or_none(value: float):
+    # JSON has no infinity.
+    return value if value != float("inf") else None
@@ -0,0 +1,118 @@
+import math
+
+import numpy as np
+
+from aethervr.tracking_state import TrackingState
+
+
+THUMBNAIL_WIDTH = 64
+
+
+# Luma image of about 64 pixels width. The frame is subsampled before it's shrunk with area averaging, so each
+# thumbnail pixel is still the average of a few dozen camera pixels, which evens out sensor noise.
+def create_thumbnail(frame: np.ndarray) -> np.ndarray:
+    import cv2
+
+    height, width, _ = frame.shape
+    step = max(width // (THUMBNAIL_WIDTH * 4), 1)
+    luma = cv2.cvtColor(frame[::step, ::step], cv2.COLOR_RGB2GRAY)
+    thumbnail_height = max(round(THUMBNAIL_WIDTH * height / width), 1)
+    return cv2.resize(luma, (THUMBNAIL_WIDTH, thumbnail_height), interpolation=cv2.INTER_AREA)
+
+
+# Landmarks of the areas that have to be watched for head tracking. `None` if the head isn't tracked, as it could
+# then appear anywhere in the frame.
+def get_head_landmarks(tracking_state: TrackingState):
+    head = tracking_state.head
+
+    if not head.visible or head.landmarks is None:
+        return None
+
+    return [head.landmarks]
+
+
+# A hand that isn't tracked could appear anywhere, so both hands have to be tracked to limit the watched areas.
+def get_hand_landmarks(tracking_state: TrackingState):
+    hands = (tracking_state.left_hand, tracking_state.right_hand)
+
+    if not all(hand.visible and hand.landmarks is not None for hand in hands):
+        return None
+
+    return [hand.landmarks for hand in hands]
+
+
+# Decides whether a tracker has to run on a frame. The thumbnail of the frame is compared with the thumbnail of the
+# frame the tracker last ran on, but only around the landmarks that were found, so that movement elsewhere in the room
+# doesn't count. Comparing with the last tracked frame rather than the previous one also catches slow drift.
+class MotionGate:
+
+    # Luma difference of a thumbnail pixel that counts as a change, and the number of changed pixels that count as
+    # movement.
+    PIXEL_THRESHOLD = 12
+    MIN_CHANGED_PIXELS = 2
+    # Added around the bounding box of the landmarks, relative to its size.
+    ROI_MARGIN = 0.25
+    # The tracker runs at least this often, so that lost tracking and changes below the threshold are picked up.
+    REFRESH_INTERVAL = 0.5
+
+    def __init__(self):
+        self.reference = None
+        self.last_run_time = 0.0
+        # The bounding box is only computed once per set of landmarks.
+        self.roi_landmarks = None
+        self.rois = []
+
+    def reset(self):
+        self.reference = None
+        self.roi_landmarks = None
+        self.rois = []
+
+    def has_moved(self, thumbnail: np.ndarray, landmark_sets, now: float) -> bool:
+        if self.reference is None or self.reference.shape != thumbnail.shape:
+            return True
+
+        if now - self.last_run_time >= MotionGate.REFRESH_INTERVAL:
+            return True
+
+        if landmark_sets is None:
+            return self._has_region_moved(thumbnail, slice(None), slice(None))
+
+        for rows, columns in self._get_rois(landmark_sets, thumbnail.shape):
+            if self._has_region_moved(thumbnail, rows, columns):
+                return True
+
+        return False
+
+    def mark_run(self, thumbnail: np.ndarray, now: float):
+        self.reference = thumbnail
+        self.last_run_time = now
+
+    def _has_region_moved(self, thumbnail: np.ndarray, rows: slice, columns: slice) -> bool:
+        import cv2
+
+        difference = cv2.absdiff(thumbnail[rows, columns], self.reference[rows, columns])
+        return np.count_nonzero(difference > MotionGate.PIXEL_THRESHOLD) >= MotionGate.MIN_CHANGED_PIXELS
+
+    def _get_rois(self, landmark_sets, shape) -> list[tuple[slice, slice]]:
+        if self.roi_landmarks is not None and len(landmark_sets) == len(self.roi_landmarks) and all(
+            landmarks is roi_landmarks for landmarks, roi_landmarks in zip(landmark_sets, self.roi_landmarks)
+        ):
+            return self.rois
+
+        height, width = shape
+        self.rois = []
+
+        for landmarks in landmark_sets:
+            xs = [landmark.x for landmark in landmarks]
+            ys = [landmark.y for landmark in landmarks]
+            margin_x = (max(xs) - min(xs)) * MotionGate.ROI_MARGIN
+            margin_y = (max(ys) - min(ys)) * MotionGate.ROI_MARGIN
+
+            left = min(max(math.floor((min(xs) - margin_x) * width), 0), width - 1)
+            right = max(min(math.ceil((max(xs) + margin_x) * width), width), left + 1)
+            top = min(max(math.floor((min(ys) - margin_y) * height), 0), height - 1)
+            bottom = max(min(math.ceil((max(ys) + margin_y) * height), height), top + 1)
+            self.rois.append((slice(top, bottom), slice(left, right)))
+
+        self.roi_landmarks = list(landmark_sets)
+        return self.rois
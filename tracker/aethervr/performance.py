@@ -0,0 +1,169 @@
+from bisect import bisect_left
+from threading import Lock
+import time
+
+
+# Upper bounds of the latency histogram buckets in milliseconds. The last bucket catches everything above.
+LATENCY_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0)
+
+# Stages of the inference worker pipeline (see `inference_workers`).
+WORKER_STAGES = (
+    "head_preprocess",
+    "head_inference",
+    "head_postprocess",
+    "hand_preprocess",
+    "hand_inference",
+    "hand_postprocess",
+    "publish",
+)
+
+
+# Counters and histograms are cumulative and each of them is only written by a single thread (capture thread,
+# MediaPipe result threads, runtime connection thread), so recording doesn't need any locks. Readers compute
+# rates and windowed histograms by comparing two snapshots.
+class Counter:
+
+    def __init__(self, name: str = "", description: str = ""):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def increment(self):
+        if stats.enabled:
+            self.value += 1
+
+
+# Gauges are always written because setting them is as cheap as checking whether recording is enabled.
+class Gauge:
+
+    def __init__(self, name: str = "", description: str = ""):
+        self.name = name
+        self.description = description
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class LatencyHistogram:
+
+    def __init__(self, name: str = "", description: str = ""):
+        self.name = name
+        self.description = description
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        if not stats.enabled:
+            return
+
+        milliseconds = seconds * 1000.0
+        self.counts[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+
+    def snapshot(self) -> "LatencyHistogram":
+        snapshot = LatencyHistogram(self.name, self.description)
+        snapshot.counts = list(self.counts)
+        snapshot.count = self.count
+        snapshot.total = self.total
+        return snapshot
+
+    def difference(self, previous: "LatencyHistogram") -> "LatencyHistogram":
+        difference = LatencyHistogram(self.name, self.description)
+        difference.counts = [a - b for a, b in zip(self.counts, previous.counts)]
+        difference.count = self.count - previous.count
+        difference.total = self.total - previous.total
+        return difference
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        # Returns the upper bound of the bucket that contains the percentile.
+        target = fraction * self.count
+        accumulated = 0
+
+        for i, count in enumerate(self.counts):
+            accumulated += count
+
+            if count > 0 and accumulated >= target:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+
+        return 0.0
+
+
+# Written by the thread of the stage only: throughput is the item rate, the load is the processing time per second.
+class StageStats:
+
+    def __init__(self, name: str):
+        label = name.replace("_", " ")
+        self.items = Counter(f"{name}_items", f"Items processed by the {label} stage")
+        self.process_time = LatencyHistogram(f"{name}_time", f"Time the {label} stage spends per item")
+        self.wait_time = LatencyHistogram(f"{name}_wait", f"Time items wait in the queue of the {label} stage")
+
+    def get_metrics(self) -> list:
+        return [self.items, self.process_time, self.wait_time]
+
+
+class PerformanceStats:
+
+    def __init__(self):
+        # Recording is only enabled while somebody looks at the numbers (the performance tab or the metrics exporter).
+        self.enabled = False
+        self.num_readers = 0
+        self.readers_lock = Lock()
+
+        self.captured_frames = Counter("captured_frames", "Camera frames captured")
+        self.dropped_head_frames = Counter("dropped_head_frames", "Frames skipped because head tracking was busy")
+        self.dropped_hand_frames = Counter("dropped_hand_frames", "Frames skipped because hand tracking was busy")
+        self.skipped_head_frames = Counter("skipped_head_frames", "Frames not head tracked because nothing moved")
+        self.skipped_hand_frames = Counter("skipped_hand_frames", "Frames not hand tracked because nothing moved")
+        self.head_inference_latency = LatencyHistogram("head_inference_latency", "Time from capture to head result")
+        self.hand_inference_latency = LatencyHistogram("hand_inference_latency", "Time from capture to hand result")
+        self.runtime_polls = Counter("runtime_polls", "Tracking state requests answered")
+        self.poll_response_time = LatencyHistogram("poll_response_time", "Time to answer a tracking state request")
+        self.capture_to_send_latency = LatencyHistogram(
+            "capture_to_send_latency",
+            "Time from capture to sending the controller state",
+        )
+        self.fused_updates = Counter("fused_updates", "Head and hand results of the same frame published together")
+        self.fusion_timeouts = Counter(
+            "fusion_timeouts",
+            "Results published alone because the other tracker's result of the same frame was late",
+        )
+        self.runtime_connections = Counter("runtime_connections", "Connections accepted from the OpenXR runtime")
+        self.runtime_connected = Gauge("runtime_connected", "Whether the OpenXR runtime is connected")
+
+        # Set by the rate controller.
+        self.head_tracking_rate = Gauge("head_tracking_rate", "Head tracking rate in Hz")
+        self.hand_tracking_rate = Gauge("hand_tracking_rate", "Hand tracking rate in Hz")
+        self.rate_decision = ""
+
+        self.stages = {name: StageStats(name) for name in WORKER_STAGES}
+
+    def acquire(self):
+        with self.readers_lock:
+            self.num_readers += 1
+            self.enabled = True
+
+    def release(self):
+        with self.readers_lock:
+            self.num_readers -= 1
+            self.enabled = self.num_readers > 0
+
+    def get_metrics(self) -> list:
+        metrics = [value for value in vars(self).values() if isinstance(value, (Counter, Gauge, LatencyHistogram))]
+
+        for stage in self.stages.values():
+            metrics += stage.get_metrics()
+
+        return metrics
+
+
+def now() -> float:
+    return time.perf_counter()
+
+
+stats = PerformanceStats()
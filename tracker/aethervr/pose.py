@@ -2,7 +2,21 @@ from dataclasses import dataclass
 import math
 
 import numpy as np
-import quaternion
+
+
+# numpy-quaternion takes a while to import and this module is already needed to show the window, so the module is
+# imported on first use and kept here.
+quaternion_module = None
+
+
+def get_quaternion():
+    global quaternion_module
+
+    if quaternion_module is None:
+        import quaternion
+        quaternion_module = quaternion
+
+    return quaternion_module
 
 
 @dataclass
@@ -55,11 +69,11 @@ class Orientation:
     w: float
 
     def slerp(self, other, t):
-        q = quaternion.slerp(self.to_np_array(), other.to_np_array(), 0.0, 1.0, t)
+        q = get_quaternion().slerp(self.to_np_array(), other.to_np_array(), 0.0, 1.0, t)
         return Orientation(q.x, q.y, q.z, q.w)
 
     def to_np_array(self):
-        return quaternion.quaternion(self.w, self.x, self.y, self.z)
+        return get_quaternion().quaternion(self.w, self.x, self.y, self.z)
 
     def from_np_array(q):
         return Orientation(q.x, q.y, q.z, q.w)
@@ -94,7 +108,7 @@ class Orientation:
             z_axis = -z_axis
 
         matrix = np.array([x_axis, y_axis, z_axis])
-        q = quaternion.from_rotation_matrix(matrix)
+        q = get_quaternion().from_rotation_matrix(matrix)
 
         return Orientation.from_np_array(q)
 
@@ -0,0 +1,287 @@
+import math
+
+from aethervr.pose import Position, Orientation
+from aethervr.config import HandTrackingMode, PoseFilterConfig
+
+
+class PoseFilter:
+
+    def __init__(self):
+        # The time constant of the filter in seconds, i.e. roughly how far the filtered pose trails behind.
+        self.latency = 0.0
+
+    def reset(self):
+        pass
+
+    def apply(self, position: Position, orientation: Orientation, timestamp: int):
+        pass
+
+
+class LerpPoseFilter(PoseFilter):
+
+    def __init__(self, t: float):
+        super().__init__()
+        self.t = t
+        self.position = None
+        self.orientation = None
+        self.last_timestamp = 0
+
+    def reset(self):
+        self.position = None
+        self.orientation = None
+
+    def apply(self, position: Position, orientation: Orientation, timestamp: int):
+        if self.position is not None:
+            dt = (timestamp - self.last_timestamp) * 1e-9
+            self.latency = max(dt, 0.0) * (1.0 - self.t) / self.t
+
+            smoothed_position = self.position.lerp(position, self.t)
+            smoothed_orientation = self.orientation.slerp(orientation, self.t)
+            _write_pose(position, orientation, smoothed_position, smoothed_orientation)
+
+        self.position = position.copy()
+        self.orientation = orientation.copy()
+        self.last_timestamp = timestamp
+
+
+# A low-pass filter whose cutoff frequency rises with speed, so slow movements are smoothed heavily while fast
+# movements pass through with little lag.
+# Thanks to: https://gery.casiez.net/1euro/
+class OneEuroPoseFilter(PoseFilter):
+
+    def __init__(self, config: PoseFilterConfig):
+        super().__init__()
+        self.config = config
+        self.position_filter = _OneEuroFilter(3)
+        self.orientation_filter = _OneEuroFilter(4)
+        self.sample = [0.0] * 7
+        self.last_timestamp = None
+
+    def reset(self):
+        self.last_timestamp = None
+
+    def apply(self, position: Position, orientation: Orientation, timestamp: int):
+        _read_pose(self.sample, position, orientation)
+
+        if self.last_timestamp is None:
+            self.position_filter.reset(self.sample, 0)
+            self.orientation_filter.reset(self.sample, 3)
+        else:
+            dt = (timestamp - self.last_timestamp) * 1e-9
+
+            if dt > 0.0:
+                _align_hemisphere(self.sample, self.orientation_filter.values)
+
+                min_cutoff = self.config.one_euro_min_cutoff
+                beta = self.config.one_euro_beta
+                derivative_cutoff = self.config.one_euro_derivative_cutoff
+
+                self.position_filter.update(self.sample, 0, dt, min_cutoff, beta, derivative_cutoff)
+                self.orientation_filter.update(self.sample, 3, dt, min_cutoff, beta, derivative_cutoff)
+
+                self.latency = 1.0 / (2.0 * math.pi * self.position_filter.cutoff)
+
+        self.last_timestamp = timestamp
+
+        _write_filtered_pose(position, orientation, self.position_filter.values, self.orientation_filter.values)
+
+
+# A constant-velocity Kalman filter applied to each position and quaternion component. Unlike a low-pass filter,
+# it estimates the velocity and therefore doesn't lag behind movements with constant speed.
+class KalmanPoseFilter(PoseFilter):
+
+    def __init__(self, config: PoseFilterConfig):
+        super().__init__()
+        self.config = config
+        self.position_filter = _KalmanFilter(3)
+        self.orientation_filter = _KalmanFilter(4)
+        self.sample = [0.0] * 7
+        self.last_timestamp = None
+
+    def reset(self):
+        self.last_timestamp = None
+
+    def apply(self, position: Position, orientation: Orientation, timestamp: int):
+        _read_pose(self.sample, position, orientation)
+
+        if self.last_timestamp is None:
+            self.position_filter.reset(self.sample, 0)
+            self.orientation_filter.reset(self.sample, 3)
+        else:
+            dt = (timestamp - self.last_timestamp) * 1e-9
+
+            if dt > 0.0:
+                _align_hemisphere(self.sample, self.orientation_filter.values)
+
+                process_noise = self.config.kalman_process_noise
+                measurement_noise = self.config.kalman_measurement_noise
+
+                self.position_filter.update(self.sample, 0, dt, process_noise, measurement_noise)
+                self.orientation_filter.update(self.sample, 3, dt, process_noise, measurement_noise)
+
+                gain = self.position_filter.gain
+                self.latency = dt * (1.0 - gain) / gain if gain > 0.0 else 0.0
+
+        self.last_timestamp = timestamp
+
+        _write_filtered_pose(position, orientation, self.position_filter.values, self.orientation_filter.values)
+
+
+def create_pose_filter(mode: HandTrackingMode, config: PoseFilterConfig) -> PoseFilter:
+    if mode == HandTrackingMode.SMOOTH:
+        return LerpPoseFilter(0.5)
+    elif mode == HandTrackingMode.ONE_EURO:
+        return OneEuroPoseFilter(config)
+    elif mode == HandTrackingMode.KALMAN:
+        return KalmanPoseFilter(config)
+    else:
+        return PoseFilter()
+
+
+class _OneEuroFilter:
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = [0.0] * size
+        self.previous = [0.0] * size
+        self.derivatives = [0.0] * size
+        self.cutoff = 1.0
+
+    def reset(self, sample: list[float], offset: int):
+        for i in range(self.size):
+            self.values[i] = sample[offset + i]
+            self.previous[i] = sample[offset + i]
+            self.derivatives[i] = 0.0
+
+    def update(
+        self,
+        sample: list[float],
+        offset: int,
+        dt: float,
+        min_cutoff: float,
+        beta: float,
+        derivative_cutoff: float,
+    ):
+        derivative_alpha = _smoothing_factor(derivative_cutoff, dt)
+        speed_squared = 0.0
+
+        for i in range(self.size):
+            derivative = (sample[offset + i] - self.previous[i]) / dt
+            derivative = self.derivatives[i] + derivative_alpha * (derivative - self.derivatives[i])
+            self.derivatives[i] = derivative
+            speed_squared += derivative * derivative
+
+        # All components share one cutoff so that the filtered vector doesn't change direction relative to the input.
+        self.cutoff = min_cutoff + beta * math.sqrt(speed_squared)
+        alpha = _smoothing_factor(self.cutoff, dt)
+
+        for i in range(self.size):
+            value = sample[offset + i]
+            self.previous[i] = value
+            self.values[i] += alpha * (value - self.values[i])
+
+
+class _KalmanFilter:
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = [0.0] * size
+        self.velocities = [0.0] * size
+
+        # The covariance matrix is the same for all components because they share the same noise parameters, so
+        # we only have to track it once.
+        self.p00 = 1.0
+        self.p01 = 0.0
+        self.p11 = 1.0
+        self.gain = 1.0
+
+    def reset(self, sample: list[float], offset: int):
+        for i in range(self.size):
+            self.values[i] = sample[offset + i]
+            self.velocities[i] = 0.0
+
+        self.p00 = 1.0
+        self.p01 = 0.0
+        self.p11 = 1.0
+        self.gain = 1.0
+
+    def update(self, sample: list[float], offset: int, dt: float, process_noise: float, measurement_noise: float):
+        # Predict (white noise acceleration model).
+        dt2 = dt * dt
+        p00 = self.p00 + dt * (2.0 * self.p01 + dt * self.p11) + process_noise * dt2 * dt / 3.0
+        p01 = self.p01 + dt * self.p11 + process_noise * dt2 / 2.0
+        p11 = self.p11 + process_noise * dt
+
+        # Correct.
+        s = p00 + measurement_noise
+        k0 = p00 / s
+        k1 = p01 / s
+
+        self.p00 = (1.0 - k0) * p00
+        self.p01 = (1.0 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        self.gain = k0
+
+        for i in range(self.size):
+            predicted = self.values[i] + dt * self.velocities[i]
+            residual = sample[offset + i] - predicted
+            self.values[i] = predicted + k0 * residual
+            self.velocities[i] += k1 * residual
+
+
+def _smoothing_factor(cutoff: float, dt: float) -> float:
+    r = 2.0 * math.pi * cutoff * dt
+    return r / (r + 1.0)
+
+
+def _read_pose(sample: list[float], position: Position, orientation: Orientation):
+    sample[0] = position.x
+    sample[1] = position.y
+    sample[2] = position.z
+    sample[3] = orientation.x
+    sample[4] = orientation.y
+    sample[5] = orientation.z
+    sample[6] = orientation.w
+
+
+def _align_hemisphere(sample: list[float], previous: list[float]):
+    # q and -q describe the same rotation, so flip the new sample if it lies on the other side of the 4D hypersphere
+    # than the filtered value. Otherwise the filter would interpolate through the long way around.
+    dot = sample[3] * previous[0] + sample[4] * previous[1] + sample[5] * previous[2] + sample[6] * previous[3]
+
+    if dot < 0.0:
+        sample[3] = -sample[3]
+        sample[4] = -sample[4]
+        sample[5] = -sample[5]
+        sample[6] = -sample[6]
+
+
+def _write_filtered_pose(
+    position: Position,
+    orientation: Orientation,
+    position_values: list[float],
+    orientation_values: list[float],
+):
+    position.x = position_values[0]
+    position.y = position_values[1]
+    position.z = position_values[2]
+
+    x, y, z, w = orientation_values
+    length = math.sqrt(x * x + y * y + z * z + w * w)
+
+    if length > 0.0:
+        inv_length = 1.0 / length
+        orientation.x = x * inv_length
+        orientation.y = y * inv_length
+        orientation.z = z * inv_length
+        orientation.w = w * inv_length
+
+
+def _write_pose(position: Position, orientation: Orientation, new_position: Position, new_orientation: Orientation):
+    position.x = new_position.x
+    position.y = new_position.y
+    position.z = new_position.z
+    orientation.x = new_orientation.x
+    orientation.y = new_orientation.y
+    orientation.z = new_orientation.z
+    orientation.w = new_orientation.w
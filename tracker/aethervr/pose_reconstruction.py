@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+
+from aethervr.tracking_state import HeadState, HandState
+from aethervr.pose import Position, Orientation
+from aethervr.config import *
+
+
+# Turns landmarker output into head and hand states. This doesn't depend on MediaPipe, so recorded landmarks can be
+# processed the same way as live results. Landmarks only need `x`, `y` and `z` attributes.
+
+HAND_DEPTH_ORIGIN = 1.3
+HAND_DEPTH_SCALE = 5.0
+
+
+def reconstruct_head_state(landmarks, transformation_matrix, capture_time: float, frame_id: int) -> HeadState:
+    state = HeadState(visible=False, capture_time=capture_time, frame_id=frame_id)
+
+    if landmarks is not None:
+        state.landmarks = landmarks
+
+    if transformation_matrix is not None:
+        state.visible = True
+
+        matrix = transformation_matrix
+
+        # state.position = Position(matrix[0][3] / 100.0, matrix[1][3] / 100.0, -matrix[2][3] / 100.0)
+        state.position = Position(0.0, 0.0, 0.0)
+
+        x_axis = matrix[0][0:3]
+        x_axis = x_axis / np.linalg.norm(x_axis)
+        y_axis = matrix[1][0:3]
+        y_axis = y_axis / np.linalg.norm(y_axis)
+        z_axis = matrix[2][0:3]
+        z_axis = z_axis / np.linalg.norm(z_axis)
+
+        x = x_axis[0]
+        y = z_axis[1]
+        z = x_axis[2]
+
+        state.pitch = -float(np.rad2deg(np.arcsin(y)))
+        state.yaw = -float(np.rad2deg(np.arctan2(z, x)))
+
+    return state
+
+
+def reconstruct_hand_states(
+    hand_landmarks,
+    hand_world_landmarks,
+    timestamp: int,
+    capture_time: float,
+    frame_id: int,
+) -> tuple[HandState, HandState]:
+    left_hand = HandState(timestamp=timestamp, visible=False, capture_time=capture_time, frame_id=frame_id)
+    right_hand = HandState(timestamp=timestamp, visible=False, capture_time=capture_time, frame_id=frame_id)
+
+    for i, landmarks in enumerate(hand_landmarks):
+        is_left_handed = landmarks[0].x <= 0.5
+
+        if is_left_handed:
+            hand = left_hand
+            tracking_origin = LEFT_HAND_TRACKING_ORIGIN
+            offset = LEFT_HAND_WORLD_ORIGIN
+        else:
+            hand = right_hand
+            tracking_origin = RIGHT_HAND_TRACKING_ORIGIN
+            offset = RIGHT_HAND_WORLD_ORIGIN
+
+        p1 = get_landmark_position(landmarks[0])
+        p2 = get_landmark_position(landmarks[5])
+        p3 = get_landmark_position(landmarks[17])
+
+        dx = landmarks[9].x - landmarks[0].x
+        dy = landmarks[9].y - landmarks[0].y
+        nonlinear_depth_estimate = math.sqrt(dx * dx + dy * dy)
+        linear_depth_estimate = math.sqrt(nonlinear_depth_estimate)
+
+        raw_x = (float(landmarks[0].x) + float(landmarks[5].x) + float(landmarks[17].x)) / 3
+        raw_y = (float(landmarks[0].y) + float(landmarks[5].y) + float(landmarks[17].y)) / 3
+
+        hand_x = offset[0] + 2.0 * (raw_x - tracking_origin[0])
+        hand_y = offset[1] - 2.0 * (raw_y - tracking_origin[1])
+        hand_z = HAND_DEPTH_ORIGIN - HAND_DEPTH_SCALE * linear_depth_estimate
+        position = Position(hand_x, hand_y, hand_z)
+
+        orientation = Orientation.from_triangle(p1, p2, p3, is_left_handed)
+
+        hand.visible = True
+        hand.landmarks = landmarks
+        hand.world_landmarks = hand_world_landmarks[i]
+        hand.position = position
+        hand.orientation = orientation
+
+    return left_hand, right_hand
+
+
+def get_landmark_position(landmark):
+    return Position(landmark.x, -landmark.y, -landmark.z)
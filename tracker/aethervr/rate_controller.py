@@ -0,0 +1,139 @@
+import time
+
+from aethervr.config import Config
+from aethervr import performance
+
+
+class TrackerRate:
+
+    def __init__(self, name: str, min_rate: float):
+        self.name = name
+        self.min_rate = min_rate
+        self.rate = 0.0
+        self.latency = 0.0
+        self.last_run_time = 0.0
+
+        # Time the tracker spent working on frames, only written by the thread that receives its results.
+        self.busy_time = 0.0
+        self.last_result_time = 0.0
+        self.last_busy_time = 0.0
+        # Fraction of the last adjustment interval the tracker was busy.
+        self.load = 0.0
+
+    def clamp(self, max_rate: float):
+        self.rate = min(max(self.rate, self.min_rate), max_rate)
+
+
+# Adjusts the head and hand tracking rates to keep the inference latency (capture to result) within the configured
+# budget. Rates are lowered multiplicatively and raised additively. When the pipeline is overloaded, head tracking is
+# slowed down first because hand tracking matters more for input. When there is headroom, hand tracking gets it first.
+# Each tracker works on one frame at a time, so its load (the fraction of time it is busy) tells whether it can keep up
+# regardless of how many cores the computer has.
+class RateController:
+
+    # Used as the upper limit if the frame rate isn't capped.
+    MAX_RATE = 60.0
+    ADJUST_INTERVAL = 1.0
+    DECREASE_FACTOR = 0.75
+    INCREASE_STEP = 2.0
+    LATENCY_SMOOTHING = 0.2
+    # Rates are only raised while latency and load stay below this fraction of their limits.
+    HEADROOM_THRESHOLD = 0.75
+    MAX_LOAD = 0.9
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.head = TrackerRate("head", min_rate=5.0)
+        self.hand = TrackerRate("hand", min_rate=10.0)
+        self.head.rate = self.max_rate()
+        self.hand.rate = self.max_rate()
+
+        self.last_adjust_time = time.perf_counter()
+        self.last_action = None
+
+    def max_rate(self) -> float:
+        cap = self.config.tracking_fps_cap
+        return float(cap) if cap > 0 else RateController.MAX_RATE
+
+    def is_due(self, tracker: TrackerRate, now: float) -> bool:
+        return now - tracker.last_run_time >= 1.0 / tracker.rate
+
+    def record_result(self, tracker: TrackerRate, capture_time: float, now: float):
+        tracker.latency += RateController.LATENCY_SMOOTHING * (now - capture_time - tracker.latency)
+
+        # The tracker started on this frame when it was submitted or when it finished the previous one, whichever was
+        # later. Frames that wait in a queue therefore don't count as busy time twice.
+        tracker.busy_time += now - max(capture_time, tracker.last_result_time)
+        tracker.last_result_time = now
+
+    def update(self, now: float):
+        if now - self.last_adjust_time < RateController.ADJUST_INTERVAL:
+            return
+
+        interval = now - self.last_adjust_time
+        self.last_adjust_time = now
+
+        for tracker in (self.head, self.hand):
+            busy_time = tracker.busy_time
+            tracker.load = (busy_time - tracker.last_busy_time) / interval
+            tracker.last_busy_time = busy_time
+
+        max_rate = self.max_rate()
+
+        if self.config.adaptive_tracking_rate:
+            decision = self._adjust()
+        else:
+            self.head.rate = max_rate
+            self.hand.rate = max_rate
+            decision = None
+
+        self.head.clamp(max_rate)
+        self.hand.clamp(max_rate)
+
+        performance.stats.head_tracking_rate.set(self.head.rate)
+        performance.stats.hand_tracking_rate.set(self.hand.rate)
+
+        if decision is not None:
+            action, message = decision
+            performance.stats.rate_decision = message
+
+            # Rates change at most once per interval, only the turning points are worth logging.
+            if action != self.last_action:
+                self.last_action = action
+                print(f"Tracking rate: {message}")
+
+    def _adjust(self):
+        budget = self.config.latency_budget / 1000.0
+        max_rate = self.max_rate()
+        latency = max(self.head.latency, self.hand.latency)
+        load = max(self.head.load, self.hand.load)
+
+        overloaded = latency > budget or load > RateController.MAX_LOAD
+        has_headroom = (
+            latency < RateController.HEADROOM_THRESHOLD * budget
+            and load < RateController.HEADROOM_THRESHOLD * RateController.MAX_LOAD
+        )
+
+        if overloaded:
+            tracker = self.head if self.head.rate > self.head.min_rate else self.hand
+
+            if tracker.rate <= tracker.min_rate:
+                return None
+
+            tracker.rate = max(tracker.rate * RateController.DECREASE_FACTOR, tracker.min_rate)
+            action = "lowered"
+        elif has_headroom:
+            tracker = self.hand if self.hand.rate < max_rate else self.head
+
+            if tracker.rate >= max_rate:
+                return None
+
+            tracker.rate = min(tracker.rate + RateController.INCREASE_STEP, max_rate)
+            action = "raised"
+        else:
+            return None
+
+        return action, (
+            f"{action} {tracker.name} tracking to {tracker.rate:.0f} Hz"
+            f" (latency {1000.0 * latency:.0f} ms, load {100.0 * load:.0f}%)"
+        )
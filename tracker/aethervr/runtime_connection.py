@@ -1,11 +1,14 @@
-from threading import Thread, Lock, Event
+from threading import Thread, Lock
 from dataclasses import dataclass
+from typing import Optional
 import socket
 import struct
 import errno
 
-from aethervr.input_state import InputState, HeadsetState, ControllerState, ControllerButton
+from aethervr.input_state import InputState, HeadsetState, ControllerState
 from aethervr.event_source import EventSource
+from aethervr import performance
+from aethervr import tracing
 
 
 @dataclass
@@ -50,11 +53,13 @@ class RuntimeConnection:
 
         self.stream = None
 
+        # Head and hand states are updated together and sent together, so a poll never sees half of an update.
         self.state = InputState()
-        self.headset_state_lock = Lock()
-        self.headset_state_available = Event()
-        self.controller_state_lock = Lock()
-        self.controller_state_available = Event()
+        self.state_lock = Lock()
+        self.headset_state_available = False
+        self.controller_state_available = False
+        self.controller_capture_time = 0.0
+        self.frame_id = 0
 
         print("Starting OpenXR runtime connection...")
 
@@ -79,12 +84,15 @@ class RuntimeConnection:
                 break
 
             print("OpenXR runtime connected")
+            performance.stats.runtime_connections.increment()
+            performance.stats.runtime_connected.set(1.0)
             self.on_connected.trigger()
 
             self.communicate()
 
             print("OpenXR runtime disconnected")
             self.connected = False
+            performance.stats.runtime_connected.set(0.0)
             self.on_disconnected.trigger()
 
         self.socket.close()
@@ -97,7 +105,12 @@ class RuntimeConnection:
                     break
 
                 if request == b"\x00":
+                    start_time = performance.now()
                     self.send_tracking_state()
+                    end_time = performance.now()
+                    performance.stats.runtime_polls.increment()
+                    performance.stats.poll_response_time.record(end_time - start_time)
+                    tracing.record("runtime poll", self.frame_id, start_time, end_time)
                 elif request == b"\x01":
                     self.receive_runtime_info()
                 elif request == b"\x02":
@@ -113,21 +126,24 @@ class RuntimeConnection:
                     break
 
     def send_tracking_state(self):
-        if self.headset_state_available.is_set() and self.controller_state_available.is_set():
-            self.stream.send(b"\x03")
-            self.stream.send(self.serialize_headset_state())
-            self.stream.send(self.serialize_controller_state())
-        elif self.headset_state_available.is_set():
-            self.stream.send(b"\x01")
-            self.stream.send(self.serialize_headset_state())
-        elif self.controller_state_available.is_set():
-            self.stream.send(b"\x02")
-            self.stream.send(self.serialize_controller_state())
-        else:
-            self.stream.send(b"\x00")
-        
-        self.headset_state_available.clear()
-        self.controller_state_available.clear()
+        with self.state_lock:
+            if self.headset_state_available and self.controller_state_available:
+                message = b"\x03" + self.serialize_headset_state() + self.serialize_controller_state()
+            elif self.headset_state_available:
+                message = b"\x01" + self.serialize_headset_state()
+            elif self.controller_state_available:
+                message = b"\x02" + self.serialize_controller_state()
+            else:
+                message = b"\x00"
+
+            controller_state_sent = self.controller_state_available
+            self.headset_state_available = False
+            self.controller_state_available = False
+
+        self.stream.send(message)
+
+        if controller_state_sent:
+            self.record_capture_to_send_latency()
 
     def receive_runtime_info(self):
         name_length = struct.unpack("I", self.stream.recv(4))[0]
@@ -144,76 +160,77 @@ class RuntimeConnection:
         message = PresentImageData(*struct.unpack("IIIIII", self.stream.recv(24)))
         self.on_present_image.trigger(message)
 
-    def update_headset_state(self, state: HeadsetState):
-        with self.headset_state_lock:
-            self.state.headset_state = state
-
-        self.headset_state_available.set()
-
-    def update_controller_state(self, left_state: ControllerState, right_state: ControllerState):
-        with self.controller_state_lock:
-            self.state.left_controller_state = left_state
-            self.state.right_controller_state = right_state
-        
-        self.controller_state_available.set()
+    # Either state can be `None` if only the other one changed.
+    def update_tracking_state(
+        self,
+        headset_state: Optional[HeadsetState],
+        controller_states: Optional[tuple[ControllerState, ControllerState]],
+        capture_time: float = 0.0,
+        frame_id: int = 0,
+    ):
+        with self.state_lock:
+            if headset_state is not None:
+                self.state.headset_state = headset_state
+                self.headset_state_available = True
+
+            if controller_states is not None:
+                self.state.left_controller_state, self.state.right_controller_state = controller_states
+                self.controller_capture_time = capture_time
+                self.controller_state_available = True
+
+            self.frame_id = frame_id
+
+    def record_capture_to_send_latency(self):
+        if self.controller_capture_time > 0.0:
+            performance.stats.capture_to_send_latency.record(performance.now() - self.controller_capture_time)
 
     def serialize_headset_state(self):
-        with self.headset_state_lock:
-            values = [
-                self.state.headset_state.position.x,
-                self.state.headset_state.position.y,
-                self.state.headset_state.position.z,
-                self.state.headset_state.pitch,
-                self.state.headset_state.yaw,
-            ]
-
-        format = "fffff"
-        return struct.pack(format, *values)
+        return serialize_headset_state(self.state.headset_state)
 
     def serialize_controller_state(self):
-        with self.controller_state_lock:
-            values = [
-                self.state.left_controller_state.position.x,
-                self.state.left_controller_state.position.y,
-                self.state.left_controller_state.position.z,
-                self.state.left_controller_state.orientation.x,
-                self.state.left_controller_state.orientation.y,
-                self.state.left_controller_state.orientation.z,
-                self.state.left_controller_state.orientation.w,
-                self.state.right_controller_state.position.x,
-                self.state.right_controller_state.position.y,
-                self.state.right_controller_state.position.z,
-                self.state.right_controller_state.orientation.x,
-                self.state.right_controller_state.orientation.y,
-                self.state.right_controller_state.orientation.z,
-                self.state.right_controller_state.orientation.w,
-                int(self.state.left_controller_state.buttons[ControllerButton.TRIGGER]),
-                int(self.state.left_controller_state.buttons[ControllerButton.SQUEEZE]),
-                int(self.state.left_controller_state.buttons[ControllerButton.A_BUTTON]),
-                int(self.state.left_controller_state.buttons[ControllerButton.B_BUTTON]),
-                int(self.state.left_controller_state.buttons[ControllerButton.X_BUTTON]),
-                int(self.state.left_controller_state.buttons[ControllerButton.Y_BUTTON]),
-                int(self.state.left_controller_state.buttons[ControllerButton.MENU]),
-                int(self.state.left_controller_state.buttons[ControllerButton.SYSTEM]),
-                int(self.state.left_controller_state.buttons[ControllerButton.THUMBSTICK]),
-                int(self.state.right_controller_state.buttons[ControllerButton.TRIGGER]),
-                int(self.state.right_controller_state.buttons[ControllerButton.SQUEEZE]),
-                int(self.state.right_controller_state.buttons[ControllerButton.A_BUTTON]),
-                int(self.state.right_controller_state.buttons[ControllerButton.B_BUTTON]),
-                int(self.state.right_controller_state.buttons[ControllerButton.X_BUTTON]),
-                int(self.state.right_controller_state.buttons[ControllerButton.Y_BUTTON]),
-                int(self.state.right_controller_state.buttons[ControllerButton.MENU]),
-                int(self.state.right_controller_state.buttons[ControllerButton.SYSTEM]),
-                int(self.state.right_controller_state.buttons[ControllerButton.THUMBSTICK]),
-                self.state.left_controller_state.thumbstick_x,
-                self.state.left_controller_state.thumbstick_y,
-                self.state.right_controller_state.thumbstick_x,
-                self.state.right_controller_state.thumbstick_y,
-            ]
-
-        format = "fffffff" + "fffffff" + "BBBBBBBBB" + "BBBBBBBBB" + "xx" + "ff" + "ff"
-        return struct.pack(format, *values)
+        return serialize_controller_state(self.state.left_controller_state, self.state.right_controller_state)
 
     def close(self):
         self.running = False
         print("OpenXR runtime connection closed")
+
+
+def serialize_headset_state(state: HeadsetState) -> bytes:
+    values = [
+        state.position.x,
+        state.position.y,
+        state.position.z,
+        state.pitch,
+        state.yaw,
+    ]
+
+    format = "fffff"
+    return struct.pack(format, *values)
+
+
+def serialize_controller_state(left_state: ControllerState, right_state: ControllerState) -> bytes:
+    values = [
+        left_state.position.x,
+        left_state.position.y,
+        left_state.position.z,
+        left_state.orientation.x,
+        left_state.orientation.y,
+        left_state.orientation.z,
+        left_state.orientation.w,
+        right_state.position.x,
+        right_state.position.y,
+        right_state.position.z,
+        right_state.orientation.x,
+        right_state.orientation.y,
+        right_state.orientation.z,
+        right_state.orientation.w,
+        left_state.buttons,
+        right_state.buttons,
+        left_state.thumbstick_x,
+        left_state.thumbstick_y,
+        right_state.thumbstick_x,
+        right_state.thumbstick_y,
+    ]
+
+    format = "fffffff" + "fffffff" + "H" + "H" + "ff" + "ff"
+    return struct.pack(format, *values)
@@ -0,0 +1,35 @@
+from contextlib import contextmanager
+import time
+import sys
+
+
+# Startup phases are only printed when the tracker is started with `--startup-report`. For a breakdown of individual
+# module imports, run the tracker with `python -X importtime` instead.
+START_TIME = time.perf_counter()
+REPORT_ENABLED = "--startup-report" in sys.argv
+
+phases = []
+
+
+@contextmanager
+def phase(name: str):
+    start_time = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        phases.append((name, start_time - START_TIME, time.perf_counter() - start_time))
+
+
+def mark(name: str):
+    phases.append((name, time.perf_counter() - START_TIME, 0.0))
+
+
+def print_report():
+    if not REPORT_ENABLED:
+        return
+
+    print("startup: offset [ms] | duration [ms] | phase")
+
+    for name, offset, duration in sorted(phases, key=lambda phase: phase[1]):
+        print(f"startup: {offset * 1000.0:11.1f} | {duration * 1000.0:13.1f} | {name}")
@@ -0,0 +1,120 @@
+from collections import deque
+from contextlib import nullcontext
+import threading
+import json
+import time
+import os
+
+
+# Spans are collected in a ring buffer while tracing is enabled and can be saved as a Chrome trace (chrome://tracing
+# or https://ui.perfetto.dev). Appending to a deque is thread-safe, so recording doesn't need locks.
+MAX_SPANS = 100000
+
+enabled = False
+spans = deque(maxlen=MAX_SPANS)
+thread_names = {}
+# Threads and tracks are registered under a lock the first time they record a span, afterwards only the lookups run.
+names_lock = threading.Lock()
+
+# Spans that don't belong to a Python thread (e.g. the time a frame spends inside MediaPipe) are shown on their own
+# tracks with made-up thread IDs.
+TRACK_ID_OFFSET = 1000000
+track_ids = {}
+
+
+class Span:
+
+    __slots__ = ("name", "frame_id", "start_time")
+
+    def __init__(self, name: str, frame_id: int):
+        self.name = name
+        self.frame_id = frame_id
+        self.start_time = 0.0
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        record(self.name, self.frame_id, self.start_time, time.perf_counter())
+
+
+DISABLED_SPAN = nullcontext()
+
+
+def span(name: str, frame_id: int):
+    if not enabled:
+        return DISABLED_SPAN
+
+    return Span(name, frame_id)
+
+
+def record(name: str, frame_id: int, start_time: float, end_time: float, track: str = None):
+    if not enabled:
+        return
+
+    if track is None:
+        thread = threading.current_thread()
+        thread_id = thread.ident
+
+        if thread_id not in thread_names:
+            with names_lock:
+                thread_names[thread_id] = thread.name
+    else:
+        thread_id = track_ids.get(track)
+
+        if thread_id is None:
+            thread_id = register_track(track)
+
+    spans.append((name, frame_id, thread_id, start_time, end_time))
+
+
+def register_track(track: str) -> int:
+    with names_lock:
+        # Another thread may have registered the track since the lookup.
+        thread_id = track_ids.get(track)
+
+        if thread_id is None:
+            thread_id = TRACK_ID_OFFSET + len(track_ids)
+            track_ids[track] = thread_id
+            thread_names[thread_id] = track
+
+        return thread_id
+
+
+def clear():
+    spans.clear()
+
+
+def save(path):
+    process_id = os.getpid()
+    events = []
+
+    with names_lock:
+        names = list(thread_names.items())
+
+    for thread_id, thread_name in names:
+        events.append({
+            "name": "thread_name",
+            "ph": "M",
+            "pid": process_id,
+            "tid": thread_id,
+            "args": {"name": thread_name},
+        })
+
+    for name, frame_id, thread_id, start_time, end_time in list(spans):
+        events.append({
+            "name": name,
+            "cat": "aethervr",
+            "ph": "X",
+            "ts": start_time * 1e6,
+            "dur": (end_time - start_time) * 1e6,
+            "pid": process_id,
+            "tid": thread_id,
+            "args": {"frame_id": frame_id},
+        })
+
+    with open(path, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    print(f"Saved {len(events)} trace events to {path}")
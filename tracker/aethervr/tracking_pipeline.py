@@ -0,0 +1,117 @@
+import math
+from typing import Callable, Optional
+
+from aethervr.tracking_state import TrackingState, HeadState, HandState
+from aethervr.input_state import InputState
+from aethervr.gesture_detector import GestureDetector
+from aethervr.pose import Position, Orientation
+from aethervr.pose_filter import create_pose_filter
+from aethervr.config import Config
+from aethervr.event_source import EventSource
+from aethervr.frame_fusion import FrameFusion
+from aethervr import tracing
+
+
+# Turns head and hand states into headset and controller input and publishes it to the runtime connection. It doesn't
+# depend on MediaPipe, the camera or the GUI, so recorded tracking results can be replayed through it. The connection
+# only needs `update_tracking_state`. Replays pass a `clock` that returns the recorded capture times, see FrameFusion.
+class TrackingPipeline:
+
+    def __init__(self, config: Config, connection, clock: Optional[Callable[[], float]] = None):
+        self.config = config
+        self.connection = connection
+        self.fusion = FrameFusion(connection, clock)
+
+        self.tracking_state = TrackingState()
+        self.input_state = InputState()
+        self.gesture_detector = GestureDetector(config, self.tracking_state, self.input_state)
+
+        self.pose_filter_mode = None
+        self.left_pose_filter = None
+        self.right_pose_filter = None
+
+        self.on_hands_updated = EventSource()
+
+    def process_head_state(self, state: HeadState):
+        self.tracking_state.head = state
+
+        if state.visible:
+            self.input_state.headset_state.position = state.position
+            self.input_state.headset_state.pitch = self.adjust_head_angle(state.pitch, self.config.headset_pitch_deadzone)
+            self.input_state.headset_state.yaw = self.adjust_head_angle(state.yaw, self.config.headset_yaw_deadzone)
+        else:
+            self.input_state.headset_state.pitch = 0.0
+            self.input_state.headset_state.yaw = 0.0
+
+        with tracing.span("publish head state", state.frame_id):
+            self.fusion.update_head(self.input_state.headset_state, state.capture_time, state.frame_id)
+
+    def adjust_head_angle(self, angle: float, deadzone: float):
+        abs_angle_adjusted = abs(angle) - deadzone
+
+        if abs_angle_adjusted > 0.0:
+            return math.copysign(abs_angle_adjusted, angle)
+        else:
+            return 0.0
+
+    def process_hand_states(self, left_state: HandState, right_state: HandState):
+        previous_left_gesture = self.tracking_state.left_hand.gesture
+        self.tracking_state.left_hand = left_state
+        self.tracking_state.left_hand.previous_gesture = previous_left_gesture
+
+        previous_right_gesture = self.tracking_state.right_hand.gesture
+        self.tracking_state.right_hand = right_state
+        self.tracking_state.right_hand.previous_gesture = previous_right_gesture
+
+        left_controller_state = self.input_state.left_controller_state
+        right_controller_state = self.input_state.right_controller_state
+
+        if self.config.hand_tracking_mode != self.pose_filter_mode:
+            self.pose_filter_mode = self.config.hand_tracking_mode
+            self.left_pose_filter = create_pose_filter(self.pose_filter_mode, self.config.pose_filter_config)
+            self.right_pose_filter = create_pose_filter(self.pose_filter_mode, self.config.pose_filter_config)
+
+        pitch = math.radians(self.config.controller_pitch)
+        yaw = math.radians(self.config.controller_yaw)
+        roll = math.radians(self.config.controller_roll)
+
+        if left_state.visible:
+            position = left_state.position - Position(0.0, 0.0, self.config.controller_depth_offset)
+            orientation = left_state.orientation * Orientation.from_euler_angles(pitch, yaw, roll)
+            self.left_pose_filter.apply(position, orientation, left_state.timestamp)
+
+            left_controller_state.position = position
+            left_controller_state.orientation = orientation
+            left_controller_state.timestamp = left_state.timestamp
+        else:
+            self.left_pose_filter.reset()
+
+        if right_state.visible:
+            position = right_state.position - Position(0.0, 0.0, self.config.controller_depth_offset)
+            orientation = right_state.orientation * Orientation.from_euler_angles(pitch, -yaw, -roll)
+            self.right_pose_filter.apply(position, orientation, right_state.timestamp)
+
+            right_controller_state.position = position
+            right_controller_state.orientation = orientation
+            right_controller_state.timestamp = right_state.timestamp
+        else:
+            self.right_pose_filter.reset()
+
+        with tracing.span("gesture detection", left_state.frame_id):
+            self.gesture_detector.detect()
+
+        with tracing.span("publish hand state", left_state.frame_id):
+            self.on_hands_updated.trigger()
+
+            self.fusion.update_hands(
+                left_controller_state,
+                right_controller_state,
+                left_state.capture_time,
+                left_state.frame_id,
+            )
+
+    def get_filter_latency(self) -> float:
+        if self.left_pose_filter is None:
+            return 0.0
+
+        return max(self.left_pose_filter.latency, self.right_pose_filter.latency)
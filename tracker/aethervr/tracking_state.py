@@ -12,6 +12,8 @@ class HeadState:
     pitch: float = 0.0
     yaw: float = 0.0
     landmarks: Optional[Any] = None
+    capture_time: float = 0.0
+    frame_id: int = 0
 
 
 class Gesture(Enum):
@@ -31,6 +33,8 @@ class HandState:
     world_landmarks: Optional[Any] = None
     gesture: Optional[Gesture] = None
     previous_gesture: Optional[Gesture] = None
+    capture_time: float = 0.0
+    frame_id: int = 0
 
 
 @dataclass
@@ -0,0 +1,704 @@
+from argparse import ArgumentParser
+from collections import namedtuple
+from contextlib import ExitStack
+from itertools import product, cycle
+from threading import Event
+import statistics
+import platform
+import math
+import json
+import time
+import sys
+import os
+
+from aethervr.config import InferenceConfig, InferenceDelegate, INFERENCE_DELEGATE_NAMES
+
+
+DEFAULT_CONFIDENCES = "0.3,0.5,0.7,0.9"
+DEFAULT_FPS = 30.0
+
+# Each run of a suite benchmark calls it often enough to take at least this long, like timeit does.
+MIN_RUN_DURATION = 0.05
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.1
+
+Landmark = namedtuple("Landmark", ["x", "y", "z"])
+
+
+def load_footage(path: str, max_frames: int):
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+
+    if not capture.isOpened():
+        raise IOError(f"Failed to open {path}")
+
+    fps = capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    frames = []
+
+    while len(frames) < max_frames:
+        ret, frame = capture.read()
+
+        if not ret:
+            break
+
+        # Same preprocessing as the camera capture.
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame = cv2.flip(frame, 1)
+        frames.append(frame)
+
+    capture.release()
+    return frames, fps
+
+
+def load_mjpeg(path: str, max_frames: int):
+    import numpy as np
+
+    # An MJPEG file (for example from `ffmpeg -i <video> -c:v mjpeg -f mjpeg <file>`) is a sequence of JPEG images.
+    # Entropy-coded data never contains an end-of-image marker, so the images can be split at these markers.
+    with open(path, "rb") as file:
+        data = file.read()
+
+    frames = []
+    offset = 0
+
+    while len(frames) < max_frames:
+        start = data.find(b"\xff\xd8", offset)
+        end = data.find(b"\xff\xd9", start)
+
+        if start < 0 or end < 0:
+            break
+
+        offset = end + 2
+        frames.append(np.frombuffer(data[start:offset], dtype=np.uint8))
+
+    return frames
+
+
+def run_inference(tracker: str, config: InferenceConfig, frames, fps: float):
+    import mediapipe as mp
+    from mediapipe.tasks.python.vision import RunningMode
+    from aethervr.head_tracker import HeadTracker
+    from aethervr.hand_tracker import HandTracker
+
+    # VIDEO mode processes every frame synchronously, so the results don't depend on how fast this machine is.
+    if tracker == "head":
+        detector = HeadTracker.create_detector(config, RunningMode.VIDEO)
+    else:
+        detector = HandTracker.create_detector(config, RunningMode.VIDEO)
+
+    results = []
+    start_time = time.perf_counter()
+
+    for i, frame in enumerate(frames):
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
+        timestamp = int(i * 1000.0 / fps)
+
+        detection_results = detector.detect_for_video(image, timestamp)
+
+        if tracker == "head":
+            results.append([_to_points(landmarks) for landmarks in detection_results.face_landmarks])
+        else:
+            results.append([_to_points(landmarks) for landmarks in detection_results.hand_landmarks])
+
+    duration = time.perf_counter() - start_time
+    detector.close()
+
+    return duration, results
+
+
+def compare_results(reference, results):
+    # Accuracy is measured relative to the reference run: how many of its detections are still found, and how far
+    # the landmarks move away from it (in normalized image coordinates).
+    num_reference_detections = 0
+    num_detections = 0
+    total_error = 0.0
+    num_errors = 0
+
+    for reference_objects, objects in zip(reference, results):
+        num_reference_detections += len(reference_objects)
+        num_detections += min(len(objects), len(reference_objects))
+
+        # Objects are matched by the horizontal position of their first landmark.
+        reference_objects = sorted(reference_objects, key=lambda points: points[0][0])
+        objects = sorted(objects, key=lambda points: points[0][0])
+
+        for reference_points, points in zip(reference_objects, objects):
+            for (x1, y1), (x2, y2) in zip(reference_points, points):
+                total_error += math.hypot(x2 - x1, y2 - y1)
+                num_errors += 1
+
+    detection_rate = num_detections / num_reference_detections if num_reference_detections > 0 else 1.0
+    mean_error = total_error / num_errors if num_errors > 0 else 0.0
+    return detection_rate, mean_error
+
+
+def benchmark_inference(args):
+    frames, fps = load_footage(args.footage, args.max_frames)
+    print(f"Loaded {len(frames)} frames from {args.footage}")
+
+    confidences = [float(value) for value in args.confidences.split(",")]
+    delegates_by_name = {name: delegate for delegate, name in INFERENCE_DELEGATE_NAMES}
+    delegates = [delegates_by_name[name] for name in args.delegates.split(",")]
+    trackers = ["head", "hand"] if args.tracker == "both" else [args.tracker]
+
+    rows = []
+
+    for tracker in trackers:
+        reference_config = InferenceConfig(InferenceDelegate.CPU, 0.0, 0.0, 0.0)
+        reference_config.set_to_default()
+        _, reference = run_inference(tracker, reference_config, frames, fps)
+
+        for delegate, detection_confidence, tracking_confidence in product(delegates, confidences, confidences):
+            config = InferenceConfig(
+                delegate=delegate,
+                min_detection_confidence=detection_confidence,
+                min_presence_confidence=detection_confidence,
+                min_tracking_confidence=tracking_confidence,
+            )
+
+            try:
+                duration, results = run_inference(tracker, config, frames, fps)
+            except Exception as e:
+                print(f"Skipping {tracker} tracker with {config}: {e}")
+                continue
+
+            detection_rate, mean_error = compare_results(reference, results)
+
+            row = {
+                "tracker": tracker,
+                "config": config.serialize(),
+                "frames_per_second": len(frames) / duration,
+                "milliseconds_per_frame": 1000.0 * duration / len(frames),
+                "detection_rate": detection_rate,
+                "mean_landmark_error": mean_error,
+            }
+
+            rows.append(row)
+            print_row(row)
+
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump({"footage": args.footage, "num_frames": len(frames), "results": rows}, file, indent=2)
+
+
+def print_row(row):
+    config = row["config"]
+
+    print(
+        f"{row['tracker']:>4} {config['delegate']:>3}"
+        f" | detection {config['min_detection_confidence']:.2f}"
+        f" | tracking {config['min_tracking_confidence']:.2f}"
+        f" | {row['frames_per_second']:7.1f} fps ({row['milliseconds_per_frame']:6.2f} ms)"
+        f" | detected {100.0 * row['detection_rate']:5.1f}%"
+        f" | error {100.0 * row['mean_landmark_error']:.2f}%"
+    )
+
+
+def _to_points(landmarks):
+    return [(landmark.x, landmark.y) for landmark in landmarks]
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+# Suite benchmarks are set up by a function that returns the operation to time. Resources that have to be released
+# afterwards are registered on the exit stack.
+SUITE_BENCHMARKS = {}
+
+
+def suite_benchmark(name: str):
+    def register(setup):
+        SUITE_BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def create_hand_landmarks(pinch: bool = False):
+    # An open right hand with the fingers spread in a fan, in normalized image coordinates like MediaPipe's output.
+    landmarks = [Landmark(0.5, 0.8, 0.0)]
+
+    for finger in range(5):
+        angle = math.radians(-60.0 + 30.0 * finger)
+
+        for joint in range(1, 5):
+            distance = 0.06 * joint
+            x = 0.5 + distance * math.sin(angle)
+            y = 0.8 - distance * math.cos(angle)
+            landmarks.append(Landmark(x, y, -0.01 * joint))
+
+    if pinch:
+        landmarks[4] = landmarks[8]
+
+    return landmarks
+
+
+def create_head_landmarks():
+    # The face landmarker returns 478 landmarks. Their exact positions don't matter for drawing cost.
+    return [
+        Landmark(0.5 + 0.1 * math.cos(0.1 * i), 0.4 + 0.15 * math.sin(0.1 * i), 0.0)
+        for i in range(478)
+    ]
+
+
+def create_tracking_state():
+    from aethervr.tracking_state import TrackingState, HeadState, HandState
+
+    return TrackingState(
+        head=HeadState(visible=True, landmarks=create_head_landmarks()),
+        left_hand=HandState(visible=True, landmarks=create_hand_landmarks()),
+        right_hand=HandState(visible=True, landmarks=create_hand_landmarks(pinch=True)),
+    )
+
+
+@suite_benchmark("pose.position_arithmetic")
+def setup_position_arithmetic(stack: ExitStack):
+    from aethervr.pose import Position
+
+    a = Position(0.1, 0.2, 0.3)
+    b = Position(0.4, 0.5, 0.6)
+
+    def run():
+        (a + b - a).lerp(b, 0.5).normalized()
+
+    return run
+
+
+@suite_benchmark("pose.orientation_multiply")
+def setup_orientation_multiply(stack: ExitStack):
+    from aethervr.pose import Orientation
+
+    a = Orientation.from_euler_angles(0.1, 0.2, 0.3)
+    b = Orientation.from_euler_angles(0.4, 0.5, 0.6)
+    return lambda: a * b
+
+
+@suite_benchmark("pose.orientation_slerp")
+def setup_orientation_slerp(stack: ExitStack):
+    from aethervr.pose import Orientation
+
+    a = Orientation.from_euler_angles(0.1, 0.2, 0.3)
+    b = Orientation.from_euler_angles(0.4, 0.5, 0.6)
+    return lambda: a.slerp(b, 0.5)
+
+
+@suite_benchmark("pose.from_euler_angles")
+def setup_from_euler_angles(stack: ExitStack):
+    from aethervr.pose import Orientation
+
+    return lambda: Orientation.from_euler_angles(0.1, 0.2, 0.3)
+
+
+@suite_benchmark("pose.from_triangle")
+def setup_from_triangle(stack: ExitStack):
+    from aethervr.pose import Position, Orientation
+
+    p1 = Position(0.5, -0.8, 0.0)
+    p2 = Position(0.45, -0.6, -0.02)
+    p3 = Position(0.6, -0.65, -0.02)
+    return lambda: Orientation.from_triangle(p1, p2, p3, False)
+
+
+@suite_benchmark("gesture.detect_on_hand")
+def setup_detect_on_hand(stack: ExitStack):
+    from aethervr.gesture_detector import GestureDetector
+    from aethervr.tracking_state import HandState
+    from aethervr.input_state import ControllerState
+    from aethervr.config import ControllerConfig
+
+    config = ControllerConfig(gesture_mappings={}, thumbstick_enabled=False, press_thumbstick=False)
+    config.set_to_default()
+
+    # Alternate between an open and a pinching hand so that different branches are taken.
+    states = cycle([
+        HandState(visible=True, landmarks=create_hand_landmarks()),
+        HandState(visible=True, landmarks=create_hand_landmarks(pinch=True)),
+    ])
+    input_state = ControllerState()
+
+    return lambda: GestureDetector.detect_on_hand(config, next(states), input_state, False)
+
+
+@suite_benchmark("runtime.serialize_headset_state")
+def setup_serialize_headset_state(stack: ExitStack):
+    connection = _create_runtime_connection(stack)
+    return connection.serialize_headset_state
+
+
+@suite_benchmark("runtime.serialize_controller_state")
+def setup_serialize_controller_state(stack: ExitStack):
+    connection = _create_runtime_connection(stack)
+    return connection.serialize_controller_state
+
+
+def _create_runtime_connection(stack: ExitStack):
+    from aethervr.runtime_connection import RuntimeConnection
+
+    # Any free port will do since the runtime never connects.
+    connection = RuntimeConnection(0)
+    stack.callback(connection.close)
+    return connection
+
+
+@suite_benchmark("gui.update_overlay")
+def setup_update_overlay(stack: ExitStack):
+    import numpy as np
+
+    # Renders into an offscreen buffer, so no display is needed.
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PySide6.QtWidgets import QApplication
+    from aethervr.gui import CameraView
+    from aethervr.config import create_default_config
+
+    application = QApplication.instance() or QApplication([])
+    view = CameraView(create_default_config())
+    view.resize(800, 600)
+    view.show()
+    stack.callback(view.close)
+
+    # The view is only painted once it has been mapped.
+    application.processEvents()
+
+    view.update_frame(np.zeros((480, 640, 3), dtype=np.uint8))
+    view._update_preview()
+    tracking_state = create_tracking_state()
+
+    def run():
+        # update() only schedules a repaint, so paint synchronously to include the drawing cost.
+        view.update_overlay(tracking_state)
+        view.repaint()
+
+    run.application = application
+    return run
+
+
+@suite_benchmark("capture.hand_off")
+def setup_capture_hand_off(stack: ExitStack):
+    import ctypes
+    from aethervr.camera_capture2 import CameraCapture2
+
+    width, height = 640, 480
+    buffer = (ctypes.c_uint8 * (width * height * 3))()
+    pixels = ctypes.cast(buffer, ctypes.POINTER(ctypes.c_uint8))
+
+    def run():
+        CameraCapture2.convert_frame(pixels, width, height)
+
+    run.buffer = buffer
+    return run
+
+
+@suite_benchmark("capture.hand_off_opencv")
+def setup_capture_hand_off_opencv(stack: ExitStack):
+    import numpy as np
+    from aethervr.camera_capture import CameraCapture
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    return lambda: CameraCapture.convert_frame(frame)
+
+
+@suite_benchmark("capture.mjpeg_decode_full")
+def setup_mjpeg_decode_full(stack: ExitStack, mjpeg: str = None):
+    return _setup_mjpeg_decode(mjpeg, 1)
+
+
+@suite_benchmark("capture.mjpeg_decode_half")
+def setup_mjpeg_decode_half(stack: ExitStack, mjpeg: str = None):
+    return _setup_mjpeg_decode(mjpeg, 2)
+
+
+@suite_benchmark("capture.mjpeg_decode_quarter")
+def setup_mjpeg_decode_quarter(stack: ExitStack, mjpeg: str = None):
+    return _setup_mjpeg_decode(mjpeg, 4)
+
+
+def _setup_mjpeg_decode(mjpeg: str, scale: int):
+    import numpy as np
+    import cv2
+    from aethervr.camera_capture2 import CameraCapture2
+
+    if mjpeg is not None:
+        frames = load_mjpeg(mjpeg, 300)
+
+        if not frames:
+            raise SkipBenchmark(f"no frames in {mjpeg}")
+    else:
+        # A smooth 720p test image compresses about as well as a webcam frame.
+        y, x = np.mgrid[0:720, 0:1280]
+        image = np.dstack([(x * 0.2) % 255, (y * 0.3) % 255, ((x + y) * 0.1) % 255]).astype(np.uint8)
+        _, data = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        frames = [data.ravel()]
+
+    frame_iterator = cycle(frames)
+    return lambda: CameraCapture2.decode_frame(next(frame_iterator), scale)
+
+
+@suite_benchmark("motion.gate_still_frame")
+def setup_motion_gate_still_frame(stack: ExitStack):
+    import numpy as np
+    from aethervr.motion_gate import MotionGate, create_thumbnail, get_hand_landmarks
+
+    # The cost that is added to every tracked frame: a thumbnail and the comparison around both hands.
+    frame = np.random.default_rng(0).integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+    landmark_sets = get_hand_landmarks(create_tracking_state())
+    gate = MotionGate()
+    gate.mark_run(create_thumbnail(frame), 0.0)
+
+    return lambda: gate.has_moved(create_thumbnail(frame), landmark_sets, 0.0)
+
+
+@suite_benchmark("replay.head_tracker")
+def setup_replay_head_tracker(stack: ExitStack, footage: str = None):
+    from aethervr.head_tracker import HeadTracker
+    return _setup_replay(stack, footage, lambda callback, config: HeadTracker(callback, config))
+
+
+@suite_benchmark("replay.hand_tracker")
+def setup_replay_hand_tracker(stack: ExitStack, footage: str = None):
+    from aethervr.hand_tracker import HandTracker
+    return _setup_replay(stack, footage, lambda callback, config: HandTracker(None, callback, config))
+
+
+@suite_benchmark("replay.head_tracker_workers")
+def setup_replay_head_tracker_workers(stack: ExitStack, footage: str = None):
+    from aethervr.head_tracker import HeadTracker
+    from aethervr.inference_workers import InferenceWorkers
+
+    workers = InferenceWorkers()
+    stack.callback(workers.close)
+    return _setup_replay(stack, footage, lambda callback, config: HeadTracker(callback, config, workers))
+
+
+@suite_benchmark("replay.hand_tracker_workers")
+def setup_replay_hand_tracker_workers(stack: ExitStack, footage: str = None):
+    from aethervr.hand_tracker import HandTracker
+    from aethervr.inference_workers import InferenceWorkers
+
+    workers = InferenceWorkers()
+    stack.callback(workers.close)
+    return _setup_replay(stack, footage, lambda callback, config: HandTracker(None, callback, config, workers))
+
+
+@suite_benchmark("workers.release_failed_frame")
+def setup_workers_release_failed_frame(stack: ExitStack):
+    from contextlib import redirect_stdout
+    import numpy as np
+    from aethervr.inference_workers import InferenceWorkers
+    from aethervr import performance
+
+    # A landmarker that fails on every frame. Each frame has to come out of the pipeline through `discard`, otherwise
+    # the engine would never get its slot back and stop tracking.
+    def infer(image, timestamp: int):
+        raise RuntimeError("injected inference failure")
+
+    def publish(result):
+        raise RuntimeError("a failed frame was published")
+
+    # Every failure prints an error.
+    stack.enter_context(redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+
+    workers = InferenceWorkers()
+    stack.callback(workers.close)
+    released = Event()
+    chain = workers.create_chain(
+        "head",
+        infer,
+        lambda result, capture_time, frame_id: result,
+        publish,
+        lambda capture_time, frame_id: released.set(),
+        performance.stats.head_inference_latency,
+    )
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    def run():
+        released.clear()
+        chain.submit(frame, time.perf_counter(), 1)
+
+        if not released.wait(5.0):
+            raise RuntimeError("Failed frame wasn't released")
+
+    return run
+
+
+def _setup_replay(stack: ExitStack, footage: str, create_tracker):
+    if footage is None:
+        raise SkipBenchmark("no footage given (--footage)")
+
+    frames, _ = load_footage(footage, 300)
+
+    if not frames:
+        raise SkipBenchmark(f"no frames in {footage}")
+
+    config = InferenceConfig(InferenceDelegate.CPU, 0.0, 0.0, 0.0)
+    config.set_to_default()
+
+    # Each frame is only submitted once the previous result arrived, so MediaPipe doesn't drop any of them and the
+    # time per call covers the whole tracker, from submission to the result callback.
+    result_available = Event()
+    tracker = create_tracker(lambda *args: result_available.set(), config)
+    stack.callback(tracker.close)
+    frame_iterator = cycle(enumerate(frames))
+
+    def run():
+        frame_id, frame = next(frame_iterator)
+        result_available.clear()
+        tracker.detect(frame, time.perf_counter(), frame_id)
+
+        if not result_available.wait(5.0):
+            raise RuntimeError("No tracking result received")
+
+    return run
+
+
+def measure(function, repeat: int):
+    # The calibration calls also warm up lazy imports and caches, so they aren't part of the results.
+    number = 1
+
+    while _time_calls(function, number) < MIN_RUN_DURATION:
+        number *= 2
+
+    durations = [_time_calls(function, number) for _ in range(repeat)]
+    times = [1e6 * duration / number for duration in durations]
+
+    return {
+        "calls_per_run": number,
+        "runs": repeat,
+        "min_us": min(times),
+        "median_us": statistics.median(times),
+        "max_us": max(times),
+    }
+
+
+def _time_calls(function, number: int) -> float:
+    start_time = time.perf_counter()
+
+    for _ in range(number):
+        function()
+
+    return time.perf_counter() - start_time
+
+
+def run_suite(args):
+    results = {}
+    skipped = {}
+
+    for name, setup in SUITE_BENCHMARKS.items():
+        if args.filter is not None and not any(pattern in name for pattern in args.filter.split(",")):
+            continue
+
+        with ExitStack() as stack:
+            try:
+                if name.startswith("replay."):
+                    function = setup(stack, args.footage)
+                elif name.startswith("capture.mjpeg_"):
+                    function = setup(stack, args.mjpeg)
+                else:
+                    function = setup(stack)
+
+                result = measure(function, args.repeat)
+            except SkipBenchmark as e:
+                skipped[name] = str(e)
+                print(f"{name:<36} skipped: {e}")
+                continue
+            except ImportError as e:
+                skipped[name] = f"missing dependency: {e.name}"
+                print(f"{name:<36} skipped: missing dependency {e.name}")
+                continue
+
+        results[name] = result
+        print(f"{name:<36} {result['median_us']:12.2f} us (min {result['min_us']:.2f} us)")
+
+    output = {
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump(output, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        if not compare_to_baseline(results, baseline["results"], args.tolerance):
+            sys.exit(1)
+
+
+def compare_to_baseline(results, baseline_results, tolerance: float) -> bool:
+    # The medians are compared because they are less affected by the occasional slow run than the means.
+    print()
+    print(f"Comparison to baseline (tolerance {100.0 * tolerance:.0f}%):")
+    passed = True
+
+    for name, result in results.items():
+        if name not in baseline_results:
+            print(f"{name:<36} new")
+            continue
+
+        ratio = result["median_us"] / baseline_results[name]["median_us"]
+
+        if ratio > 1.0 + tolerance:
+            status = "REGRESSION"
+            passed = False
+        elif ratio < 1.0 - tolerance:
+            status = "improvement"
+        else:
+            status = "unchanged"
+
+        print(f"{name:<36} {100.0 * (ratio - 1.0):+7.1f}% {status}")
+
+    return passed
+
+
+
+def main():
+    parser = ArgumentParser(description="Benchmarks for the AetherVR tracker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    inference_parser = subparsers.add_parser(
+        "inference",
+        help="sweep the inference settings on recorded footage and compare throughput against accuracy",
+    )
+    inference_parser.add_argument("footage", help="video file to run the landmarkers on")
+    inference_parser.add_argument("--tracker", choices=["head", "hand", "both"], default="both")
+    inference_parser.add_argument("--confidences", default=DEFAULT_CONFIDENCES, help="comma-separated thresholds")
+    inference_parser.add_argument("--delegates", default="cpu", help="comma-separated delegates (cpu, gpu)")
+    inference_parser.add_argument("--max-frames", type=int, default=300)
+    inference_parser.add_argument("--json", help="write the results to this file")
+    inference_parser.set_defaults(function=benchmark_inference)
+
+    suite_parser = subparsers.add_parser(
+        "suite",
+        help="time the hot paths of the tracker, optionally comparing the results against a baseline",
+    )
+    suite_parser.add_argument("--filter", help="comma-separated substrings of the benchmarks to run")
+    suite_parser.add_argument("--footage", help="video file for the end-to-end replay benchmarks")
+    suite_parser.add_argument("--mjpeg", help="MJPEG file for the decoding benchmarks instead of a test image")
+    suite_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="number of timed runs")
+    suite_parser.add_argument("--json", help="write the results to this file")
+    suite_parser.add_argument("--baseline", help="results file to compare against, fails on regressions")
+    suite_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="relative slowdown that counts as a regression",
+    )
+    suite_parser.set_defaults(function=run_suite)
+
+    args = parser.parse_args()
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+
+from aethervr.engine import TrackingEngine
+from aethervr.engine_server import EngineServer
+from aethervr.config import *
+from aethervr import mediapipe_models
+from aethervr import ipc
+from aethervr import save
+
+
+# Runs the tracker without a window. The GUI can be attached with `aethervr_tracker.py --attach` and detached again
+# at any time without interrupting tracking.
+class Daemon:
+
+    def __init__(self):
+        self.config = create_default_config()
+        save.load_config(self.config)
+
+        self.engine = TrackingEngine(self.config)
+        self.server = EngineServer(self.engine, ipc.CONTROL_PORT)
+        self.engine.frontend = self.server
+
+    def run(self):
+        if not mediapipe_models.are_all_models_cached():
+            print("Downloading MediaPipe models...")
+            mediapipe_models.download_sync(
+                lambda: print("MediaPipe models downloaded"),
+                lambda message: print(f"Failed to download MediaPipe models: {message}"),
+            )
+
+            if not mediapipe_models.are_all_models_cached():
+                return
+
+        if self.engine.initialize():
+            print("Tracking daemon running, press Ctrl+C to stop")
+
+            try:
+                while not self.server.stopped.wait(1.0):
+                    pass
+            except KeyboardInterrupt:
+                pass
+
+        save.save_config(self.config)
+
+    def close(self):
+        self.server.close()
+        self.engine.close()
+
+
+if __name__ == "__main__":
+    try:
+        daemon = Daemon()
+    except Exception as e:
+        print(e)
+        os._exit(1)
+
+    try:
+        daemon.run()
+    finally:
+        daemon.close()
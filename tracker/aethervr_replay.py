@@ -0,0 +1,180 @@
+from argparse import ArgumentParser
+from typing import Optional
+import json
+import time
+
+import numpy as np
+
+from aethervr.config import create_default_config, HAND_TRACKING_MODE_NAMES
+from aethervr.input_state import HeadsetState, ControllerState
+from aethervr.landmark_recording import read_recording, to_landmarks
+from aethervr.pose import get_quaternion
+from aethervr.pose_reconstruction import reconstruct_head_state, reconstruct_hand_states
+from aethervr.runtime_connection import serialize_headset_state, serialize_controller_state
+from aethervr.tracking_pipeline import TrackingPipeline
+from aethervr import save
+
+
+# Stands in for the runtime connection and serializes every update like a runtime poll would.
+class ReplayConnection:
+
+    def __init__(self, output):
+        self.output = output
+        self.time = 0.0
+        self.num_messages = 0
+
+    def update_tracking_state(
+        self,
+        headset_state: Optional[HeadsetState],
+        controller_states: Optional[tuple[ControllerState, ControllerState]],
+        capture_time: float = 0.0,
+        frame_id: int = 0,
+    ):
+        if headset_state is not None and controller_states is not None:
+            kind = "both"
+        elif headset_state is not None:
+            kind = "headset"
+        else:
+            kind = "controllers"
+
+        message = b""
+
+        if headset_state is not None:
+            message += serialize_headset_state(headset_state)
+
+        if controller_states is not None:
+            message += serialize_controller_state(*controller_states)
+
+        self._write(kind, frame_id, message)
+
+    def _write(self, kind: str, frame_id: int, message: bytes):
+        self.num_messages += 1
+
+        if self.output is not None:
+            line = {"time": self.time, "kind": kind, "frame_id": frame_id, "data": message.hex()}
+            self.output.write(json.dumps(line))
+            self.output.write("\n")
+
+
+def replay(recording, config, connection: ReplayConnection):
+    # Held results are paired by the recorded capture times instead of the wall clock, so that replaying the same
+    # recording always gives the same messages.
+    pipeline = TrackingPipeline(config, connection, clock=lambda: connection.time)
+    head = recording["head"]
+    hand = recording["hand"]
+
+    # Head and hand results are replayed in the order in which their frames were captured.
+    times = np.concatenate([head["time"], hand["time"]])
+    order = np.argsort(times, kind="stable")
+    num_head_rows = len(head["time"])
+
+    # Frames that both trackers produced a result for are published together, like in the tracker.
+    shared_frames = set(head["frame_id"].tolist()) & set(hand["frame_id"].tolist())
+    shared_frames.discard(0)
+    expected_frames = set()
+
+    gesture_counts = {}
+
+    for index in order.tolist():
+        connection.time = float(times[index])
+
+        if index < num_head_rows:
+            frame_id = int(head["frame_id"][index])
+        else:
+            frame_id = int(hand["frame_id"][index - num_head_rows])
+
+        if frame_id in shared_frames and frame_id not in expected_frames:
+            expected_frames.add(frame_id)
+            pipeline.fusion.expect_both(frame_id)
+
+        if index < num_head_rows:
+            i = index
+            matrix = head["matrix"][i] if head["has_matrix"][i] else None
+
+            # Face landmarks are only drawn by the GUI and converting all 478 of them would dominate the replay time.
+            # They are available as `head["landmarks"]` when needed.
+            pipeline.process_head_state(reconstruct_head_state(None, matrix, 0.0, frame_id))
+        else:
+            i = index - num_head_rows
+            num_hands = int(hand["num_hands"][i])
+            hand_landmarks = [to_landmarks(hand["landmarks"][i][j]) for j in range(num_hands)]
+            hand_world_landmarks = [to_landmarks(hand["world_landmarks"][i][j]) for j in range(num_hands)]
+
+            left_state, right_state = reconstruct_hand_states(
+                hand_landmarks,
+                hand_world_landmarks,
+                int(hand["timestamp"][i]),
+                0.0,
+                frame_id,
+            )
+
+            pipeline.process_hand_states(left_state, right_state)
+
+            for name, state in (("left", left_state), ("right", right_state)):
+                if state.gesture is not None and state.gesture != state.previous_gesture:
+                    key = f"{name} {state.gesture.name.lower()}"
+                    gesture_counts[key] = gesture_counts.get(key, 0) + 1
+
+    pipeline.fusion.close()
+    return gesture_counts
+
+
+def main():
+    parser = ArgumentParser(description="Replays recorded landmarks through the tracking pipeline without MediaPipe")
+    parser.add_argument("recording", help="file recorded with `aethervr_tracker.py --record-landmarks <file>`")
+    parser.add_argument("--config", help="config file to use instead of the tracker's config.json")
+    parser.add_argument(
+        "--hand-tracking-mode",
+        choices=[name for _, name in HAND_TRACKING_MODE_NAMES],
+        help="override the hand tracking mode of the config",
+    )
+    parser.add_argument("--output", help="write every message sent to the runtime to this file (JSON lines)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the recording this many times")
+    args = parser.parse_args()
+
+    config = create_default_config()
+
+    if args.config is not None:
+        with open(args.config) as file:
+            config.deserialize(json.load(file))
+    else:
+        save.load_config(config)
+
+    if args.hand_tracking_mode is not None:
+        modes_by_name = {name: mode for mode, name in HAND_TRACKING_MODE_NAMES}
+        config.hand_tracking_mode = modes_by_name[args.hand_tracking_mode]
+
+    # numpy-quaternion is imported lazily by the pose code. Importing it here keeps it out of the replay time.
+    get_quaternion()
+
+    recording = read_recording(args.recording)
+    num_head_rows = len(recording["head"]["time"])
+    num_hand_rows = len(recording["hand"]["time"])
+    times = np.concatenate([recording["head"]["time"], recording["hand"]["time"]])
+    duration = float(times.max() - times.min()) if len(times) > 0 else 0.0
+
+    print(f"Loaded {num_head_rows} head and {num_hand_rows} hand results ({duration:.1f} s)")
+
+    output = open(args.output, "w") if args.output is not None else None
+
+    try:
+        for i in range(args.repeat):
+            # Only the first run is written so the output matches a single replay.
+            connection = ReplayConnection(output if i == 0 else None)
+
+            start_time = time.perf_counter()
+            gesture_counts = replay(recording, config, connection)
+            replay_time = time.perf_counter() - start_time
+
+            speedup = duration / replay_time if replay_time > 0.0 else float("inf")
+            print(f"Replayed {connection.num_messages} messages in {replay_time:.3f} s ({speedup:.0f}x real time)")
+    finally:
+        if output is not None:
+            output.close()
+
+    for gesture, count in sorted(gesture_counts.items()):
+        print(f"  {gesture}: {count}")
+
+
+if __name__ == "__main__":
+    main()